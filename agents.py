@@ -1,10 +1,14 @@
 """CrewAI Agent and Task definitions for the Autonomous Business Logic Orchestrator."""
 
 import logging
+import threading
 from typing import Any, Optional
 
 from crewai import Agent, Crew, Process, Task
+from crewai.tools import BaseTool as CrewBaseTool
+from pydantic import Field
 
+from config import get_settings
 from config.prompts import (
     ANALYST_BACKSTORY,
     ANALYST_GOAL,
@@ -16,21 +20,115 @@ from config.prompts import (
     EXECUTION_OFFICER_GOAL,
     EXECUTION_OFFICER_ROLE,
     TASK_ANALYZE_DESCRIPTION,
+    TASK_ANALYZE_PRECOMPUTED_DESCRIPTION,
     TASK_ANALYZE_OUTPUT,
+    TASK_STRATEGIZE_CHUNK_DESCRIPTION,
+    TASK_STRATEGIZE_CHUNK_OUTPUT,
     TASK_STRATEGIZE_DESCRIPTION,
     TASK_STRATEGIZE_OUTPUT,
     TASK_EXECUTE_DESCRIPTION,
     TASK_EXECUTE_OUTPUT,
+    TASK_SCOPE_PREFIX,
 )
-from tools import DatabaseTool, SupplierCommunicationTool, CompetitorScraperTool
+from llm.compaction import get_context_compactor
+from llm.traced_llm import with_tracing
+from models.schemas import AnalystReport, ExecutionResult, StrategistDecisions
+from orchestration.strategist_fanout import chunk_report, parse_decisions, run_fanout
+from telemetry import get_tracer
 from tools.crewai_wrappers import (
     ERPDatabaseTool,
     SupplierCommunicationCrewTool,
     CompetitorScraperCrewTool,
+    KnowledgeBaseCrewTool,
+)
+from tools.registry import (
+    COMPETITOR_TOOL,
+    DATABASE_TOOL,
+    KNOWLEDGE_TOOL,
+    SUPPLIER_TOOL,
+    ToolRegistry,
+    get_tool_registry,
 )
 
 logger = logging.getLogger(__name__)
 
+STRATEGIZE_TASK = "strategize_actions"
+
+
+class TracedAgent(Agent):
+    """
+    Agent whose task executions are recorded as "task" spans on the process tracer. The
+    upstream context it is handed is compacted to its CONTEXT_BUDGET_* first; with
+    ``context_report`` (the run's AnalystReport) the strategist reads the report as tables
+    instead of the analyst's text, and the execution officer's decisions carry product data.
+    """
+
+    context_report: Optional[AnalystReport] = Field(default=None, exclude=True)
+
+    def execute_task(self, task: Task, context: Optional[str] = None, tools: Optional[list] = None) -> Any:
+        compacted = get_context_compactor().compact_context(
+            self.role, context or "", self.context_report
+        )
+        with get_tracer().span(
+            f"task.{task.name or 'task'}",
+            "task",
+            agent=self.role,
+            bytes_in=len(compacted.text),
+            tokens_saved=compacted.tokens_saved,
+        ) as span:
+            result = super().execute_task(task, compacted.text if context else context, tools)
+            span.set(bytes_out=len(str(result)))
+            return result
+
+
+class FanOutStrategistAgent(TracedAgent):
+    """
+    Strategist that decides the strategize task map-reduce style: each worker thread
+    builds one strategist agent and decides its chunks of the precomputed report with it
+    (agents hold per-task executor state, so they are not shared between threads). LLM
+    calls hold the process-wide LLM slot and the merged StrategistDecisions JSON is the
+    task result. Reports that fit in one chunk, and other tasks, run normally.
+    """
+
+    report_chunks: list[AnalystReport] = Field(default_factory=list, exclude=True)
+
+    def execute_task(self, task: Task, context: Optional[str] = None, tools: Optional[list] = None) -> Any:
+        if task.name != STRATEGIZE_TASK or len(self.report_chunks) < 2:
+            return super().execute_task(task, context, tools)
+        total = len(self.report_chunks)
+        workers = threading.local()
+
+        def decide(index: int, chunk: AnalystReport) -> Optional[StrategistDecisions]:
+            agent = getattr(workers, "agent", None)
+            if agent is None:
+                agent = workers.agent = TracedAgent(
+                    role=self.role,
+                    goal=self.goal,
+                    backstory=self.backstory,
+                    llm=self.llm,
+                    tools=list(self.tools or []),
+                    verbose=self.verbose,
+                    allow_delegation=False,
+                )
+            output = create_strategize_chunk_task(agent, chunk, index, total).execute_sync(agent=agent)
+            if isinstance(output.pydantic, StrategistDecisions):
+                return output.pydantic
+            return parse_decisions(output.raw)
+
+        with get_tracer().span(
+            f"task.{task.name}", "task", agent=self.role, chunks=total, bytes_in=len(context or "")
+        ) as span:
+            result = run_fanout(self.report_chunks, decide).model_dump_json()
+            span.set(bytes_out=len(result))
+            return result
+
+
+def _as_crew_tool(tool: Any, wrapper_cls: type, registry: ToolRegistry, key: str) -> CrewBaseTool:
+    """Wrap a LangChain tool for CrewAI; fall back to the registry's shared instance."""
+    if isinstance(tool, CrewBaseTool):
+        return tool
+    return wrapper_cls(langchain_tool=tool if tool is not None else registry.get(key))
+
 
 def create_analyst_agent(
     llm: Any,
@@ -39,7 +137,7 @@ def create_analyst_agent(
     verbose: bool = True,
 ) -> Agent:
     """Build the Inventory & Market Analyst agent. Uses CrewAI-wrapped tools."""
-    return Agent(
+    return TracedAgent(
         role=ANALYST_ROLE,
         goal=ANALYST_GOAL,
         backstory=ANALYST_BACKSTORY,
@@ -50,16 +148,32 @@ def create_analyst_agent(
     )
 
 
-def create_strategist_agent(llm: Any, verbose: bool = True) -> Agent:
-    """Build the Business Strategist agent (no tools; uses context only)."""
-    return Agent(
+def create_strategist_agent(
+    llm: Any,
+    knowledge_tool: Any = None,
+    verbose: bool = True,
+    report_chunks: Optional[list[AnalystReport]] = None,
+    context_report: Optional[AnalystReport] = None,
+) -> Agent:
+    """
+    Build the Business Strategist agent. Its one tool searches history and policies.
+    With more than one report chunk it fans the strategize task out over them;
+    ``context_report`` replaces the analyst's hand-off text (see TracedAgent).
+    """
+    agent_cls = TracedAgent
+    extra: dict[str, Any] = {}
+    if report_chunks is not None and len(report_chunks) > 1:
+        agent_cls, extra = FanOutStrategistAgent, {"report_chunks": report_chunks}
+    return agent_cls(
         role=STRATEGIST_ROLE,
         goal=STRATEGIST_GOAL,
         backstory=STRATEGIST_BACKSTORY,
         llm=llm,
-        tools=[],
+        tools=[knowledge_tool or KnowledgeBaseCrewTool()],
         verbose=verbose,
         allow_delegation=False,
+        context_report=context_report,
+        **extra,
     )
 
 
@@ -68,9 +182,13 @@ def create_execution_officer_agent(
     db_tool: Any = None,
     supplier_tool: Any = None,
     verbose: bool = True,
+    context_report: Optional[AnalystReport] = None,
 ) -> Agent:
-    """Build the Execution Officer agent. Uses CrewAI-wrapped tools."""
-    return Agent(
+    """
+    Build the Execution Officer agent. Uses CrewAI-wrapped tools; ``context_report``
+    annotates the strategist's decisions with product data (see TracedAgent).
+    """
+    return TracedAgent(
         role=EXECUTION_OFFICER_ROLE,
         goal=EXECUTION_OFFICER_GOAL,
         backstory=EXECUTION_OFFICER_BACKSTORY,
@@ -78,14 +196,33 @@ def create_execution_officer_agent(
         tools=[db_tool or ERPDatabaseTool(), supplier_tool or SupplierCommunicationCrewTool()],
         verbose=verbose,
         allow_delegation=False,
+        context_report=context_report,
     )
 
 
-def create_analyze_task(agent: Agent) -> Task:
-    """Task: Analyze inventory and competitor pricing."""
+def create_analyze_task(
+    agent: Agent,
+    precomputed: Optional[AnalystReport] = None,
+    scope: Optional[str] = None,
+) -> Task:
+    """
+    Task: Analyze inventory and competitor pricing. If a precomputed report is given
+    (see analysis.InventoryAnalyzer), it is embedded so the agent reviews it instead
+    of discovering findings with ad-hoc SQL and per-SKU scraper calls (as compact
+    tables within CONTEXT_BUDGET_ANALYST tokens). ``scope`` restricts the analysis to
+    part of the catalog (e.g. one shard's SKU range).
+    """
+    description = TASK_ANALYZE_DESCRIPTION
+    if precomputed is not None:
+        compactor = get_context_compactor()
+        description = TASK_ANALYZE_PRECOMPUTED_DESCRIPTION + compactor.compact_report(
+            precomputed, compactor.budget_for(agent.role)
+        ).text
+    if scope:
+        description = f"{TASK_SCOPE_PREFIX}{scope}\n\n{description}"
     return Task(
         name="analyze_inventory_and_market",
-        description=TASK_ANALYZE_DESCRIPTION,
+        description=description,
         expected_output=TASK_ANALYZE_OUTPUT,
         agent=agent,
     )
@@ -94,7 +231,7 @@ def create_analyze_task(agent: Agent) -> Task:
 def create_strategize_task(agent: Agent, context_task: Task) -> Task:
     """Task: Decide reorder vs discount campaign from analyst report."""
     return Task(
-        name="strategize_actions",
+        name=STRATEGIZE_TASK,
         description=TASK_STRATEGIZE_DESCRIPTION,
         expected_output=TASK_STRATEGIZE_OUTPUT,
         agent=agent,
@@ -102,14 +239,35 @@ def create_strategize_task(agent: Agent, context_task: Task) -> Task:
     )
 
 
-def create_execute_task(agent: Agent, context_task: Task) -> Task:
-    """Task: Execute supplier emails and price updates."""
+def create_strategize_chunk_task(
+    agent: Agent, chunk: AnalystReport, index: int, total: int
+) -> Task:
+    """Task: Decide one chunk of the analyst report (fan-out strategist), as StrategistDecisions."""
+    description = TASK_STRATEGIZE_CHUNK_DESCRIPTION.format(index=index + 1, total=total)
+    # Held to the strategist budget like the single call; SKUs cut from a chunk that
+    # grew past it (STRATEGIST_MAX_CHUNKS) are merged as no_action
+    compactor = get_context_compactor()
+    findings = compactor.compact_report(chunk, compactor.budget_for(STRATEGIST_ROLE)).text
+    return Task(
+        name=f"strategize_chunk_{index + 1}_of_{total}",
+        description=description + findings,
+        expected_output=TASK_STRATEGIZE_CHUNK_OUTPUT,
+        agent=agent,
+        output_pydantic=StrategistDecisions,
+    )
+
+
+def create_execute_task(
+    agent: Agent, context_task: Task, structured_output: bool = False
+) -> Task:
+    """Task: Execute supplier emails and price updates (optionally as an ExecutionResult)."""
     return Task(
         name="execute_actions",
         description=TASK_EXECUTE_DESCRIPTION,
         expected_output=TASK_EXECUTE_OUTPUT,
         agent=agent,
         context=[context_task],
+        output_pydantic=ExecutionResult if structured_output else None,
     )
 
 
@@ -119,20 +277,71 @@ def create_crew(
     db_tool: Optional[Any] = None,
     supplier_tool: Optional[Any] = None,
     competitor_tool: Optional[Any] = None,
+    knowledge_tool: Optional[Any] = None,
+    registry: Optional[ToolRegistry] = None,
+    analyst_report: Optional[AnalystReport] = None,
+    scope: Optional[str] = None,
+    structured_output: bool = False,
+    strategist_chunk_size: Optional[int] = None,
     verbose: bool = True,
 ) -> Crew:
     """
-    Assemble agents and tasks into a sequential Crew. Uses CrewAI-wrapped tools (optional LangChain instances ignored for agent tools).
+    Assemble agents and tasks into a sequential Crew. Tools may be LangChain instances
+    (wrapped for CrewAI) or CrewAI tools; any not given come from the shared tool registry,
+    so one DatabaseTool is used by both the analyst and the execution officer.
+    analyst_report, if given, is handed to the analyst as precomputed context; scope
+    limits the run to part of the catalog; structured_output makes the execute task
+    return an ExecutionResult (used when merging sharded runs). With an analyst_report
+    larger than ``strategist_chunk_size`` findings (STRATEGIST_CHUNK_SIZE) the strategist
+    decides it in concurrent chunks, at most STRATEGIST_MAX_CHUNKS of them (see
+    FanOutStrategistAgent). Task hand-offs, the report and tool results are compacted
+    to the CONTEXT_* budgets. With TRACING_ENABLED the LLM, every tool call and every
+    task are recorded on the process tracer.
     """
-    analyst = create_analyst_agent(llm, db_tool=db_tool, competitor_tool=competitor_tool, verbose=verbose)
-    strategist = create_strategist_agent(llm, verbose=verbose)
+    registry = registry or get_tool_registry()
+    llm = with_tracing(llm)
+    crew_db_tool = _as_crew_tool(db_tool, ERPDatabaseTool, registry, DATABASE_TOOL)
+    crew_supplier_tool = _as_crew_tool(
+        supplier_tool, SupplierCommunicationCrewTool, registry, SUPPLIER_TOOL
+    )
+    crew_competitor_tool = _as_crew_tool(
+        competitor_tool, CompetitorScraperCrewTool, registry, COMPETITOR_TOOL
+    )
+    crew_knowledge_tool = _as_crew_tool(
+        knowledge_tool, KnowledgeBaseCrewTool, registry, KNOWLEDGE_TOOL
+    )
+
+    analyst = create_analyst_agent(
+        llm, db_tool=crew_db_tool, competitor_tool=crew_competitor_tool, verbose=verbose
+    )
+    settings = get_settings()
+    if strategist_chunk_size is None:
+        strategist_chunk_size = settings.strategist_chunk_size
+    report_chunks = (
+        chunk_report(analyst_report, strategist_chunk_size, settings.strategist_max_chunks)
+        if analyst_report is not None
+        else None
+    )
+    strategist = create_strategist_agent(
+        llm,
+        knowledge_tool=crew_knowledge_tool,
+        verbose=verbose,
+        report_chunks=report_chunks,
+        context_report=analyst_report,
+    )
     execution_officer = create_execution_officer_agent(
-        llm, db_tool=db_tool, supplier_tool=supplier_tool, verbose=verbose
+        llm,
+        db_tool=crew_db_tool,
+        supplier_tool=crew_supplier_tool,
+        verbose=verbose,
+        context_report=analyst_report,
     )
 
-    task_analyze = create_analyze_task(analyst)
+    task_analyze = create_analyze_task(analyst, precomputed=analyst_report, scope=scope)
     task_strategize = create_strategize_task(strategist, task_analyze)
-    task_execute = create_execute_task(execution_officer, task_strategize)
+    task_execute = create_execute_task(
+        execution_officer, task_strategize, structured_output=structured_output
+    )
 
     crew = Crew(
         agents=[analyst, strategist, execution_officer],
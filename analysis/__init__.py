@@ -0,0 +1,6 @@
+"""Deterministic (non-LLM) analysis of ERP inventory and competitor data."""
+
+from analysis.change_tracker import ChangeSet, ChangeTracker
+from analysis.inventory_analyzer import InventoryAnalyzer
+
+__all__ = ["ChangeSet", "ChangeTracker", "InventoryAnalyzer"]
@@ -0,0 +1,151 @@
+"""Change-data capture for incremental runs: which SKUs changed since the last committed run."""
+
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Optional
+
+from tools.competitor_scraper_tool import CompetitorScraperTool
+from tools.database_tool import DatabaseTool
+from tools.price_store import normalize_sku
+
+logger = logging.getLogger(__name__)
+
+_ERP_MARK = "analysis.product_changes_seq"
+_COMPETITOR_MARK = "analysis.competitor_changed_at"
+_SQLITE_MAX_PARAMS = 500
+
+
+@dataclass
+class ChangeSet:
+    """SKUs to re-analyze plus the watermarks to persist once the run succeeds."""
+
+    skus: list[str] = field(default_factory=list)
+    full: bool = False
+    erp_seq: int = 0
+    competitor_mark: float = 0.0
+    erp_changes: int = 0
+    competitor_changes: int = 0
+
+    @property
+    def empty(self) -> bool:
+        return not self.full and not self.skus
+
+
+class ChangeTracker:
+    """
+    Reads the ``product_changes`` log (filled by triggers on ``products``) after a
+    persisted high-water mark, plus SKUs whose cached competitor prices moved (mapped
+    from their normalized keys back to ``products.sku``). Work is proportional to the
+    number of changes, not the catalog size, apart from that mapping's scan of the SKU
+    column. The first run (no watermark yet) is a full run.
+    """
+
+    def __init__(self, db_tool: DatabaseTool, competitor_tool: CompetitorScraperTool) -> None:
+        self.db_tool = db_tool
+        self.competitor_tool = competitor_tool
+
+    def _get_mark(self, conn: sqlite3.Connection, name: str) -> Optional[str]:
+        row = conn.execute("SELECT value FROM sync_state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def _erp_skus(self, conn: sqlite3.Connection, keys: list[str]) -> list[str]:
+        """ERP SKUs whose normalize_sku() form is one of ``keys`` (competitor change keys)."""
+        conn.create_function("normalize_sku", 1, normalize_sku, deterministic=True)
+        skus: list[str] = []
+        for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+            chunk = keys[start : start + _SQLITE_MAX_PARAMS]
+            skus.extend(
+                row[0]
+                for row in conn.execute(
+                    f"SELECT sku FROM products WHERE normalize_sku(sku) IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return skus
+
+    def pending(self) -> ChangeSet:
+        """Collect changes since the last commit() without moving the watermarks."""
+        now = self.competitor_tool.price_change_watermark()
+        with self.db_tool.pool.connection() as conn:
+            erp_mark = self._get_mark(conn, _ERP_MARK)
+            competitor_mark = self._get_mark(conn, _COMPETITOR_MARK)
+            max_seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM product_changes").fetchone()[0]
+            if erp_mark is None:
+                logger.info("No change watermark yet: running a full analysis")
+                return ChangeSet(full=True, erp_seq=max_seq, competitor_mark=now)
+            erp_skus = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT DISTINCT sku FROM product_changes WHERE seq > ? AND seq <= ?",
+                    (int(erp_mark), max_seq),
+                )
+            ]
+            since = float(competitor_mark) if competitor_mark is not None else 0.0
+            competitor_skus = self.competitor_tool.prices_changed_since(since)
+            if competitor_skus:
+                competitor_skus = self._erp_skus(conn, competitor_skus)
+        skus = list(dict.fromkeys(erp_skus + competitor_skus))
+        changes = ChangeSet(
+            skus=skus,
+            erp_seq=max_seq,
+            competitor_mark=now,
+            erp_changes=len(erp_skus),
+            competitor_changes=len(competitor_skus),
+        )
+        logger.info(
+            "Incremental run: %d changed SKUs (%d ERP, %d competitor price)",
+            len(skus),
+            len(erp_skus),
+            len(competitor_skus),
+        )
+        return changes
+
+    def commit(self, changes: ChangeSet) -> None:
+        """Persist the watermarks of a finished run and prune the consumed change log."""
+        with self.db_tool.pool.connection() as conn:
+            conn.executemany(
+                "INSERT INTO sync_state (name, value) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP",
+                [(_ERP_MARK, str(changes.erp_seq)), (_COMPETITOR_MARK, repr(changes.competitor_mark))],
+            )
+            conn.execute("DELETE FROM product_changes WHERE seq <= ?", (changes.erp_seq,))
+            conn.commit()
+
+    def prune(self, max_rows: int) -> int:
+        """
+        Bound the change log outside incremental runs. Without a watermark no row is ever
+        read (the next incremental run is a full one), so all are dropped; with one, only
+        rows after it are kept, unless more than ``max_rows`` are pending, in which case
+        the watermarks are dropped too. Returns the number of rows deleted.
+        """
+        with self.db_tool.pool.connection() as conn:
+            erp_mark = self._get_mark(conn, _ERP_MARK)
+            if erp_mark is not None:
+                pending = conn.execute(
+                    "SELECT COUNT(*) FROM product_changes WHERE seq > ?", (int(erp_mark),)
+                ).fetchone()[0]
+                if pending > max_rows:
+                    logger.info(
+                        "%d unconsumed product changes exceed %d; next incremental run is full",
+                        pending,
+                        max_rows,
+                    )
+                    conn.execute(
+                        "DELETE FROM sync_state WHERE name IN (?, ?)", (_ERP_MARK, _COMPETITOR_MARK)
+                    )
+                    erp_mark = None
+            if erp_mark is None:
+                deleted = conn.execute("DELETE FROM product_changes").rowcount
+            else:
+                deleted = conn.execute(
+                    "DELETE FROM product_changes WHERE seq <= ?", (int(erp_mark),)
+                ).rowcount
+            conn.commit()
+        return deleted
+
+    def reset(self) -> None:
+        """Forget the watermarks so the next run is a full one."""
+        with self.db_tool.pool.connection() as conn:
+            conn.execute("DELETE FROM sync_state WHERE name IN (?, ?)", (_ERP_MARK, _COMPETITOR_MARK))
+            conn.commit()
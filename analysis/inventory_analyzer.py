@@ -0,0 +1,159 @@
+"""Deterministic, vectorized inventory analysis producing an AnalystReport without LLM calls."""
+
+import logging
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+
+from config import get_settings
+from models.schemas import AnalystReport, LowStockItem, PriceFinding
+from tools.competitor_scraper_tool import CompetitorScraperTool, price_stats
+from tools.database_tool import DatabaseTool
+
+logger = logging.getLogger(__name__)
+
+_PRODUCTS_SQL = "SELECT id, sku, name, price, stock_quantity, min_stock_level FROM products"
+_SQLITE_MAX_PARAMS = 500
+
+# ids, skus, prices, stock, min_stock_level, names(positions) -> {product id: name}
+_Columns = tuple[
+    np.ndarray, list[str], np.ndarray, np.ndarray, np.ndarray, Callable[[np.ndarray], dict[int, str]]
+]
+
+
+class InventoryAnalyzer:
+    """
+    Computes low-stock items and uncompetitive prices in one pass: a single scan of
+    ``products`` plus a NumPy comparison against a packed competitor price matrix.
+    """
+
+    def __init__(
+        self,
+        db_tool: DatabaseTool,
+        competitor_tool: CompetitorScraperTool,
+        *,
+        price_tolerance: Optional[float] = None,
+        competitor_count: int = 3,
+        use_snapshot: Optional[bool] = None,
+    ) -> None:
+        self.db_tool = db_tool
+        self.competitor_tool = competitor_tool
+        self.price_tolerance = (
+            get_settings().analysis_price_tolerance if price_tolerance is None else price_tolerance
+        )
+        self.competitor_count = competitor_count
+        self.use_snapshot = get_settings().analysis_snapshot if use_snapshot is None else use_snapshot
+
+    def analyze(
+        self,
+        sku_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+        skus: Optional[Iterable[str]] = None,
+    ) -> AnalystReport:
+        """
+        Scan the ERP and return the analyst report. ``sku_range`` = (from, to) limits the
+        scan to SKUs with from <= sku < to (either bound may be None), via idx_products_sku;
+        ``skus`` limits it to exactly those SKUs (incremental runs). With ANALYSIS_SNAPSHOT
+        the scan runs over the DatabaseTool's columnar snapshot (refreshed first).
+        """
+        if self.use_snapshot:
+            columns = self._snapshot_columns(sku_range, skus)
+        else:
+            columns = self._query_columns(sku_range, skus)
+        ids, sku_list, prices, stock, min_level, names = columns
+        n = len(sku_list)
+        if n == 0:
+            return AnalystReport(summary="No products in ERP.")
+
+        stats = price_stats(self.competitor_tool.price_matrix(sku_list, self.competitor_count))
+        comp_min = np.where(np.isnan(stats["min"]), np.inf, stats["min"])
+        comp_avg = stats["mean"]
+
+        low_idx = np.flatnonzero(stock < min_level)
+        gap_idx = np.flatnonzero(prices > comp_min * (1.0 + self.price_tolerance))
+        low_names = names(low_idx)
+
+        low_stock_items = [
+            LowStockItem(
+                product_id=int(ids[i]),
+                sku=sku_list[i],
+                name=low_names[int(ids[i])],
+                current_stock=int(stock[i]),
+                min_stock_level=int(min_level[i]),
+            )
+            for i in low_idx
+        ]
+        uncompetitive_prices = [
+            PriceFinding(
+                product_id=int(ids[i]),
+                sku=sku_list[i],
+                our_price=float(prices[i]),
+                competitor_min=round(float(comp_min[i]), 2),
+                competitor_avg=round(float(comp_avg[i]), 2),
+            )
+            for i in gap_idx
+        ]
+        summary = (
+            f"{len(low_stock_items)} low-stock items and {len(uncompetitive_prices)} "
+            f"uncompetitive prices across {n} products "
+            f"(price tolerance {self.price_tolerance:.0%} over competitor minimum)."
+        )
+        logger.info("InventoryAnalyzer: %s", summary)
+        return AnalystReport(
+            low_stock_items=low_stock_items,
+            uncompetitive_prices=uncompetitive_prices,
+            summary=summary,
+        )
+
+    def _snapshot_columns(
+        self,
+        sku_range: Optional[tuple[Optional[str], Optional[str]]],
+        skus: Optional[Iterable[str]],
+    ) -> _Columns:
+        snapshot = self.db_tool.snapshot()
+        snapshot.refresh()
+        ids, sku_list, prices, stock, min_level = snapshot.columns(sku_range=sku_range, skus=skus)
+        return (
+            ids,
+            sku_list,
+            prices,
+            stock,
+            min_level,
+            lambda positions: snapshot.names_of(ids[positions].tolist()),
+        )
+
+    def _query_columns(
+        self,
+        sku_range: Optional[tuple[Optional[str], Optional[str]]],
+        skus: Optional[Iterable[str]],
+    ) -> _Columns:
+        sql, args = _PRODUCTS_SQL, []
+        lo, hi = sku_range or (None, None)
+        clauses = []
+        if lo is not None:
+            clauses.append("sku >= ?")
+            args.append(lo)
+        if hi is not None:
+            clauses.append("sku < ?")
+            args.append(hi)
+        with self.db_tool.pool.connection() as conn:
+            if skus is None:
+                if clauses:
+                    sql += " WHERE " + " AND ".join(clauses)
+                rows = conn.execute(sql + " ORDER BY id", args).fetchall()
+            else:
+                wanted = list(dict.fromkeys(skus))
+                rows = []
+                for start in range(0, len(wanted), _SQLITE_MAX_PARAMS):
+                    chunk = wanted[start : start + _SQLITE_MAX_PARAMS]
+                    where = clauses + [f"sku IN ({','.join('?' * len(chunk))})"]
+                    rows.extend(conn.execute(f"{sql} WHERE {' AND '.join(where)}", args + chunk))
+                rows.sort(key=lambda r: r[0])
+        n = len(rows)
+        return (
+            np.fromiter((r[0] for r in rows), dtype=np.int64, count=n),
+            [r[1] for r in rows],
+            np.fromiter((r[3] for r in rows), dtype=np.float64, count=n),
+            np.fromiter((r[4] for r in rows), dtype=np.int64, count=n),
+            np.fromiter((r[5] for r in rows), dtype=np.int64, count=n),
+            lambda positions: {rows[i][0]: rows[i][2] for i in positions},
+        )
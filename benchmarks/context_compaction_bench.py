@@ -0,0 +1,71 @@
+"""
+Benchmark: prompt tokens per pipeline run without (before) and with (after) context
+compaction. Runs the offline pipeline (benchmarks/pipeline_bench.py) twice per catalog
+size with CONTEXT_COMPACTION off and on, and reports the estimated tokens the scripted
+LLM was sent per phase plus what the compactor saved per kind (task hand-offs, the
+precomputed report, tool results).
+Run: python benchmarks/context_compaction_bench.py [--sizes 1000,10000]
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Any
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.pipeline_bench import PHASES, run_benchmark
+from config import get_settings
+from llm import get_context_compactor, reset_context_compactor
+
+
+def measure(products: int, enabled: bool, logs_per_product: int = 1) -> dict[str, Any]:
+    """One offline pipeline run with compaction ``enabled``; prompt tokens per phase and compactor stats."""
+    settings = get_settings()
+    original = settings.context_compaction
+    settings.context_compaction = enabled
+    reset_context_compactor()
+    try:
+        result = run_benchmark(products, logs_per_product, trace_memory=False)
+        stats = get_context_compactor().stats()
+    finally:
+        settings.context_compaction = original
+        reset_context_compactor()
+    tokens = {name: result["phases"][name]["prompt_tokens"] for name in PHASES}
+    return {"tokens": tokens, "total": sum(tokens.values()), "stats": stats, "result": result}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated product counts")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    run_benchmark(50, 0, trace_memory=False)  # one-off CrewAI setup is not measured
+    for size in (int(s) for s in args.sizes.split(",")):
+        before = measure(size, enabled=False)
+        after = measure(size, enabled=True)
+        result = after["result"]
+        print(
+            f"products: {size}, low stock: {result['low_stock']}, "
+            f"reorders applied: {result['reorders']} (before: {before['result']['reorders']})"
+        )
+        print(f"  {'phase':<11} {'before':>9} {'after':>9} {'saved':>7}")
+        for name in PHASES:
+            b, a = before["tokens"][name], after["tokens"][name]
+            print(f"  {name:<11} {b:9d} {a:9d} {(1 - a / b) if b else 0:7.1%}")
+        b, a = before["total"], after["total"]
+        print(f"  {'total':<11} {b:9d} {a:9d} {(1 - a / b) if b else 0:7.1%}")
+        for kind, stats in sorted(after["stats"].items()):
+            print(
+                f"  compactor {kind:<8} {stats['calls']:4d} calls, "
+                f"{stats['tokens_before']} -> {stats['tokens_after']} tokens"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Benchmark: DatabaseTool calls/sec with connect-per-call (before) vs the pooled connection manager (after).
+Run: python benchmarks/db_pool_bench.py [--calls 2000]
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from tools.database_tool import ERP_SCHEMA_SQL, DatabaseTool
+from tools.db_pool import close_all_pools
+
+QUERY = "SELECT id, sku, name, price, stock_quantity FROM products WHERE sku = ?"
+STATEMENT = "UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE sku = ?"
+
+
+def _seed(db_path: Path, n_products: int = 500) -> None:
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(ERP_SCHEMA_SQL)
+    conn.executemany(
+        "INSERT INTO products (sku, name, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, ?)",
+        [(f"sku_{i}", f"Product {i}", 10.0 + i, i % 40, 15) for i in range(n_products)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _legacy_call(db_path: Path, i: int) -> str:
+    """Replicates the pre-pool behaviour: schema DDL + connect/close on every tool call."""
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(ERP_SCHEMA_SQL)
+    conn.commit()
+    conn.close()
+    conn = sqlite3.connect(str(db_path))
+    conn.row_factory = sqlite3.Row
+    if i % 5 == 0:
+        cur = conn.execute(STATEMENT, [f"sku_{i % 500}"])
+        conn.commit()
+        out = json.dumps({"rowcount": cur.rowcount, "status": "ok"})
+    else:
+        rows = conn.execute(QUERY, [f"sku_{i % 500}"]).fetchall()
+        out = json.dumps([dict(zip(r.keys(), r)) for r in rows], default=str)
+    conn.close()
+    return out
+
+
+def _pooled_call(db_path: Path, i: int) -> str:
+    tool = DatabaseTool(db_path=db_path)
+    if i % 5 == 0:
+        return tool._run_execute(STATEMENT, [f"sku_{i % 500}"])
+    return tool._run_query(QUERY, [f"sku_{i % 500}"])
+
+
+def _measure(fn, db_path: Path, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(db_path, i)
+    return calls / (time.perf_counter() - start)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _seed(db_path)
+        before = _measure(_legacy_call, db_path, args.calls)
+        after = _measure(_pooled_call, db_path, args.calls)
+        close_all_pools()
+
+    print(f"calls: {args.calls} (80% SELECT by sku, 20% UPDATE)")
+    print(f"  before (connect per call): {before:10.0f} calls/sec")
+    print(f"  after  (pooled):           {after:10.0f} calls/sec")
+    print(f"  speedup: {after / before:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Benchmark: cold-start import cost of main.py from `python -X importtime`, checked against a
+startup budget. Heavy dependencies (CrewAI, LangChain providers, aiohttp, NumPy) must only
+load when a run actually needs them.
+Run: python benchmarks/import_time_bench.py [--module main] [--budget-ms 1000] [--top 15]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+
+STARTUP_BUDGET_MS = 1000.0
+DEFERRED_MODULES = (
+    "crewai",
+    "langchain_core",
+    "langchain_openai",
+    "langchain_anthropic",
+    "aiohttp",
+    "numpy",
+)
+
+
+@dataclass
+class ImportReport:
+    module: str
+    total_ms: float
+    modules: dict[str, tuple[float, float]]  # name -> (self ms, cumulative ms)
+
+    def loaded(self, prefix: str) -> bool:
+        return any(name == prefix or name.startswith(prefix + ".") for name in self.modules)
+
+    def violations(self, deferred: tuple[str, ...] = DEFERRED_MODULES) -> list[str]:
+        return [name for name in deferred if self.loaded(name)]
+
+    def top(self, n: int) -> list[tuple[str, float, float]]:
+        rows = [(name, s, c) for name, (s, c) in self.modules.items()]
+        return sorted(rows, key=lambda r: r[2], reverse=True)[:n]
+
+
+def measure_import(module: str = "main") -> ImportReport:
+    """Import ``module`` in a fresh interpreter with -X importtime and parse the report."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=_root,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules: dict[str, tuple[float, float]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        modules[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return ImportReport(module, modules.get(module, (0.0, 0.0))[1], modules)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    report = measure_import(args.module)
+    print(f"import {args.module}: {report.total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"  {'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_ms, cumulative_ms in report.top(args.top):
+        print(f"  {cumulative_ms:14.1f} {self_ms:9.1f}  {name}")
+    violations = report.violations()
+    if violations:
+        print(f"  loaded eagerly (should be deferred): {', '.join(violations)}")
+    return 0 if report.total_ms <= args.budget_ms and not violations else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: full InventoryAnalyzer pass (before) vs an incremental change-log pass (after)
+when a small fraction of the catalog changed since the last run.
+Run: python benchmarks/incremental_bench.py [--products 200000] [--change-rate 0.01]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from analysis import ChangeTracker, InventoryAnalyzer
+from tools.competitor_scraper_tool import CompetitorScraperTool
+from tools.database_tool import ERP_SCHEMA_SQL, DatabaseTool
+from tools.db_pool import close_all_pools
+from tools.price_cache import PriceCache
+
+
+def _seed(db_path: Path, n_products: int) -> None:
+    conn = sqlite3.connect(str(db_path))
+    conn.executescript(ERP_SCHEMA_SQL)
+    conn.executemany(
+        "INSERT INTO products (sku, name, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, ?)",
+        [(f"sku_{i:07d}", f"Product {i}", 10.0 + i % 90, i % 40, 15) for i in range(n_products)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        _seed(db_path, args.products)
+        db = DatabaseTool(db_path=db_path)
+        scraper = CompetitorScraperTool(cache=PriceCache(Path(tmp) / "prices.db"))
+        analyzer = InventoryAnalyzer(db, scraper)
+        tracker = ChangeTracker(db, scraper)
+        first = tracker.pending()
+        analyzer.analyze()  # warms the competitor price cache
+        tracker.commit(first)
+
+        changed = random.Random(7).sample(range(args.products), int(args.products * args.change_rate))
+        with db.pool.connection() as conn:
+            conn.executemany(
+                "UPDATE products SET stock_quantity = stock_quantity + 1 WHERE sku = ?",
+                [(f"sku_{i:07d}",) for i in changed],
+            )
+            conn.commit()
+
+        _, full = _timed(analyzer.analyze)
+        changes, detect = _timed(tracker.pending)
+        _, delta = _timed(lambda: analyzer.analyze(skus=changes.skus))
+        close_all_pools()
+
+    print(f"products: {args.products}, changed: {len(changed)} ({args.change_rate:.1%})")
+    print(f"  before (full scan):              {full * 1000:10.1f} ms")
+    print(f"  after  (change log + delta):     {(detect + delta) * 1000:10.1f} ms")
+    print(f"  speedup: {full / (detect + delta):.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Benchmark: inventory_logs INSERTs through DatabaseTool, one transaction per statement
+(before, ERP_LOG_DURABILITY=immediate) vs the write-behind InventoryLogAppender in
+buffered and group-commit mode, from several concurrent writer threads.
+Run: python benchmarks/log_appender_bench.py [--rows 20000] [--threads 8]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from config import get_settings
+from tools.database_tool import DatabaseTool
+from tools.db_pool import close_all_pools
+from tools.log_appender import InventoryLogAppender
+
+_STATEMENT = json.dumps({
+    "statement": "INSERT INTO inventory_logs (product_id, action, quantity, note) VALUES (?, ?, ?, ?)",
+    "params": [1, "reorder", 50, "auto reorder"],
+})
+
+
+def _run(db_path: Path, durability: str, rows: int, threads: int) -> tuple[float, dict]:
+    db = DatabaseTool(db_path=db_path)
+    settings = get_settings()
+    settings.erp_log_durability = durability
+    db._log_appender = InventoryLogAppender.from_settings(lambda: db.pool)
+    per_thread = rows // threads
+
+    def writer() -> None:
+        for _ in range(per_thread):
+            db._run(_STATEMENT)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    db.close()  # flush: every row is durable before the clock stops
+    elapsed = time.perf_counter() - start
+    stats = db.log_appender.stats()
+    close_all_pools()
+    return elapsed, stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    original = get_settings().erp_log_durability
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"{args.rows} inventory_logs inserts from {args.threads} threads")
+            for durability in ("immediate", "group", "buffered"):
+                elapsed, stats = _run(Path(tmp) / f"{durability}.db", durability, args.rows, args.threads)
+                transactions = stats["transactions"] or args.rows
+                print(
+                    f"  {durability:<9} {elapsed:7.2f} s  {args.rows / elapsed:>10,.0f} rows/s  "
+                    f"{transactions:>6} transactions"
+                )
+    finally:
+        get_settings().erp_log_durability = original
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""
+Benchmark: the full analyze -> strategize -> execute pipeline, offline, on a synthetic ERP.
+A scripted LLM (benchmarks/scripted_llm.py) drives CrewAI through realistic tool-call
+sequences; per phase we report wall time, time spent inside each tool, tool-call counts,
+estimated prompt tokens sent to the LLM and peak traced memory. Results are compared with benchmarks/baselines/pipeline_bench.json.
+Run: python benchmarks/pipeline_bench.py [--sizes 1000,100000,1000000] [--update-baseline]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from config.prompts import ANALYST_ROLE, EXECUTION_OFFICER_ROLE, STRATEGIST_ROLE
+
+BASELINE_PATH = _root / "benchmarks" / "baselines" / "pipeline_bench.json"
+PHASES = ("analyze", "strategize", "execute")
+_PHASE_BY_ROLE = {
+    ANALYST_ROLE: "analyze",
+    STRATEGIST_ROLE: "strategize",
+    EXECUTION_OFFICER_ROLE: "execute",
+}
+
+
+@dataclass
+class PhaseStats:
+    seconds: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    tool_calls: dict[str, int] = field(default_factory=dict)
+    tool_seconds: dict[str, float] = field(default_factory=dict)
+    peak_mib: float = 0.0
+
+
+class PhaseRecorder:
+    """
+    Splits a run into phases by the role of the agent calling the LLM. The analyze phase
+    starts at start() so it includes the deterministic pre-analysis; tool time is charged
+    to the phase active when the tool was called (tools may run on CrewAI worker threads).
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.phases: dict[str, PhaseStats] = {name: PhaseStats() for name in PHASES}
+        self.current: Optional[str] = None
+        self._started = 0.0
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.trace_memory:
+            tracemalloc.start()
+        self.current = PHASES[0]
+        self._started = time.perf_counter()
+
+    def enter(self, role: str) -> None:
+        phase = _PHASE_BY_ROLE.get(role, self.current)
+        with self._lock:
+            if phase != self.current:
+                self._close()
+                self.current = phase
+            if phase is not None:
+                self.phases[phase].llm_calls += 1
+
+    def record_tool(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.phases[self.current or PHASES[0]]
+            stats.tool_calls[name] = stats.tool_calls.get(name, 0) + 1
+            stats.tool_seconds[name] = stats.tool_seconds.get(name, 0.0) + seconds
+
+    def finish(self) -> None:
+        with self._lock:
+            self._close()
+            self.current = None
+        if self.trace_memory:
+            tracemalloc.stop()
+
+    def _close(self) -> None:
+        if self.current is None:
+            return
+        now = time.perf_counter()
+        stats = self.phases[self.current]
+        stats.seconds += now - self._started
+        self._started = now
+        if self.trace_memory:
+            stats.peak_mib = max(stats.peak_mib, tracemalloc.get_traced_memory()[1] / 2**20)
+            tracemalloc.reset_peak()
+
+
+class InstrumentedTool:
+    """Times and counts ``_run`` calls on a LangChain tool; everything else passes through."""
+
+    def __init__(self, tool: Any, recorder: PhaseRecorder) -> None:
+        self._tool = tool
+        self._recorder = recorder
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return self._tool._run(*args, **kwargs)
+        finally:
+            self._recorder.record_tool(self._tool.name, time.perf_counter() - start)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tool, name)
+
+
+def run_benchmark(
+    products: int,
+    logs_per_product: int = 2,
+    *,
+    workdir: Optional[Path] = None,
+    trace_memory: bool = True,
+) -> dict[str, Any]:
+    """Generate an ERP of ``products`` products and time one offline pipeline run on it."""
+    import agents  # noqa: F401  (CrewAI import cost is not part of any phase)
+    from benchmarks.scripted_llm import ScriptedLLM
+    from benchmarks.synthetic_erp import generate_erp
+    from orchestration.runner import run_pipeline
+    from tools.competitor_scraper_tool import CompetitorScraperTool
+    from tools.database_tool import DatabaseTool
+    from tools.price_cache import PriceCache
+    from tools.registry import COMPETITOR_TOOL, DATABASE_TOOL, SUPPLIER_TOOL, ToolRegistry
+    from tools.supplier_communication_tool import SupplierCommunicationTool
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        db_path = Path(tmp) / "erp.db"
+        start = time.perf_counter()
+        counts = generate_erp(db_path, products, products * logs_per_product)
+        generate_seconds = time.perf_counter() - start
+
+        recorder = PhaseRecorder(trace_memory=trace_memory)
+        db = DatabaseTool(db_path=db_path)
+        competitor = CompetitorScraperTool(
+            cache=PriceCache(Path(tmp) / "prices.db", max_entries=max(100_000, products)),
+            erp_db=db,
+        )
+        supplier = SupplierCommunicationTool()
+        registry = ToolRegistry()
+        registry.provide(DATABASE_TOOL, InstrumentedTool(db, recorder))
+        registry.provide(COMPETITOR_TOOL, InstrumentedTool(competitor, recorder))
+        registry.provide(SUPPLIER_TOOL, InstrumentedTool(supplier, recorder))
+        llm = ScriptedLLM(on_call=recorder.enter)
+        try:
+            recorder.start()
+            try:
+                run_pipeline(
+                    registry,
+                    llm_factory=lambda: llm,
+                    llm=llm,
+                    shards=1,
+                    incremental=False,
+                    verbose=False,
+                )
+            finally:
+                recorder.finish()
+            for role, phase in _PHASE_BY_ROLE.items():
+                recorder.phases[phase].prompt_tokens = llm.prompt_tokens.get(role, 0)
+            with db.pool.connection() as conn:
+                reorders = conn.execute(
+                    "SELECT COUNT(*) FROM inventory_logs WHERE action = 'reorder'"
+                ).fetchone()[0]
+        finally:
+            registry.teardown()
+
+    phases = {name: asdict(stats) for name, stats in recorder.phases.items()}
+    return {
+        "products": products,
+        "inventory_logs": counts["inventory_logs"],
+        "low_stock": counts["low_stock"],
+        "reorders": reorders,
+        "trace_memory": trace_memory,
+        "generate_seconds": round(generate_seconds, 3),
+        "total_seconds": round(sum(p["seconds"] for p in phases.values()), 3),
+        "phases": phases,
+    }
+
+
+def compare(
+    result: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.5,
+    min_seconds: float = 0.05,
+) -> list[str]:
+    """
+    Regressions of ``result`` against ``baseline``: a phase or per-tool time more than
+    ``tolerance`` (fraction) and ``min_seconds`` slower, or different tool-call counts.
+    Times are only compared when both runs used the same memory tracing mode.
+    """
+    problems: list[str] = []
+    same_mode = result.get("trace_memory") == baseline.get("trace_memory")
+
+    def slower(label: str, now: float, before: float) -> None:
+        if same_mode and now > before * (1 + tolerance) and now - before > min_seconds:
+            problems.append(f"{label}: {now:.3f}s vs baseline {before:.3f}s")
+
+    for name in PHASES:
+        now, before = result["phases"][name], baseline["phases"].get(name)
+        if before is None:
+            continue
+        slower(f"{name} phase", now["seconds"], before["seconds"])
+        for tool, seconds in now["tool_seconds"].items():
+            slower(f"{name}/{tool}", seconds, before["tool_seconds"].get(tool, 0.0))
+        if now["tool_calls"] != before["tool_calls"]:
+            problems.append(
+                f"{name} tool calls {now['tool_calls']} vs baseline {before['tool_calls']}"
+            )
+    return problems
+
+
+def _print(result: dict[str, Any]) -> None:
+    print(
+        f"products: {result['products']}, inventory_logs: {result['inventory_logs']}, "
+        f"low stock: {result['low_stock']}, reorders applied: {result['reorders']} (generated in {result['generate_seconds']:.1f}s)"
+    )
+    print(
+        f"  {'phase':<11} {'seconds':>9} {'llm':>4} {'prompt tok':>10} {'peak MiB':>9}  "
+        "tool calls (seconds)"
+    )
+    for name, stats in result["phases"].items():
+        tools = ", ".join(
+            f"{tool} x{count} ({stats['tool_seconds'][tool]:.3f}s)"
+            for tool, count in sorted(stats["tool_calls"].items())
+        )
+        print(
+            f"  {name:<11} {stats['seconds']:9.3f} {stats['llm_calls']:4d} "
+            f"{stats['prompt_tokens']:10d} {stats['peak_mib']:9.1f}  {tools or '-'}"
+        )
+    print(f"  {'total':<11} {result['total_seconds']:9.3f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="1000", help="Comma-separated product counts")
+    parser.add_argument("--logs-per-product", type=int, default=2)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown fraction")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--no-memory", action="store_true", help="Skip tracemalloc (faster)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    run_benchmark(50, 0, trace_memory=False)  # one-off CrewAI/NumPy setup is not measured
+    failed = False
+    for size in (int(s) for s in args.sizes.split(",")):
+        result = run_benchmark(
+            size, args.logs_per_product, trace_memory=not args.no_memory
+        )
+        _print(result)
+        key = str(size)
+        if args.update_baseline:
+            baselines[key] = result
+        elif key in baselines:
+            problems = compare(result, baselines[key], args.tolerance)
+            for problem in problems:
+                print(f"  REGRESSION {problem}")
+            failed = failed or bool(problems)
+        else:
+            print("  (no baseline for this size; run with --update-baseline)")
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
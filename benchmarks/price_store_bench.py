@@ -0,0 +1,103 @@
+"""
+Benchmark: competitor price lookups from the SQLite price-cache tier (before) vs the
+memory-mapped PriceStore (after): open cost, single-SKU latency, batch matrix and compaction.
+Run: python benchmarks/price_store_bench.py [--skus 1000000] [--days 5]
+"""
+
+import argparse
+import datetime as dt
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.synthetic_erp import sku_for
+from tools.db_pool import close_all_pools
+from tools.price_cache import PriceCache
+from tools.price_store import PriceStore
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def _latency_us(fn, probes: list[str]) -> float:
+    samples = []
+    for sku in probes:
+        start = time.perf_counter_ns()
+        fn(sku)
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return statistics.median(samples)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--skus", type=int, default=1_000_000)
+    parser.add_argument("--days", type=int, default=5, help="Daily segments to append")
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    skus = [sku_for(i) for i in range(args.skus)]
+    today = dt.date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PriceStore(Path(tmp) / "store", retain_days=args.days)
+        build = 0.0
+        for d in range(args.days):
+            # Each day re-observes a random 30% of the catalog (all of it on the first day)
+            chosen = range(args.skus) if d == 0 else rng.choice(args.skus, args.skus * 3 // 10, replace=False)
+            prices = rng.uniform(5.0, 150.0, (args.skus, 3)).round(2)
+            batch = {skus[i]: prices[i].tolist() for i in chosen}
+            _, seconds = _timed(lambda: store.append(batch, day=today - dt.timedelta(days=args.days - d)))
+            build += seconds
+        store.close()
+
+        cache = PriceCache(Path(tmp) / "cache.db", max_entries=1)
+        _, cache_build = _timed(lambda: cache.put_many({f"3:{s}": [10.0, 11.0, 12.0] for s in skus}))
+
+        probe_rng = random.Random(7)
+        probes = [skus[probe_rng.randrange(args.skus)] for _ in range(args.lookups)]
+        batch_skus = [skus[probe_rng.randrange(args.skus)] for _ in range(args.batch)]
+
+        reopened, open_seconds = _timed(lambda: PriceStore(Path(tmp) / "store"))
+        store_us = _latency_us(reopened.get, probes)
+        _, store_batch = _timed(lambda: reopened.matrix(batch_skus))
+        cache_us = _latency_us(lambda s: cache.lookup([f"3:{s}"]), probes)
+        _, cache_batch = _timed(lambda: cache.lookup([f"3:{s}" for s in batch_skus]))
+        before = reopened.stats()
+        _, compact_seconds = _timed(reopened.compact)
+        after = reopened.stats()
+        compacted_us = _latency_us(reopened.get, probes)
+        reopened.close()
+        cache.close()
+        close_all_pools()
+
+    print(f"SKUs: {args.skus}, daily segments: {args.days}, records: {before.records}")
+    print(f"  build              store {build:8.2f} s   sqlite cache {cache_build:8.2f} s")
+    print(f"  open               store {open_seconds * 1000:8.2f} ms")
+    print(f"  single lookup p50  store {store_us:8.1f} us  sqlite cache {cache_us:8.1f} us")
+    print(
+        f"  {args.batch} batch      store {store_batch * 1000:8.1f} ms  "
+        f"sqlite cache {cache_batch * 1000:8.1f} ms"
+    )
+    print(
+        f"  compact {before.segments} -> {after.segments} segments, {before.records} -> "
+        f"{after.records} records in {compact_seconds:.2f} s; lookup p50 {compacted_us:.1f} us"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Benchmark: local RAG over inventory_logs. Embeds and indexes N log rows, then compares
+top-k query latency of the IVF index against an exact scan, with recall@k.
+Run: python benchmarks/rag_bench.py [--logs 1000000] [--products 100000] [--queries 200]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.synthetic_erp import generate_erp, sku_for
+from rag import HashingEmbedder, KnowledgeBase
+from rag.ivf_index import _top_k
+from tools.database_tool import DatabaseTool
+from tools.db_pool import close_all_pools
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logs", type=int, default=1_000_000)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    actions = ("sale", "restock", "adjustment", "price_update")
+    queries = [
+        f"{rng.choice(actions)} of {sku_for(rng.randrange(args.products))}" for _ in range(args.queries)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        generate_erp(db_path, args.products, args.logs)
+        db = DatabaseTool(db_path=db_path)
+        kb = KnowledgeBase(Path(tmp) / "rag", db_tool=db, embedder=HashingEmbedder(), nprobe=args.nprobe)
+        added, ingest = _timed(kb.sync_inventory_logs)
+        index = kb.indexes["logs"]
+        _, merge = _timed(index.merge)
+        kb.save()
+        reopened, open_seconds = _timed(
+            lambda: KnowledgeBase(Path(tmp) / "rag", db_tool=db, embedder=HashingEmbedder(), nprobe=args.nprobe)
+        )
+        index = reopened.indexes["logs"]
+        vectors = reopened.embedder.embed(queries)
+        ivf_ms, exact_ms, recall = [], [], []
+        all_vectors, all_scales = np.asarray(index.vectors), np.asarray(index.scales)
+        position = {item: row for row, item in enumerate(index.ids.tolist())}
+        for q in vectors:
+            (ids, _), seconds = _timed(lambda: index.search(q, args.top_k))
+            ivf_ms.append(seconds * 1000)
+            start = time.perf_counter()
+            scores = np.empty(len(all_vectors), dtype=np.float32)
+            for s in range(0, len(all_vectors), 262_144):
+                block = slice(s, s + 262_144)
+                scores[block] = (all_vectors[block].astype(np.float32) @ q) * all_scales[block]
+            best = _top_k(scores, args.top_k)
+            exact_ms.append((time.perf_counter() - start) * 1000)
+            # Tie-aware: a hit is any returned row scoring at least the exact k-th best
+            kth = scores[best[-1]] - 1e-3
+            recall.append(sum(scores[position[i]] >= kth for i in ids.tolist()) / len(best))
+        _, end_to_end = _timed(lambda: [reopened.search(q, args.top_k, ["logs"]) for q in queries[:50]])
+        close_all_pools()
+
+    print(f"log entries indexed: {added}, lists: {len(index.centroids)}, nprobe: {args.nprobe}")
+    print(f"  embed + index   {ingest:8.1f} s ({added / max(ingest, 1e-9):,.0f} rows/s), merge {merge:.1f} s")
+    print(f"  open saved index {open_seconds * 1000:7.1f} ms")
+    print(
+        f"  top-{args.top_k} query   IVF p50 {statistics.median(ivf_ms):7.2f} ms  "
+        f"p99 {np.percentile(ivf_ms, 99):7.2f} ms | exact p50 {statistics.median(exact_ms):8.2f} ms"
+    )
+    print(f"  recall@{args.top_k} vs exact: {statistics.mean(recall):.3f}")
+    print(f"  end-to-end search (embed + IVF + text) {end_to_end / 50 * 1000:.2f} ms/query")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
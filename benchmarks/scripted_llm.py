@@ -0,0 +1,182 @@
+"""
+Deterministic stand-in for the crew's LLM: replays a fixed tool-call script per agent role
+so the full CrewAI pipeline (tool dispatch, parallel tool calls, task context hand-off)
+runs offline with no API key and no network.
+"""
+
+import json
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from crewai.llms.base_llm import BaseLLM
+from pydantic import BaseModel, Field
+
+from config.prompts import ANALYST_ROLE, EXECUTION_OFFICER_ROLE, STRATEGIST_ROLE
+from llm.compaction import LOW_STOCK_HEADER, PRICES_HEADER, estimate_tokens
+
+LOW_STOCK_SQL = (
+    "SELECT id, sku, stock_quantity, min_stock_level FROM products "
+    "WHERE stock_quantity < min_stock_level ORDER BY min_stock_level - stock_quantity DESC, id"
+)
+REORDER_ROWS = 50
+
+
+def _messages(messages: Any) -> list[dict[str, Any]]:
+    if isinstance(messages, str):
+        return [{"role": "user", "content": messages}]
+    return list(messages)
+
+
+def _tool_steps(messages: list[dict[str, Any]]) -> int:
+    """Assistant turns that requested tools, i.e. how far into the script this task is."""
+    return sum(1 for m in messages if m.get("role") == "assistant" and m.get("tool_calls"))
+
+
+def _last_tool_payload(messages: list[dict[str, Any]]) -> dict[str, Any]:
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            content = str(message.get("content") or "")
+            start = content.find("{")
+            try:
+                return json.loads(content[start:]) if start >= 0 else {}
+            except json.JSONDecodeError:
+                return {}
+    return {}
+
+
+def _report_skus(text: str) -> tuple[list[str], set[str]]:
+    """(finding SKUs in order, low-stock SKUs) of a report given as render_report tables or JSON."""
+    low_stock: list[str] = []
+    prices: list[str] = []
+    if LOW_STOCK_HEADER in text or PRICES_HEADER in text:
+        section = None
+        for line in text.splitlines():
+            if line in (LOW_STOCK_HEADER, PRICES_HEADER):
+                section = low_stock if line == LOW_STOCK_HEADER else prices
+            elif section is not None and line.split("|", 1)[0].isdigit():
+                section.append(line.split("|")[1])
+            else:
+                section = None
+    else:
+        report, _ = json.JSONDecoder().raw_decode(text, text.index("{"))
+        low_stock = [item["sku"] for item in report.get("low_stock_items", [])]
+        prices = [finding["sku"] for finding in report.get("uncompetitive_prices", [])]
+    return list(dict.fromkeys(low_stock + prices)), set(low_stock)
+
+
+def _tool_call(call_id: str, name: str, arg: str, value: Any) -> dict[str, Any]:
+    payload = value if isinstance(value, str) else json.dumps(value)
+    return {
+        "id": call_id,
+        "type": "function",
+        "function": {"name": name, "arguments": json.dumps({arg: payload})},
+    }
+
+
+class ScriptedLLM(BaseLLM):
+    """
+    Answers by agent role: the analyst spot-checks low stock in the ERP and batch-looks-up
+    competitor prices for those SKUs; the strategist returns a fixed plan (as one JSON
+    decision per SKU when it decides a fan-out chunk); the execution
+    officer re-reads the low-stock rows, applies one bulk reorder and emails one supplier
+    per product family in a single parallel tool turn. ``on_call(role)`` is invoked
+    before every call (used by the benchmark to split timings per phase); ``prompt_tokens``
+    sums the estimated tokens of the messages sent, per role.
+    """
+
+    llm_type: str = "scripted"
+    reorder_rows: int = REORDER_ROWS
+    on_call: Optional[Callable[[str], None]] = Field(default=None, exclude=True)
+    calls: dict[str, int] = Field(default_factory=lambda: defaultdict(int))
+    prompt_tokens: dict[str, int] = Field(default_factory=lambda: defaultdict(int))
+
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault("model", "scripted")
+        super().__init__(**kwargs)
+
+    def call(
+        self,
+        messages: Any,
+        tools: Optional[list[Any]] = None,
+        callbacks: Optional[list[Any]] = None,
+        available_functions: Optional[dict[str, Any]] = None,
+        from_task: Any = None,
+        from_agent: Any = None,
+        response_model: Optional[type[BaseModel]] = None,
+    ) -> Any:
+        role = getattr(from_agent, "role", "") or ""
+        if self.on_call is not None:
+            self.on_call(role)
+        self.calls[role] += 1
+        history = _messages(messages)
+        self.prompt_tokens[role] += sum(estimate_tokens(str(m.get("content") or "")) for m in history)
+        step = _tool_steps(history)
+        if role == ANALYST_ROLE:
+            return self._analyst(step, history)
+        if role == EXECUTION_OFFICER_ROLE:
+            return self._execution_officer(step, history)
+        if role == STRATEGIST_ROLE:
+            if (getattr(from_task, "name", "") or "").startswith("strategize_chunk"):
+                return self._strategist_chunk(history)
+            return (
+                "Decisions: reorder every low-stock SKU (restore to twice its minimum level); "
+                "no discount campaigns this cycle."
+            )
+        return "OK"
+
+    def _analyst(self, step: int, history: list[dict[str, Any]]) -> Any:
+        if step == 0:
+            query = {"query": LOW_STOCK_SQL, "max_rows": 20}
+            return [_tool_call("analyst-0", "erp_database", "query_or_json", query)]
+        if step == 1:
+            skus = [row[1] for row in _last_tool_payload(history).get("rows", [])]
+            batch = {"product_identifiers": skus, "competitor_count": 3}
+            return [_tool_call("analyst-1", "competitor_scraper", "raw_input", batch)]
+        return "Analyst report: low-stock items confirmed; competitor prices spot-checked."
+
+    def _strategist_chunk(self, history: list[dict[str, Any]]) -> str:
+        """Same plan as the single-call strategist: reorder low stock, no discounts."""
+        prompt = next(str(m.get("content") or "") for m in history if m.get("role") == "user")
+        skus, low_stock = _report_skus(prompt[prompt.index("Findings:"):])
+        decisions = [
+            {
+                "finding_ref": sku,
+                "action": "reorder" if sku in low_stock else "no_action",
+                "justification": "below minimum stock" if sku in low_stock else "no discounts this cycle",
+            }
+            for sku in skus
+        ]
+        return json.dumps({"decisions": decisions})
+
+    def _execution_officer(self, step: int, history: list[dict[str, Any]]) -> Any:
+        if step == 0:
+            query = {"query": LOW_STOCK_SQL, "max_rows": self.reorder_rows}
+            return [_tool_call("exec-0", "erp_database", "query_or_json", query)]
+        if step == 1:
+            rows = _last_tool_payload(history).get("rows", [])
+            updates = [
+                {"product_id": pid, "sku": sku, "reorder_quantity": 2 * min_level - stock}
+                for pid, sku, stock, min_level in rows
+            ]
+            families: dict[str, list[str]] = defaultdict(list)
+            for update in updates:
+                families[update["sku"].split("_", 1)[0]].append(update["sku"])
+            calls = [_tool_call("exec-1", "erp_database", "query_or_json", {"bulk_updates": updates})]
+            for i, (family, skus) in enumerate(sorted(families.items())):
+                email = {
+                    "to_email": f"orders+{family}@supplier.example.com",
+                    "subject": f"Reorder request: {len(skus)} {family} SKUs",
+                    "body": "Please confirm delivery for: " + ", ".join(skus),
+                }
+                calls.append(_tool_call(f"exec-mail-{i}", "supplier_communication", "raw_input", email))
+            return calls
+        return "Executed: bulk reorder applied and supplier emails sent."
+
+    def supports_function_calling(self) -> bool:
+        return True
+
+    def supports_stop_words(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
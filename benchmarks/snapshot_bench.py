@@ -0,0 +1,104 @@
+"""
+Benchmark: products held as fetched row tuples (before) vs the columnar InventorySnapshot
+(after): resident bytes per product, low-stock scan, SKU lookups and a refresh after a
+small fraction of rows changed.
+Run: python benchmarks/snapshot_bench.py [--products 500000] [--change-rate 0.01]
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Project root on path
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from benchmarks.synthetic_erp import generate_erp, sku_for
+from tools.database_tool import DatabaseTool
+from tools.db_pool import close_all_pools
+from tools.inventory_snapshot import InventorySnapshot
+
+
+def _resident(fn):
+    """(result, bytes still allocated once fn returns)."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    resident = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, resident
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=500_000)
+    parser.add_argument("--change-rate", type=float, default=0.01)
+    parser.add_argument("--lookups", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        generate_erp(db_path, args.products)
+        db = DatabaseTool(db_path=db_path)
+        with db.pool.connection() as conn:  # an established catalog, not rows written just now
+            conn.execute("UPDATE products SET updated_at = datetime('now', '-1 day')")
+            conn.commit()
+
+        def fetch_rows():
+            with db.pool.connection() as conn:
+                return conn.execute(
+                    "SELECT id, sku, price, stock_quantity, min_stock_level FROM products ORDER BY id"
+                ).fetchall()
+
+        rows, rows_bytes = _resident(fetch_rows)
+        rows, rows_load = _timed(fetch_rows)
+        _, rows_scan = _timed(lambda: [r for r in rows if r[3] < r[4]])
+        by_sku, _ = _timed(lambda: {r[1]: i for i, r in enumerate(rows)})
+        rng = random.Random(7)
+        probes = [sku_for(rng.randrange(args.products)) for _ in range(args.lookups)]
+        _, dict_lookups = _timed(lambda: [by_sku.get(s, -1) for s in probes])
+        del rows, by_sku
+
+        snapshot = InventorySnapshot(db)
+        _, snap_bytes = _resident(snapshot.load)
+        _, snap_load = _timed(snapshot.load)
+        low, snap_scan = _timed(snapshot.low_stock_rows)
+        _, snap_lookups = _timed(lambda: snapshot.rows_for(probes))
+
+        changed = rng.sample(range(args.products), int(args.products * args.change_rate))
+        with db.pool.connection() as conn:
+            conn.executemany(
+                "UPDATE products SET stock_quantity = stock_quantity + 1 WHERE sku = ?",
+                [(sku_for(i),) for i in changed],
+            )
+            conn.commit()
+        reread, refresh = _timed(snapshot.refresh)
+        close_all_pools()
+
+    n = args.products
+    print(f"products: {n}, low stock: {len(low)}, changed: {len(changed)} ({args.change_rate:.1%})")
+    print(f"  resident bytes/product   rows {rows_bytes / n:8.1f}   snapshot {snap_bytes / n:8.1f}")
+    print(f"  load                     rows {rows_load * 1000:8.1f} ms snapshot {snap_load * 1000:8.1f} ms")
+    print(f"  low-stock scan           rows {rows_scan * 1000:8.1f} ms snapshot {snap_scan * 1000:8.1f} ms")
+    print(
+        f"  {args.lookups} SKU lookups    dict {dict_lookups * 1000:8.1f} ms "
+        f"snapshot {snap_lookups * 1000:8.1f} ms"
+    )
+    print(f"  refresh ({reread} rows re-read)           {refresh * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
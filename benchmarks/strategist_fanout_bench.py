@@ -0,0 +1,120 @@
+"""
+Benchmark: strategist wall time vs number of findings, one monolithic call (before) vs the
+map-reduce fan-out (STRATEGIST_CHUNK_SIZE chunks, at most STRATEGIST_MAX_CHUNKS of them,
+under LLM_MAX_CONCURRENCY). The scripted LLM sleeps a fixed latency plus a per-finding generation time, like a real model whose
+output grows with the number of decisions.
+Run: python benchmarks/strategist_fanout_bench.py [--findings 50,200,800] [--chunk-size 25] [--max-chunks 8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from benchmarks.scripted_llm import ScriptedLLM
+from config import get_settings
+from config.prompts import TASK_STRATEGIZE_DESCRIPTION, TASK_STRATEGIZE_OUTPUT
+from llm import reset_llm_limiter
+from models import AnalystReport, LowStockItem, PriceFinding
+
+
+class SlowScriptedLLM(ScriptedLLM):
+    """ScriptedLLM that takes ``base_s`` plus ``per_finding_s`` per finding in the prompt."""
+
+    base_s: float = 0.3
+    per_finding_s: float = 0.01
+
+    def call(self, messages: Any, *args: Any, **kwargs: Any) -> Any:
+        if isinstance(messages, str):
+            prompt = messages
+        else:
+            prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        # Findings are JSON objects or, compacted, table rows starting with the product id
+        findings = prompt.count('"sku"') + sum(
+            line.split("|", 1)[0].isdigit() for line in prompt.splitlines()
+        )
+        time.sleep(self.base_s + self.per_finding_s * findings)
+        return super().call(messages, *args, **kwargs)
+
+
+def _report(findings: int) -> AnalystReport:
+    low = findings // 2
+    return AnalystReport(
+        low_stock_items=[
+            LowStockItem(product_id=i, sku=f"sku_{i:05d}", name="P", current_stock=1, min_stock_level=10)
+            for i in range(low)
+        ],
+        uncompetitive_prices=[
+            PriceFinding(product_id=i, sku=f"sku_{i:05d}", our_price=12.0, competitor_min=10.0)
+            for i in range(low, findings)
+        ],
+    )
+
+
+def _run(
+    report: AnalystReport, chunk_size: int, max_chunks: int, llm: SlowScriptedLLM
+) -> tuple[float, int]:
+    """Strategize ``report`` once; wall seconds and the number of chunks it was split into."""
+    from crewai import Task
+
+    from agents import STRATEGIZE_TASK, create_strategist_agent
+    from llm.traced_llm import with_tracing
+    from orchestration import chunk_report
+
+    chunks = chunk_report(report, chunk_size, max_chunks)
+    agent = create_strategist_agent(with_tracing(llm), verbose=False, report_chunks=chunks)
+    task = Task(
+        name=STRATEGIZE_TASK,
+        description=TASK_STRATEGIZE_DESCRIPTION,
+        expected_output=TASK_STRATEGIZE_OUTPUT,
+        agent=agent,
+    )
+    start = time.perf_counter()
+    agent.execute_task(task, context=report.model_dump_json())
+    return time.perf_counter() - start, len(chunks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--findings", default="50,200,800")
+    parser.add_argument("--chunk-size", type=int, default=25)
+    parser.add_argument("--max-chunks", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=300)
+    parser.add_argument("--per-finding-ms", type=float, default=10)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    from crewai.events.event_listener import event_listener
+
+    event_listener.formatter.verbose = False  # tasks run outside a crew print panels otherwise
+
+    settings = get_settings()
+    settings.llm_max_concurrency = args.concurrency
+    reset_llm_limiter()
+    llm = SlowScriptedLLM(base_s=args.base_ms / 1000, per_finding_s=args.per_finding_ms / 1000)
+    print(
+        f"strategist latency {args.base_ms:.0f} ms + {args.per_finding_ms:.0f} ms/finding; "
+        f"fan-out chunks of {args.chunk_size} (at most {args.max_chunks}), "
+        f"{args.concurrency} concurrent"
+    )
+    print(f"  {'findings':>8} {'single call':>12} {'fan-out':>9} {'chunks':>7}")
+    for findings in (int(n) for n in args.findings.split(",")):
+        report = _report(findings)
+        single, _ = _run(report, 0, 0, llm)
+        fanout, chunks = _run(report, args.chunk_size, args.max_chunks, llm)
+        print(f"  {findings:>8} {single:>11.2f}s {fanout:>8.2f}s {chunks:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
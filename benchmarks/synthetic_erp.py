@@ -0,0 +1,99 @@
+"""
+Synthetic ERP generator: N products and M inventory_logs rows with a deterministic mix of
+low-stock items and prices above the simulated competitor range.
+Run: python benchmarks/synthetic_erp.py out.db [--products 100000] [--logs 200000]
+"""
+
+import argparse
+import random
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+_root = Path(__file__).resolve().parent.parent
+if str(_root) not in sys.path:
+    sys.path.insert(0, str(_root))
+
+from tools.database_tool import ERP_SCHEMA_SQL
+
+_CHUNK = 50_000
+_FAMILIES = ("widget", "gadget", "bolt", "gear", "valve", "cable", "sensor", "panel")
+_LOG_ACTIONS = ("sale", "restock", "adjustment", "price_update")
+
+
+def sku_for(i: int) -> str:
+    return f"{_FAMILIES[i % len(_FAMILIES)]}_{i:07d}"
+
+
+def generate_erp(
+    db_path: Path | str,
+    products: int,
+    logs: int = 0,
+    *,
+    low_stock_ratio: float = 0.05,
+    seed: int = 42,
+) -> dict[str, int]:
+    """
+    Create (or extend) an ERP database with ``products`` products and ``logs`` log rows.
+    About ``low_stock_ratio`` of products start below their minimum stock level. Change
+    triggers are suspended during the load so the change log starts empty.
+    """
+    rng = random.Random(seed)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.executescript(ERP_SCHEMA_SQL)
+        conn.executescript(
+            "PRAGMA journal_mode=WAL; PRAGMA synchronous=OFF;"
+            "DROP TRIGGER IF EXISTS trg_products_insert_change;"
+            "DROP TRIGGER IF EXISTS trg_products_update_change;"
+        )
+        low_stock = 0
+        for start in range(0, products, _CHUNK):
+            rows = []
+            for i in range(start, min(start + _CHUNK, products)):
+                min_level = rng.randint(5, 40)
+                if rng.random() < low_stock_ratio:
+                    stock = rng.randint(0, min_level - 1)
+                    low_stock += 1
+                else:
+                    stock = rng.randint(min_level, min_level * 5)
+                price = round(rng.uniform(5.0, 150.0), 2)
+                rows.append((sku_for(i), f"Product {i}", price, stock, min_level))
+            conn.executemany(
+                "INSERT INTO products (sku, name, price, stock_quantity, min_stock_level) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        conn.commit()
+        for start in range(0, logs, _CHUNK):
+            conn.executemany(
+                "INSERT INTO inventory_logs (product_id, action, quantity, note) VALUES (?, ?, ?, ?)",
+                [
+                    (rng.randint(1, max(products, 1)), rng.choice(_LOG_ACTIONS), rng.randint(-20, 50), None)
+                    for _ in range(start, min(start + _CHUNK, logs))
+                ],
+            )
+        conn.commit()
+        conn.executescript(ERP_SCHEMA_SQL)  # restores the change triggers
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return {"products": products, "inventory_logs": logs, "low_stock": low_stock}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_path")
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--logs", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    counts = generate_erp(args.db_path, args.products, args.logs, seed=args.seed)
+    print(f"{counts} in {time.perf_counter() - start:.1f}s -> {args.db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,10 @@
 """
-Pinecone RAG configuration stub for business documents and inventory logs.
+Retrieval over business documents and inventory logs.
 
-In production: embed documents (policies, inventory logs), store in Pinecone,
-and use a retrieval tool so agents can query this knowledge base.
+The default backend is the local knowledge base (rag.KnowledgeBase: IVF indexes on
+disk, hashing or OpenAI embeddings), which needs no network. With RAG_BACKEND=pinecone
+and PINECONE_API_KEY set, queries go to the Pinecone index instead; its vectors must
+be produced by the same embedder (RAG_EMBEDDER / RAG_EMBEDDING_DIM).
 """
 
 import logging
@@ -31,13 +33,32 @@ def get_pinecone_index():
         return None
 
 
-def query_documents(query: str, top_k: int = 5) -> list[dict]:
+def _query_pinecone(index, query: str, top_k: int) -> list[dict]:
+    from rag import get_embedder
+
+    vector = get_embedder().embed([query])[0]
+    response = index.query(vector=vector.tolist(), top_k=top_k, include_metadata=True)
+    return [
+        {"id": match.id, "score": round(float(match.score), 4), **(match.metadata or {})}
+        for match in response.matches
+    ]
+
+
+def query_documents(query: str, top_k: int = 5, source: Optional[str] = None) -> list[dict]:
     """
-    Placeholder: query vector store for relevant business documents.
-    Returns empty list until Pinecone index is populated and connected.
+    Top ``top_k`` passages for ``query`` as dicts (source, id, ref, score, text).
+    ``source`` limits local results to "logs" or "docs". Falls back to the local
+    knowledge base when Pinecone is selected but unavailable.
     """
-    index = get_pinecone_index()
-    if index is None:
-        return []
-    # TODO: embed query, index.query(...), return matches
-    return []
+    if get_settings().rag_backend == "pinecone":
+        index = get_pinecone_index()
+        if index is not None:
+            try:
+                return _query_pinecone(index, query, top_k)
+            except Exception as e:
+                logger.warning("Pinecone query failed (%s); using the local index", e)
+    from rag import get_knowledge_base
+
+    kb = get_knowledge_base()
+    kb.sync_inventory_logs()
+    return kb.search(query, top_k, [source] if source else None)
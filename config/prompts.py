@@ -37,12 +37,23 @@ EXECUTION_OFFICER_BACKSTORY = (
 )
 
 # ----- Task descriptions (can be overridden or extended in agents.py) -----
+TASK_SCOPE_PREFIX = (
+    "Scope: work only on this part of the catalog and ignore all other products: "
+)
 TASK_ANALYZE_DESCRIPTION = (
     "Using the database and competitor scraper tools, analyze current inventory levels "
     "and compare our product prices to competitor prices. Identify: (1) items with "
     "low stock that may need reordering, (2) products where our price is "
     "uncompetitive. Produce a structured analyst report."
 )
+TASK_ANALYZE_PRECOMPUTED_DESCRIPTION = (
+    "A deterministic pre-analysis of the full ERP catalog against competitor prices "
+    "is provided below as an analyst report (low-stock items and uncompetitive prices). "
+    "Treat it as authoritative: do not re-scan the products table or call the competitor "
+    "scraper for every SKU. Use the tools only to spot-check a finding that looks "
+    "inconsistent. Produce the structured analyst report from it, adding recommended "
+    "focus areas.\n\nPrecomputed report:\n"
+)
 TASK_ANALYZE_OUTPUT = (
     "A clear analyst report listing low-stock items, uncompetitive prices, "
     "and recommended focus areas."
@@ -51,18 +62,35 @@ TASK_ANALYZE_OUTPUT = (
 TASK_STRATEGIZE_DESCRIPTION = (
     "Review the analyst report in context. Evaluate each finding against company "
     "ROI goals. For each issue, decide: reorder stock, trigger a discount campaign, "
-    "or no action. Justify each decision briefly."
+    "or no action. Justify each decision briefly. When a decision depends on past "
+    "reorders, earlier price changes or company policy, look it up with the "
+    "knowledge_base tool instead of guessing."
 )
 TASK_STRATEGIZE_OUTPUT = (
     "A decision summary: for each finding, the chosen action (reorder / discount / none) "
     "and short justification."
 )
 
+TASK_STRATEGIZE_CHUNK_DESCRIPTION = (
+    "Decide part {index} of {total} of the analyst report below; the other parts are "
+    "decided separately. Evaluate each SKU's findings (low stock and/or uncompetitive "
+    "price) against company ROI goals and choose exactly one action per SKU: reorder, "
+    "discount_campaign or no_action, with a brief justification. Use the SKU as "
+    "finding_ref. When a decision depends on past reorders, earlier price changes or "
+    "company policy, look it up with the knowledge_base tool instead of guessing."
+    "\n\nFindings:\n"
+)
+TASK_STRATEGIZE_CHUNK_OUTPUT = (
+    'JSON {"decisions": [{"finding_ref": "<sku>", "action": "reorder" | "discount_campaign" '
+    '| "no_action", "justification": "..."}]} with one decision for every SKU in this part.'
+)
+
 TASK_EXECUTE_DESCRIPTION = (
     "Based on the strategist's decisions, execute actions: (1) Send supplier "
     "communication for reorder requests where applicable, (2) Update product prices "
     "where discount campaigns were approved. Use the supplier and database tools only "
-    "as instructed by the strategy."
+    "as instructed by the strategy. Apply all price changes and reorder quantities in a "
+    "single database call using bulk_updates rather than one UPDATE per product."
 )
 TASK_EXECUTE_OUTPUT = (
     "Confirmation of executed actions: which emails were sent and which prices "
@@ -34,10 +34,209 @@ class Settings(BaseSettings):
         default="business-docs", description="Pinecone index for RAG"
     )
 
+    # Retrieval (RAG) over inventory logs and business documents
+    rag_backend: Literal["local", "pinecone"] = Field(
+        default="local", description="Local IVF index, or the Pinecone index above"
+    )
+    rag_index_path: str = Field(
+        default="./data/rag", description="Directory of the local vector indexes"
+    )
+    rag_docs_path: str | None = Field(
+        default=None, description="Directory of policy documents (*.md, *.txt) to index"
+    )
+    rag_embedder: Literal["hashing", "openai"] = Field(
+        default="hashing", description="Local hashing embeddings (offline) or OpenAI embeddings"
+    )
+    rag_embedding_model: str = Field(
+        default="text-embedding-3-small", description="OpenAI embedding model"
+    )
+    rag_embedding_dim: int = Field(default=256, description="Embedding dimension")
+    rag_nprobe: int = Field(default=16, description="IVF lists scanned per query")
+
     # ERP / Database
     erp_database_path: str = Field(
         default="./data/erp.db", description="SQLite path for ERP simulation"
     )
+    erp_pool_size: int = Field(default=8, description="Max pooled SQLite connections per DB")
+    erp_busy_timeout_ms: int = Field(default=5000, description="SQLite busy_timeout (ms)")
+    erp_mmap_size: int = Field(
+        default=256 * 1024 * 1024, description="SQLite mmap_size pragma (bytes)"
+    )
+    erp_cache_size: int = Field(
+        default=-20000, description="SQLite cache_size pragma (negative = KiB)"
+    )
+    erp_statement_cache_size: int = Field(
+        default=256, description="Prepared statements cached per connection"
+    )
+    erp_query_max_rows: int = Field(default=500, description="Max rows per query result page")
+    erp_query_max_bytes: int = Field(
+        default=64 * 1024, description="Max encoded bytes of rows per query result page"
+    )
+    erp_query_fetch_size: int = Field(default=256, description="Rows per cursor fetchmany()")
+    erp_query_cache: bool = Field(
+        default=True, description="Cache agent SELECT results until a write touches their tables"
+    )
+    erp_query_cache_bytes: int = Field(
+        default=16 * 1024 * 1024, description="Max bytes of cached query results"
+    )
+    erp_query_guard: bool = Field(
+        default=True, description="Check agent SELECTs with EXPLAIN QUERY PLAN before running them"
+    )
+    erp_query_max_cost: float = Field(
+        default=5_000_000, description="Reject queries estimated to examine more rows than this"
+    )
+    erp_query_timeout_ms: float = Field(
+        default=5000, description="Interrupt agent SELECTs running longer than this (0 = never)"
+    )
+    erp_slow_query_ms: float = Field(default=200, description="Log agent SELECTs slower than this")
+    erp_auto_index: bool = Field(
+        default=False, description="Create indexes suggested by the query advisor"
+    )
+    erp_auto_index_min_hits: int = Field(
+        default=3, description="Scanning queries an index must be suggested by before it is created"
+    )
+    erp_log_durability: Literal["buffered", "group", "immediate"] = Field(
+        default="buffered",
+        description="inventory_logs inserts: buffered (write-behind), group (commit before "
+        "returning, shared transactions) or immediate (one transaction each)",
+    )
+    erp_log_batch_size: int = Field(default=500, description="Buffered log rows that trigger a flush")
+    erp_log_flush_interval: float = Field(
+        default=1.0, description="Max seconds a buffered log row waits before it is written"
+    )
+    erp_log_max_pending: int = Field(
+        default=50_000, description="Buffered log rows at which appends flush inline"
+    )
+    erp_async_readers: int = Field(
+        default=4, description="Threads serving async DatabaseTool reads (writes use one thread)"
+    )
+
+    # Deterministic analysis fast path
+    analysis_fast_path: bool = Field(
+        default=True, description="Precompute the analyst report without LLM tool calls"
+    )
+    analysis_price_tolerance: float = Field(
+        default=0.05,
+        description="Price is uncompetitive above competitor_min * (1 + tolerance)",
+    )
+    analysis_snapshot: bool = Field(
+        default=True,
+        description="Analyze a columnar in-memory products snapshot refreshed from updated_at",
+    )
+    analysis_incremental: bool = Field(
+        default=False,
+        description="Only analyze products changed since the last run (product_changes log)",
+    )
+    analysis_change_log_max_rows: int = Field(
+        default=100_000,
+        description="Unconsumed product_changes rows kept between incremental runs",
+    )
+
+    # Map-reduce strategist: findings are decided in chunks, concurrently
+    strategist_chunk_size: int = Field(
+        default=25, description="Findings per strategist call (0 = one call for the whole report)"
+    )
+    strategist_max_chunks: int = Field(
+        default=8, description="Max strategist calls per report, chunks grow beyond it (0 = no cap)"
+    )
+    llm_max_concurrency: int = Field(
+        default=8, description="Max LLM calls in flight across the process"
+    )
+
+    # Context compaction: token budgets for task hand-offs, reports and tool results
+    context_compaction: bool = Field(
+        default=True, description="Render hand-offs as compact tables and hold them to budgets"
+    )
+    context_budget_analyst: int = Field(
+        default=8000, description="Tokens of precomputed report in the analyst's task"
+    )
+    context_budget_strategist: int = Field(
+        default=6000, description="Tokens of upstream context handed to the strategist"
+    )
+    context_budget_execution: int = Field(
+        default=6000, description="Tokens of upstream context handed to the execution officer"
+    )
+    context_tool_budget: int = Field(
+        default=2000, description="Tokens per tool result returned to an agent"
+    )
+
+    # LLM response cache (off | readwrite | replay)
+    llm_cache_mode: Literal["off", "readwrite", "replay"] = Field(
+        default="readwrite", description="Reuse cached LLM responses; replay never calls the API"
+    )
+    llm_cache_path: str = Field(default="./data/llm_cache.db", description="SQLite LLM cache file")
+    llm_cache_ttl: int = Field(default=86400, description="Seconds a cached LLM response stays valid")
+    llm_cache_max_entries: int = Field(default=5000, description="LRU bound on cached responses")
+
+    # Resident daemon (python main.py --daemon)
+    daemon_interval: int = Field(default=3600, description="Seconds between scheduled runs (0 = none)")
+    daemon_cron: str | None = Field(
+        default=None, description="5-field cron expression; overrides daemon_interval"
+    )
+    daemon_jitter: int = Field(default=60, description="Random extra delay (s) per scheduled run")
+    daemon_run_on_start: bool = Field(default=False, description="Run once when the daemon starts")
+    daemon_control_host: str = Field(default="127.0.0.1", description="Control API bind address")
+    daemon_control_port: int | None = Field(
+        default=8787, description="Control API port (unset = no control API)"
+    )
+    daemon_shutdown_timeout: int = Field(
+        default=300, description="Seconds to wait for the active run on shutdown"
+    )
+
+    # Tracing (spans + latency histograms; /metrics and /traces on the daemon control API)
+    tracing_enabled: bool = Field(default=True, description="Record tool, LLM and task spans")
+    tracing_sample_rate: float = Field(
+        default=0.1, description="Fraction of runs whose spans are kept for trace export"
+    )
+    tracing_max_spans: int = Field(default=10_000, description="Most recent sampled spans kept")
+    tracing_export_path: str | None = Field(
+        default=None, description="Write sampled spans as OTLP/JSON here after each one-shot run"
+    )
+
+    # Sharded execution (SHARD_COUNT=1 runs a single crew)
+    shard_count: int = Field(default=1, description="Number of SKU-range shards per run")
+    shard_workers: int = Field(default=4, description="Shards run concurrently")
+    shard_executor: Literal["thread", "process"] = Field(
+        default="thread", description="Worker pool type for shards"
+    )
+    shard_strategy: Literal["range", "prefix"] = Field(
+        default="range", description="Partition by balanced SKU ranges or SKU prefix"
+    )
+
+    # Competitor price API (unset = built-in simulated prices)
+    competitor_api_url: str | None = Field(
+        default=None, description="Base URL of the competitor price API"
+    )
+    competitor_concurrency: int = Field(default=64, description="Max in-flight API requests")
+    competitor_rate_limit: float = Field(
+        default=200.0, description="Max API requests per second (0 = unlimited)"
+    )
+    competitor_timeout: float = Field(default=5.0, description="Per-request timeout (s)")
+    competitor_max_retries: int = Field(default=3, description="Retries per SKU on failure")
+    competitor_async_workers: int = Field(
+        default=8, description="Threads serving async lookups without the API (cache, store, ERP)"
+    )
+
+    competitor_cache_enabled: bool = Field(default=True, description="Cache competitor prices")
+    competitor_cache_path: str | None = Field(
+        default="./data/competitor_cache.db",
+        description="SQLite file for the persistent cache tier (empty = memory only)",
+    )
+    competitor_cache_ttl: float = Field(default=3600.0, description="Seconds a price is fresh")
+    competitor_cache_stale_ttl: float = Field(
+        default=86400.0, description="Extra seconds a stale price is served while refreshing"
+    )
+    competitor_cache_max_entries: int = Field(
+        default=100_000, description="Max entries in the in-memory LRU tier"
+    )
+
+    competitor_store_path: str | None = Field(
+        default=None,
+        description="Directory of the memory-mapped competitor price store (unset = not used)",
+    )
+    competitor_store_retain_days: int = Field(
+        default=30, description="Days of price history kept by store compaction"
+    )
 
     # SMTP (supplier communication)
     smtp_host: str = Field(default="smtp.example.com", description="SMTP host")
@@ -48,6 +247,24 @@ class Settings(BaseSettings):
     smtp_mock_mode: bool = Field(
         default=True, description="If True, log emails only (no real send)"
     )
+    smtp_pool_size: int = Field(default=4, description="Max open SMTP sessions")
+    smtp_keepalive_interval: float = Field(
+        default=60.0, description="Idle seconds before a pooled session is checked with NOOP"
+    )
+    smtp_timeout: float = Field(default=30.0, description="SMTP socket timeout (s)")
+    smtp_batch_size: int = Field(default=20, description="Max emails sent per session checkout")
+    smtp_async_dispatch: bool = Field(
+        default=True, description="Queue emails and send in the background"
+    )
+    smtp_queue_max: int = Field(default=10_000, description="Max queued emails")
+
+    # Async tool calls (_arun): blocking work runs on bounded per-tool thread pools
+    tool_async_queue_max: int = Field(
+        default=256, description="Calls queued per pool before async callers wait for a slot"
+    )
+    tool_async_queue_timeout: float = Field(
+        default=30.0, description="Seconds an async call waits for a slot before it fails"
+    )
 
     # Logging
     log_level: str = Field(default="INFO", description="Log level")
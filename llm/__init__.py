@@ -0,0 +1,50 @@
+"""LLM client helpers (response cache, call tracing, concurrency limit, context compaction)."""
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+from llm.cache import LLMCacheMiss, LLMResponseCache, cache_key
+from llm.compaction import (
+    ContextCompactor,
+    estimate_tokens,
+    get_context_compactor,
+    reset_context_compactor,
+)
+from llm.limiter import llm_slot, reset_llm_limiter
+
+if TYPE_CHECKING:
+    from llm.cached_llm import CachedLLM, with_llm_cache
+    from llm.traced_llm import TracedLLM, with_tracing
+
+# The wrappers subclass a CrewAI class; importing them is deferred until first use
+_LAZY_EXPORTS = {
+    "CachedLLM": "llm.cached_llm",
+    "with_llm_cache": "llm.cached_llm",
+    "TracedLLM": "llm.traced_llm",
+    "with_tracing": "llm.traced_llm",
+}
+
+__all__ = [
+    "CachedLLM",
+    "ContextCompactor",
+    "LLMCacheMiss",
+    "LLMResponseCache",
+    "TracedLLM",
+    "cache_key",
+    "estimate_tokens",
+    "get_context_compactor",
+    "llm_slot",
+    "reset_context_compactor",
+    "reset_llm_limiter",
+    "with_llm_cache",
+    "with_tracing",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'llm' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,209 @@
+"""Persistent, SQLite-backed LLM response cache (no CrewAI import; see llm.cached_llm)."""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Literal, Optional
+
+from pydantic import BaseModel
+
+from config import get_settings
+from tools.db_pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+CacheMode = Literal["off", "readwrite", "replay"]
+
+_CACHE_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS llm_response_cache (
+        key TEXT PRIMARY KEY,
+        model TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        last_used REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_response_cache(last_used);
+"""
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a call has no cached response."""
+
+
+def _digest(payload: Any) -> str:
+    blob = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _normalize_text(text: Any) -> Any:
+    if not isinstance(text, str):
+        return text
+    return "\n".join(line.rstrip() for line in text.replace("\r\n", "\n").strip().split("\n"))
+
+
+def _normalize_messages(messages: Any) -> list[dict[str, Any]]:
+    """Role/content/tool calls only; provider-generated call ids are dropped."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    normalized = []
+    for message in messages:
+        entry: dict[str, Any] = {
+            "role": message.get("role"),
+            "content": _normalize_text(message.get("content")),
+        }
+        if message.get("tool_calls"):
+            entry["tool_calls"] = [
+                {"name": fn.get("name"), "arguments": fn.get("arguments")}
+                for fn in (c.get("function", {}) for c in message["tool_calls"])
+            ]
+        normalized.append(entry)
+    return normalized
+
+
+def _tool_specs(tools: Optional[list[Any]]) -> list[Any]:
+    specs = []
+    for tool in tools or []:
+        if isinstance(tool, dict):
+            specs.append(tool)
+        else:
+            specs.append(
+                {"name": getattr(tool, "name", str(tool)), "description": getattr(tool, "description", "")}
+            )
+    return specs
+
+
+def cache_key(
+    model: str,
+    temperature: Optional[float],
+    messages: Any,
+    tools: Optional[list[Any]] = None,
+    *,
+    stop: Optional[list[str]] = None,
+    response_model: Optional[type[BaseModel]] = None,
+) -> str:
+    """
+    Hash of everything that determines a completion: model, temperature, stop words,
+    normalized messages, tool definitions, the content of tool results fed back to the
+    model, and the structured-output schema.
+    """
+    normalized = _normalize_messages(messages)
+    tool_results = [m["content"] for m in normalized if m["role"] == "tool"]
+    return _digest(
+        {
+            "model": model,
+            "temperature": temperature,
+            "stop": sorted(stop or []),
+            "messages": _digest(normalized),
+            "tools": _digest(_tool_specs(tools)),
+            "tool_results": _digest(tool_results),
+            "response_model": response_model.__name__ if response_model else None,
+        }
+    )
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed store of LLM responses. Entries expire ``ttl`` seconds after they
+    were written; beyond ``max_entries`` the least recently used rows are evicted.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        *,
+        ttl: float = 86400.0,
+        max_entries: int = 5000,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._pool_ref: Optional[ConnectionPool] = None
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @property
+    def _pool(self) -> ConnectionPool:
+        """Pool for the cache file (re-acquired if it was closed by a registry teardown)."""
+        if self._pool_ref is None or self._pool_ref.closed:
+            self._pool_ref = get_pool(self.path)
+            self._pool_ref.ensure_initialized("llm_response_cache", _apply_cache_schema)
+        return self._pool_ref
+
+    @classmethod
+    def from_settings(cls) -> "LLMResponseCache":
+        settings = get_settings()
+        path = Path(settings.llm_cache_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return cls(path, ttl=settings.llm_cache_ttl, max_entries=settings.llm_cache_max_entries)
+
+    def get(self, key: str) -> Optional[tuple[str, str]]:
+        """(kind, response) for a live entry, else None. Expired entries are deleted."""
+        now = self._clock()
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT kind, response, created_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row["created_at"] >= self.ttl:
+                conn.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is not None:
+                conn.execute(
+                    "UPDATE llm_response_cache SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                    (now, key),
+                )
+                conn.commit()
+        with self._lock:
+            self._counts["hits" if row is not None else "misses"] += 1
+        return (row["kind"], row["response"]) if row is not None else None
+
+    def put(self, key: str, model: str, kind: str, response: str) -> None:
+        now = self._clock()
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, model, kind, response, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, kind, response, now, now),
+            )
+            evicted = conn.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                " SELECT key FROM llm_response_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+            conn.commit()
+        with self._lock:
+            self._counts["writes"] += 1
+            self._counts["evictions"] += max(evicted, 0)
+
+    def purge_expired(self) -> int:
+        """Delete expired entries; returns how many were removed."""
+        with self._pool.connection() as conn:
+            removed = conn.execute(
+                "DELETE FROM llm_response_cache WHERE created_at <= ?", (self._clock() - self.ttl,)
+            ).rowcount
+            conn.commit()
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        with self._pool.connection() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM llm_response_cache").fetchone()[0]
+        with self._lock:
+            return dict(self._counts, entries=entries)
+
+    def clear(self) -> None:
+        with self._pool.connection() as conn:
+            conn.execute("DELETE FROM llm_response_cache")
+            conn.commit()
+
+
+def _apply_cache_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(_CACHE_SCHEMA_SQL)
+    conn.commit()
@@ -0,0 +1,136 @@
+"""CrewAI LLM wrapper that answers repeated calls from the persistent LLMResponseCache."""
+
+import json
+import logging
+from typing import Any, Optional
+
+from crewai.llms.base_llm import BaseLLM, call_stop_override
+from crewai.utilities.agent_utils import extract_tool_call_info
+from pydantic import BaseModel, Field
+
+from config import get_settings
+from llm.cache import CacheMode, LLMCacheMiss, LLMResponseCache, cache_key
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_response(response: Any) -> Optional[tuple[str, str]]:
+    """Serialize a call result as (kind, payload); None if it cannot be replayed."""
+    if isinstance(response, str):
+        return "text", response
+    if isinstance(response, BaseModel):
+        return "model", response.model_dump_json()
+    if isinstance(response, list) and response:
+        calls = []
+        for tool_call in response:
+            info = extract_tool_call_info(tool_call)
+            if info is None:
+                return None
+            call_id, name, arguments = info
+            if not isinstance(arguments, str):
+                arguments = json.dumps(arguments)
+            calls.append(
+                {"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+            )
+        return "tool_calls", json.dumps(calls)
+    return None
+
+
+def _decode_response(kind: str, payload: str, response_model: Optional[type[BaseModel]]) -> Any:
+    if kind == "tool_calls":
+        return json.loads(payload)
+    if kind == "model" and response_model is not None:
+        return response_model.model_validate_json(payload)
+    return payload
+
+
+class CachedLLM(BaseLLM):
+    """
+    Wraps a CrewAI LLM and answers repeated calls from an LLMResponseCache.
+    ``mode="replay"`` never calls the wrapped model or writes the cache: misses raise
+    LLMCacheMiss. Calls that execute tools inside the LLM (``available_functions``)
+    always bypass the cache so their side effects are not skipped.
+    """
+
+    llm_type: str = "cached"
+    inner: BaseLLM
+    cache: Any = Field(exclude=True)
+    mode: CacheMode = "readwrite"
+
+    def __init__(
+        self,
+        inner: BaseLLM,
+        cache: LLMResponseCache,
+        mode: CacheMode = "readwrite",
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(
+            inner=inner,
+            cache=cache,
+            mode=mode,
+            model=inner.model,
+            temperature=inner.temperature,
+            stop=list(inner.stop),
+            provider=inner.provider,
+            **kwargs,
+        )
+
+    def call(
+        self,
+        messages: Any,
+        tools: Optional[list[Any]] = None,
+        callbacks: Optional[list[Any]] = None,
+        available_functions: Optional[dict[str, Any]] = None,
+        from_task: Any = None,
+        from_agent: Any = None,
+        response_model: Optional[type[BaseModel]] = None,
+    ) -> Any:
+        stop = self.stop_sequences
+        key = None
+        if not available_functions:
+            key = cache_key(
+                self.model, self.temperature, messages, tools, stop=stop, response_model=response_model
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug("LLM cache hit %s", key[:12])
+                return _decode_response(cached[0], cached[1], response_model)
+        if self.mode == "replay":
+            raise LLMCacheMiss(f"No cached LLM response for {self.model} (replay mode)")
+        with call_stop_override(self.inner, stop):
+            response = self.inner.call(
+                messages,
+                tools=tools,
+                callbacks=callbacks,
+                available_functions=available_functions,
+                from_task=from_task,
+                from_agent=from_agent,
+                response_model=response_model,
+            )
+        if key is not None:
+            encoded = _encode_response(response)
+            if encoded is not None:
+                self.cache.put(key, self.model, *encoded)
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self) -> Any:
+        return self.inner.get_token_usage_summary()
+
+
+def with_llm_cache(llm: Any, mode: Optional[CacheMode] = None) -> Any:
+    """Wrap ``llm`` per LLM_CACHE_MODE (``mode`` overrides); "off" returns it unchanged."""
+    from crewai.utilities.llm_utils import create_llm
+
+    mode = mode or get_settings().llm_cache_mode
+    if mode == "off":
+        return llm
+    return CachedLLM(create_llm(llm), LLMResponseCache.from_settings(), mode=mode)
@@ -0,0 +1,421 @@
+"""
+Token-budget compaction of what reaches an agent's prompt: upstream task output, the
+precomputed analyst report and tool results. Structured hand-offs (AnalystReport,
+StrategistDecisions) are rendered as compact tables instead of JSON or free text, tool
+results keep only the fields the agents use, and everything is cut to per-agent budgets.
+"""
+
+import json
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+from config import get_settings
+from config.prompts import ANALYST_ROLE, EXECUTION_OFFICER_ROLE, STRATEGIST_ROLE
+from models.schemas import ActionType, AnalystReport, StrategistDecisions
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+CHARS_PER_TOKEN = 4
+LOW_STOCK_HEADER = "LOW_STOCK id|sku|stock|min"
+PRICES_HEADER = "PRICES id|sku|ours|competitor_min|competitor_avg"
+NOTES_HEADER = "NOTES FROM PREVIOUS STEP"
+_JUSTIFICATION_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text`` (about 4 characters per token for English and JSON)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def truncate_text(text: str, budget_tokens: int) -> str:
+    """``text`` cut to ``budget_tokens``, with a marker saying how much was dropped."""
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    keep = max(budget_tokens * CHARS_PER_TOKEN - 80, 0)
+    omitted = estimate_tokens(text[keep:])
+    return f"{text[:keep]}\n[... {omitted} tokens omitted to fit the context budget]"
+
+
+def parse_model(raw: str, model: type[M], required_key: str) -> Optional[M]:
+    """``model`` from the first JSON object in ``raw`` that has ``required_key`` (None if none)."""
+    decoder = json.JSONDecoder()
+    start = raw.find("{")
+    while start >= 0:
+        try:
+            value, _ = decoder.raw_decode(raw, start)
+            if isinstance(value, dict) and required_key in value:
+                return model.model_validate(value)
+        except (json.JSONDecodeError, ValidationError):
+            pass
+        start = raw.find("{", start + 1)
+    return None
+
+
+def _render_sections(
+    sections: list[tuple[str, list[str], str]], tail: list[str], budget_tokens: Optional[int]
+) -> str:
+    """
+    Header plus rows per non-empty section, then ``tail``. Over budget, every section is
+    cut to the same (largest fitting) number of rows, so no section is starved.
+    """
+
+    def build(cap: int) -> str:
+        lines: list[str] = []
+        for header, rows, noun in sections:
+            if not rows:
+                continue
+            lines.append(header)
+            lines.extend(rows[:cap])
+            if len(rows) > cap:
+                lines.append(f"(+{len(rows) - cap} more {noun} not shown)")
+        return "\n".join(lines + tail)
+
+    longest = max((len(rows) for _, rows, _ in sections), default=0)
+    text = build(longest)
+    if budget_tokens is None or estimate_tokens(text) <= budget_tokens:
+        return text
+    low, high = 0, longest
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(build(mid)) <= budget_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    logger.warning(
+        "Context over budget (%d tokens): showing %d of up to %d rows per section",
+        budget_tokens, low, longest,
+    )
+    return truncate_text(build(low), budget_tokens)
+
+
+def render_report(report: AnalystReport, budget_tokens: Optional[int] = None) -> str:
+    """``report`` as pipe-separated tables (names dropped), within ``budget_tokens``."""
+    low_stock = [
+        f"{i.product_id}|{i.sku}|{i.current_stock}|{i.min_stock_level}"
+        for i in report.low_stock_items
+    ]
+    prices = [
+        f"{p.product_id}|{p.sku}|{p.our_price:.2f}|{p.competitor_min:.2f}|"
+        + (f"{p.competitor_avg:.2f}" if p.competitor_avg is not None else "")
+        for p in report.uncompetitive_prices
+    ]
+    if not low_stock and not prices:
+        return "No low-stock items or uncompetitive prices." + (
+            f"\nSUMMARY {report.summary}" if report.summary else ""
+        )
+    tail = [f"SUMMARY {report.summary}"] if report.summary else []
+    return _render_sections(
+        [
+            (LOW_STOCK_HEADER, low_stock, "low-stock items"),
+            (PRICES_HEADER, prices, "price findings"),
+        ],
+        tail,
+        budget_tokens,
+    )
+
+
+def render_decisions(
+    decisions: StrategistDecisions,
+    report: Optional[AnalystReport] = None,
+    budget_tokens: Optional[int] = None,
+) -> str:
+    """
+    Actionable decisions as tables (with the product's id and stock or prices when
+    ``report`` is given); no_action decisions are only counted. Every reorder and
+    discount row is kept: over budget the justifications are dropped, and if the rows
+    alone still exceed it they are sent anyway, since a dropped row would never be
+    executed.
+    """
+    low = {i.sku.lower(): i for i in report.low_stock_items} if report else {}
+    prices = {p.sku.lower(): p for p in report.uncompetitive_prices} if report else {}
+    reorders: list[tuple[str, str]] = []
+    discounts: list[tuple[str, str]] = []
+    idle = 0
+    for d in decisions.decisions:
+        why = " ".join(d.justification.split())[:_JUSTIFICATION_CHARS]
+        key = d.finding_ref.lower()
+        if d.action == ActionType.REORDER:
+            item = low.get(key)
+            facts = (
+                f"|{item.product_id}|{item.current_stock}|{item.min_stock_level}" if item else "|||"
+            )
+            reorders.append((f"{d.finding_ref}{facts if report else ''}", why))
+        elif d.action == ActionType.DISCOUNT_CAMPAIGN:
+            finding = prices.get(key)
+            facts = (
+                f"|{finding.product_id}|{finding.our_price:.2f}|{finding.competitor_min:.2f}"
+                if finding else "|||"
+            )
+            discounts.append((f"{d.finding_ref}{facts if report else ''}", why))
+        else:
+            idle += 1
+    columns = ("sku|id|stock|min", "sku|id|ours|competitor_min") if report else ("sku", "sku")
+
+    def build(with_why: bool) -> str:
+        lines: list[str] = []
+        for action, column, rows in (
+            ("REORDER", columns[0], reorders),
+            ("DISCOUNT_CAMPAIGN", columns[1], discounts),
+        ):
+            if rows:
+                lines.append(f"{action} {column}|why" if with_why else f"{action} {column}")
+                lines.extend(f"{row}|{why}" if with_why else row for row, why in rows)
+        if idle:
+            lines.append(f"NO_ACTION {idle} SKUs")
+        return "\n".join(lines)
+
+    text = build(with_why=True)
+    if budget_tokens is None or estimate_tokens(text) <= budget_tokens:
+        return text
+    text = build(with_why=False)
+    if estimate_tokens(text) > budget_tokens:
+        logger.warning(
+            "%d actionable decisions exceed the context budget (%d tokens); sending all of them",
+            len(reorders) + len(discounts), budget_tokens,
+        )
+    return text
+
+
+def _project_competitor(data: dict[str, Any]) -> dict[str, Any]:
+    data.pop("note", None)
+    if "columns" in data:  # batch lookup: keep what a PriceFinding needs
+        for column in ("max_price", "median_price", "spread"):
+            data.pop(column, None)
+        data["columns"] = [c for c in data["columns"] if c in data]
+    return data
+
+
+def _project_knowledge(data: dict[str, Any]) -> dict[str, Any]:
+    for result in data.get("results") or []:
+        if isinstance(result, dict):
+            result.pop("id", None)  # repeated in "ref"
+    return data
+
+
+_PROJECTIONS: dict[str, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    "competitor_scraper": _project_competitor,
+    "knowledge_base": _project_knowledge,
+}
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), default=str)
+
+
+def _fit_payload(data: dict[str, Any], budget_tokens: int) -> str:
+    """
+    ``data`` as compact JSON within budget: the longest lists (result rows, or the parallel
+    columns of a columnar payload) are cut to the same length and the cut is noted.
+    """
+    text = _dumps(data)
+    if estimate_tokens(text) <= budget_tokens:
+        return text
+    lists = {k: v for k, v in data.items() if isinstance(v, list) and k != "columns"}
+    total = max(map(len, lists.values()), default=0)
+    if total == 0:
+        return truncate_text(text, budget_tokens)
+    row_keys = [k for k, v in lists.items() if len(v) == total]
+
+    def build(keep: int) -> str:
+        trimmed = dict(data, **{k: data[k][:keep] for k in row_keys})
+        trimmed["omitted_rows"] = total - keep
+        if trimmed.get("next_page_token"):
+            trimmed["next_page_token"] = None  # it would skip the omitted rows
+        trimmed["hint"] = "result cut to fit the context budget; request fewer rows or SKUs"
+        return _dumps(trimmed)
+
+    low, high = 0, total - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate_tokens(build(mid)) <= budget_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return truncate_text(build(low), budget_tokens)
+
+
+@dataclass(frozen=True)
+class Compacted:
+    """Compacted text and its estimated size before and after."""
+
+    text: str
+    tokens_before: int
+    tokens_after: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(self.tokens_before - self.tokens_after, 0)
+
+
+class ContextCompactor:
+    """
+    Applies the CONTEXT_* budgets. ``budgets`` maps agent role to the tokens of upstream
+    context (or, for the analyst, of precomputed report) its task may carry; every tool
+    result is held to ``tool_budget``. Keeps per-kind totals of tokens before and after
+    ("context", "report", "tool") so savings can be reported per run.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        budgets: Optional[dict[str, int]] = None,
+        tool_budget: int = 2000,
+    ) -> None:
+        self.enabled = enabled
+        self.budgets = dict(budgets or {})
+        self.tool_budget = tool_budget
+        self._lock = threading.Lock()
+        self._counts: dict[str, dict[str, int]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "ContextCompactor":
+        settings = get_settings()
+        return cls(
+            enabled=settings.context_compaction,
+            budgets={
+                ANALYST_ROLE: settings.context_budget_analyst,
+                STRATEGIST_ROLE: settings.context_budget_strategist,
+                EXECUTION_OFFICER_ROLE: settings.context_budget_execution,
+            },
+            tool_budget=settings.context_tool_budget,
+        )
+
+    def budget_for(self, role: str) -> Optional[int]:
+        return self.budgets.get(role)
+
+    # ----- task hand-offs -----
+
+    def compact_context(
+        self, role: str, context: str, report: Optional[AnalystReport] = None
+    ) -> Compacted:
+        """
+        Upstream task output for agent ``role``: strategist decisions become a decision
+        table (annotated from ``report``; actionable rows are never cut, see
+        render_decisions); the strategist gets ``report`` (or a report found in the text)
+        as tables, with the analyst's own text as short notes; anything else is cut to
+        the role's budget.
+        """
+        before = estimate_tokens(context)
+        budget = self.budget_for(role)
+        if not self.enabled or not context or budget is None:
+            return Compacted(context, before, before)
+        decisions = parse_model(context, StrategistDecisions, "decisions")
+        parsed = None
+        if role == STRATEGIST_ROLE and report is None:
+            parsed = parse_model(context, AnalystReport, "low_stock_items")
+        if decisions is not None and decisions.decisions:
+            text = render_decisions(decisions, report, budget)
+        elif role == STRATEGIST_ROLE and (report is not None or parsed is not None):
+            text = render_report(report if report is not None else parsed, budget)
+            notes_budget = min(budget - estimate_tokens(text), budget // 4)
+            if parsed is None and notes_budget > 20:  # the analyst's own remarks
+                text += f"\n\n{NOTES_HEADER}\n{truncate_text(context.strip(), notes_budget)}"
+        else:
+            text = truncate_text(context, budget)
+        return self._record("context", before, text)
+
+    def compact_report(
+        self, report: AnalystReport, budget_tokens: Optional[int] = None
+    ) -> Compacted:
+        """``report`` for a task description: tables when enabled, else its JSON."""
+        json_text = report.model_dump_json(exclude_none=True)
+        before = estimate_tokens(json_text)
+        if not self.enabled:
+            return Compacted(json_text, before, before)
+        return self._record("report", before, render_report(report, budget_tokens))
+
+    # ----- tool calls -----
+
+    def tool_input(self, tool_name: str, raw_input: str) -> str:
+        """
+        Input for ``tool_name`` with the tool budget applied at the source: ERP reads get
+        a ``max_bytes`` page size, so oversized results page (next_page_token) instead
+        of being cut afterwards.
+        """
+        if not self.enabled or tool_name != "erp_database":
+            return raw_input
+        if not raw_input.lstrip().startswith("{"):
+            return raw_input
+        try:
+            data = json.loads(raw_input)
+        except json.JSONDecodeError:
+            return raw_input
+        if not isinstance(data, dict) or "query" not in data or "max_bytes" in data:
+            return raw_input
+        # Most of the budget goes to rows; the rest covers columns and paging fields
+        data["max_bytes"] = self.tool_budget * CHARS_PER_TOKEN * 3 // 4
+        return json.dumps(data)
+
+    def compact_tool_result(self, tool_name: str, result: Any) -> Compacted:
+        """``result`` of ``tool_name`` projected onto the fields agents use, within the tool budget."""
+        if not isinstance(result, str):
+            return Compacted(result, 0, 0)
+        before = estimate_tokens(result)
+        if not self.enabled:
+            return Compacted(result, before, before)
+        data: Any = None
+        if result.lstrip().startswith("{"):
+            try:
+                data = json.loads(result)
+            except json.JSONDecodeError:
+                data = None
+        if isinstance(data, dict):
+            projection = _PROJECTIONS.get(tool_name)
+            text = _fit_payload(projection(data) if projection else data, self.tool_budget)
+        else:
+            text = truncate_text(result, self.tool_budget)
+        if len(text) >= len(result):
+            text = result  # already compact; keep the tool's own bytes
+        return self._record("tool", before, text)
+
+    # ----- reporting -----
+
+    def _record(self, kind: str, before: int, text: str) -> Compacted:
+        compacted = Compacted(text, before, estimate_tokens(text))
+        with self._lock:
+            counts = self._counts.setdefault(
+                kind, {"calls": 0, "tokens_before": 0, "tokens_after": 0}
+            )
+            counts["calls"] += 1
+            counts["tokens_before"] += compacted.tokens_before
+            counts["tokens_after"] += compacted.tokens_after
+        return compacted
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Per kind: calls, estimated tokens before and after compaction, tokens saved."""
+        with self._lock:
+            return {
+                kind: dict(c, tokens_saved=max(c["tokens_before"] - c["tokens_after"], 0))
+                for kind, c in self._counts.items()
+            }
+
+    def tokens_saved(self) -> int:
+        return sum(kind["tokens_saved"] for kind in self.stats().values())
+
+
+_compactor: Optional[ContextCompactor] = None
+_lock = threading.Lock()
+
+
+def get_context_compactor() -> ContextCompactor:
+    """The process-wide compactor (configured from CONTEXT_* settings)."""
+    global _compactor
+    if _compactor is None:
+        with _lock:
+            if _compactor is None:
+                _compactor = ContextCompactor.from_settings()
+    return _compactor
+
+
+def reset_context_compactor() -> None:
+    """Discard the compactor; the next get_context_compactor() re-reads the settings."""
+    global _compactor
+    with _lock:
+        _compactor = None
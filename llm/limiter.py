@@ -0,0 +1,34 @@
+"""Process-wide cap on concurrent LLM work (LLM_MAX_CONCURRENCY), shared by shards and fan-out."""
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from config import get_settings
+
+_semaphore: Optional[threading.BoundedSemaphore] = None
+_lock = threading.Lock()
+
+
+def llm_semaphore() -> threading.BoundedSemaphore:
+    """The shared semaphore, sized from LLM_MAX_CONCURRENCY on first use."""
+    global _semaphore
+    if _semaphore is None:
+        with _lock:
+            if _semaphore is None:
+                _semaphore = threading.BoundedSemaphore(max(1, get_settings().llm_max_concurrency))
+    return _semaphore
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """Hold one of the process-wide LLM slots while the enclosed LLM work runs."""
+    with llm_semaphore():
+        yield
+
+
+def reset_llm_limiter() -> None:
+    """Forget the semaphore so the next llm_slot() re-reads LLM_MAX_CONCURRENCY."""
+    global _semaphore
+    with _lock:
+        _semaphore = None
@@ -0,0 +1,122 @@
+"""CrewAI LLM wrapper that records every call as an "llm" span and holds the process-wide LLM slot."""
+
+import json
+from typing import Any, Optional
+
+from crewai.llms.base_llm import BaseLLM, call_stop_override
+from pydantic import BaseModel, Field
+
+from llm.limiter import llm_slot
+from telemetry import Tracer, get_tracer
+
+
+def _payload_size(messages: Any) -> int:
+    if isinstance(messages, str):
+        return len(messages)
+    return sum(len(str(m.get("content") or "")) for m in messages if isinstance(m, dict))
+
+
+def _response_size(response: Any) -> int:
+    if isinstance(response, str):
+        return len(response)
+    if isinstance(response, BaseModel):
+        return len(response.model_dump_json())
+    try:
+        return len(json.dumps(response, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _tokens(llm: BaseLLM) -> tuple[int, int]:
+    try:
+        usage = llm.get_token_usage_summary()
+    except Exception:
+        return 0, 0
+    return getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0
+
+
+class TracedLLM(BaseLLM):
+    """
+    Wraps a CrewAI LLM and times each call with the agent role, task name, message and
+    response sizes, tool-call count and token usage (delta of the wrapped LLM's counters).
+    The wrapped call holds one LLM_MAX_CONCURRENCY slot, so the limit covers every crew
+    LLM call in the process (shards and strategist fan-out included).
+    """
+
+    llm_type: str = "traced"
+    inner: BaseLLM
+    tracer: Any = Field(default=None, exclude=True)
+
+    def __init__(self, inner: BaseLLM, tracer: Optional[Tracer] = None, **kwargs: Any) -> None:
+        super().__init__(
+            inner=inner,
+            tracer=tracer,
+            model=inner.model,
+            temperature=inner.temperature,
+            stop=list(inner.stop),
+            provider=inner.provider,
+            **kwargs,
+        )
+
+    def call(
+        self,
+        messages: Any,
+        tools: Optional[list[Any]] = None,
+        callbacks: Optional[list[Any]] = None,
+        available_functions: Optional[dict[str, Any]] = None,
+        from_task: Any = None,
+        from_agent: Any = None,
+        response_model: Optional[type[BaseModel]] = None,
+    ) -> Any:
+        tracer = self.tracer or get_tracer()
+        with tracer.span(
+            "llm.call",
+            "llm",
+            model=self.model,
+            agent=getattr(from_agent, "role", "") or "",
+            task=getattr(from_task, "name", "") or "",
+            bytes_in=_payload_size(messages),
+        ) as span:
+            prompt_before, completion_before = _tokens(self.inner)
+            with llm_slot(), call_stop_override(self.inner, self.stop_sequences):
+                response = self.inner.call(
+                    messages,
+                    tools=tools,
+                    callbacks=callbacks,
+                    available_functions=available_functions,
+                    from_task=from_task,
+                    from_agent=from_agent,
+                    response_model=response_model,
+                )
+            prompt_after, completion_after = _tokens(self.inner)
+            span.set(
+                bytes_out=_response_size(response),
+                tool_calls=len(response) if isinstance(response, list) else 0,
+                prompt_tokens=max(prompt_after - prompt_before, 0),
+                completion_tokens=max(completion_after - completion_before, 0),
+            )
+        return response
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self) -> Any:
+        return self.inner.get_token_usage_summary()
+
+
+def with_tracing(llm: Any, tracer: Optional[Tracer] = None) -> Any:
+    """
+    Wrap ``llm`` in a TracedLLM unless it is already one. With tracing disabled the spans
+    are no-ops but the wrapper still enforces LLM_MAX_CONCURRENCY.
+    """
+    from crewai.utilities.llm_utils import create_llm
+
+    if isinstance(llm, TracedLLM):
+        return llm
+    return TracedLLM(create_llm(llm), tracer)
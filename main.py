@@ -4,9 +4,12 @@ Entry point for the Autonomous Business Logic Orchestrator.
 Runs the CrewAI flow: Analyst -> Strategist -> Execution Officer.
 """
 
+import argparse
 import logging
 import sys
+from functools import lru_cache, partial
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
 # Ensure project root is on path
 _project_root = Path(__file__).resolve().parent
@@ -18,8 +21,12 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import get_settings
-from agents import create_crew
-from tools import DatabaseTool
+from orchestration import OrchestratorDaemon, run_pipeline
+from telemetry import get_tracer, write_otlp_json
+from tools.registry import get_tool_registry
+
+if TYPE_CHECKING:
+    from tools.database_tool import DatabaseTool
 
 # ----- Logging setup -----
 def setup_logging(level: str = "INFO") -> None:
@@ -32,77 +39,183 @@ def setup_logging(level: str = "INFO") -> None:
     )
 
 
-def seed_erp_if_empty(db_tool: DatabaseTool) -> None:
+def seed_erp_if_empty(db_tool: "DatabaseTool") -> None:
     """Insert sample products if the ERP has no data (for demo)."""
-    import sqlite3
-    path = db_tool.db_path
-    if path is None:
+    if db_tool.db_path is None:
         return
     try:
-        conn = sqlite3.connect(str(path))
-        cur = conn.execute("SELECT COUNT(*) FROM products")
-        if cur.fetchone()[0] == 0:
-            conn.executescript("""
-                INSERT INTO products (sku, name, price, stock_quantity, min_stock_level)
-                VALUES
-                    ('widget_a', 'Widget A', 32.99, 5, 15),
-                    ('widget_b', 'Widget B', 46.50, 50, 20),
-                    ('gadget_x', 'Gadget X', 98.00, 3, 10),
-                    ('gadget_y', 'Gadget Y', 15.50, 25, 15);
-            """)
-            conn.commit()
-            logging.getLogger(__name__).info("Seeded ERP with sample products")
-        conn.close()
+        with db_tool.pool.connection() as conn:
+            cur = conn.execute("SELECT COUNT(*) FROM products")
+            if cur.fetchone()[0] == 0:
+                conn.executescript("""
+                    INSERT INTO products (sku, name, price, stock_quantity, min_stock_level)
+                    VALUES
+                        ('widget_a', 'Widget A', 32.99, 5, 15),
+                        ('widget_b', 'Widget B', 46.50, 50, 20),
+                        ('gadget_x', 'Gadget X', 98.00, 3, 10),
+                        ('gadget_y', 'Gadget Y', 15.50, 25, 15);
+                """)
+                conn.commit()
+                logging.getLogger(__name__).info("Seeded ERP with sample products")
     except Exception as e:
         logging.getLogger(__name__).warning("Could not seed ERP: %s", e)
 
 
-def get_llm():
-    """Return the configured LangChain LLM (OpenAI or Anthropic)."""
-    from langchain_openai import ChatOpenAI
-    from langchain_anthropic import ChatAnthropic
+def check_llm_config() -> None:
+    """Raise ValueError if the configured provider has no API key (no provider import)."""
+    settings = get_settings()
+    if settings.llm_provider == "anthropic" and not settings.anthropic_api_key:
+        raise ValueError("ANTHROPIC_API_KEY is required when LLM_PROVIDER=anthropic")
+    if settings.llm_provider == "openai" and not settings.openai_api_key:
+        raise ValueError("OPENAI_API_KEY is required when LLM_PROVIDER=openai")
+
 
+def get_llm():
+    """
+    Return the configured LLM (OpenAI or Anthropic), wrapped in the persistent
+    response cache unless LLM_CACHE_MODE=off. Only the selected provider's LangChain
+    package is imported.
+    """
+    from llm.cached_llm import with_llm_cache
+
+    check_llm_config()
     settings = get_settings()
     if settings.llm_provider == "anthropic":
-        if not settings.anthropic_api_key:
-            raise ValueError("ANTHROPIC_API_KEY is required when LLM_PROVIDER=anthropic")
-        return ChatAnthropic(
-            model=settings.anthropic_model_name,
-            api_key=settings.anthropic_api_key,
-            temperature=0.2,
+        from langchain_anthropic import ChatAnthropic
+
+        return with_llm_cache(
+            ChatAnthropic(
+                model=settings.anthropic_model_name,
+                api_key=settings.anthropic_api_key,
+                temperature=0.2,
+            )
         )
     # Default: OpenAI
-    if not settings.openai_api_key:
-        raise ValueError("OPENAI_API_KEY is required when LLM_PROVIDER=openai")
-    return ChatOpenAI(
-        model=settings.openai_model_name,
-        api_key=settings.openai_api_key,
-        temperature=0.2,
+    from langchain_openai import ChatOpenAI
+
+    return with_llm_cache(
+        ChatOpenAI(
+            model=settings.openai_model_name,
+            api_key=settings.openai_api_key,
+            temperature=0.2,
+        )
     )
 
 
-def run() -> None:
-    """Run the orchestrator crew once."""
+@lru_cache(maxsize=1)
+def get_shared_llm():
+    """
+    get_llm() built once per process and then reused (resident mode). Module level so it
+    pickles by reference for process shards, where each worker builds its own.
+    """
+    return get_llm()
+
+
+def run(
+    focus_sku: Optional[str] = None,
+    shards: Optional[int] = None,
+    workers: Optional[int] = None,
+    incremental: Optional[bool] = None,
+) -> None:
+    """
+    Run the orchestrator once. ``focus_sku`` limits the run to one product; with more
+    than one shard (SHARD_COUNT or ``shards``) the catalog is split into SKU ranges that
+    run as independent crews on a worker pool and their results are merged.
+    ``incremental`` (ANALYSIS_INCREMENTAL) analyzes only products that changed since
+    the last successful incremental run.
+    """
     settings = get_settings()
     setup_logging(settings.log_level)
     logger = logging.getLogger(__name__)
 
     try:
-        llm = get_llm()
+        check_llm_config()
     except ValueError as e:
         logger.error("LLM configuration error: %s", e)
         sys.exit(1)
 
-    db_tool = DatabaseTool()
-    seed_erp_if_empty(db_tool)
+    registry = get_tool_registry()
+    registry.warm_up()
+    try:
+        seed_erp_if_empty(registry.database_tool)
+        run_pipeline(
+            registry,
+            llm_factory=get_llm,
+            focus_sku=focus_sku,
+            shards=shards,
+            workers=workers,
+            incremental=incremental,
+        )
+    finally:
+        registry.teardown()
+        _report_tracing(logger)
+
+
+def _report_tracing(logger: logging.Logger) -> None:
+    """Log per-operation latency percentiles and export sampled spans if configured."""
+    tracer = get_tracer()
+    for line in tracer.summary():
+        logger.info("Trace %s", line)
+    path = get_settings().tracing_export_path
+    if path and tracer.enabled:
+        count = write_otlp_json(tracer, path)
+        logger.info("Wrote %d sampled spans to %s", count, path)
+
+
+def serve(incremental: Optional[bool] = None) -> None:
+    """
+    Resident mode: build the LLM client and tools once, then run crews on the
+    DAEMON_INTERVAL / DAEMON_CRON schedule and on requests to the control API until
+    SIGTERM/SIGINT or POST /shutdown. ``incremental`` is the default for every run.
+    """
+    settings = get_settings()
+    setup_logging(settings.log_level)
+    logger = logging.getLogger(__name__)
 
-    crew = create_crew(llm, verbose=True)
+    try:
+        check_llm_config()
+    except ValueError as e:
+        logger.error("LLM configuration error: %s", e)
+        sys.exit(1)
 
-    logger.info("Starting crew kickoff...")
-    inputs = {}  # Optional: e.g. {"focus_sku": "widget_a"}
-    result = crew.kickoff(inputs=inputs)
-    logger.info("Crew finished. Result: %s", result)
+    registry = get_tool_registry()
+    registry.warm_up()
+    try:
+        seed_erp_if_empty(registry.database_tool)
+        # The LLM client is built on the first run that needs a crew and then reused
+        daemon = OrchestratorDaemon.from_settings(
+            partial(run_pipeline, registry, llm_factory=get_shared_llm, incremental=incremental)
+        )
+        daemon.serve_forever()
+    finally:
+        registry.teardown()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Autonomous Business Logic Orchestrator")
+    parser.add_argument("--focus-sku", help="Only analyze and act on this SKU")
+    parser.add_argument("--shards", type=int, help="Split the catalog into N SKU-range shards")
+    parser.add_argument("--workers", type=int, help="Shards to run concurrently")
+    parser.add_argument(
+        "--daemon", action="store_true", help="Stay resident and run on the configured schedule"
+    )
+    parser.add_argument(
+        "--incremental",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="Only analyze products changed since the last incremental run",
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    run()
+    args = parse_args()
+    if args.daemon:
+        serve(incremental=args.incremental)
+        sys.exit(0)
+    run(
+        focus_sku=args.focus_sku,
+        shards=args.shards,
+        workers=args.workers,
+        incremental=args.incremental,
+    )
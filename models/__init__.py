@@ -4,6 +4,7 @@ from models.schemas import (
     ActionType,
     AnalystReport,
     StrategistDecision,
+    StrategistDecisions,
     ExecutionResult,
     ProductSummary,
     LowStockItem,
@@ -14,6 +15,7 @@ __all__ = [
     "ActionType",
     "AnalystReport",
     "StrategistDecision",
+    "StrategistDecisions",
     "ExecutionResult",
     "ProductSummary",
     "LowStockItem",
@@ -59,6 +59,12 @@ class StrategistDecision(BaseModel):
     justification: str = Field(default="", description="Brief justification")
 
 
+class StrategistDecisions(BaseModel):
+    """Decisions for a set of findings (one strategist chunk, or the merged plan)."""
+
+    decisions: list[StrategistDecision] = Field(default_factory=list)
+
+
 class ExecutionResult(BaseModel):
     """Result of execution phase (emails sent, prices updated)."""
 
@@ -67,4 +73,8 @@ class ExecutionResult(BaseModel):
         default_factory=list,
         description="List of {sku, old_price, new_price}",
     )
+    stock_adjusted: list[dict] = Field(
+        default_factory=list,
+        description="List of {sku, quantity, new_stock} for applied reorders",
+    )
     errors: list[str] = Field(default_factory=list)
@@ -0,0 +1,29 @@
+"""Run orchestration beyond a single sequential crew (sharding, strategist fan-out, resident daemon)."""
+
+from orchestration.daemon import CronSchedule, IntervalSchedule, OrchestratorDaemon
+from orchestration.runner import run_pipeline
+from orchestration.sharding import (
+    Shard,
+    merge_results,
+    plan_shards,
+    run_shard,
+    run_sharded,
+    shard_failures,
+)
+from orchestration.strategist_fanout import chunk_report, merge_decisions, run_fanout
+
+__all__ = [
+    "CronSchedule",
+    "IntervalSchedule",
+    "OrchestratorDaemon",
+    "Shard",
+    "chunk_report",
+    "merge_decisions",
+    "merge_results",
+    "plan_shards",
+    "run_fanout",
+    "run_pipeline",
+    "run_shard",
+    "run_sharded",
+    "shard_failures",
+]
@@ -0,0 +1,347 @@
+"""
+Resident orchestrator: keeps the LLM client, tools and DB pools warm and runs crews on a
+schedule, with a local HTTP control endpoint for status and ad-hoc runs.
+"""
+
+import json
+import logging
+import random
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional, Protocol
+
+from config import get_settings
+from telemetry import get_tracer, to_otlp_json, to_prometheus
+
+logger = logging.getLogger(__name__)
+
+RUN_PARAMS = ("focus_sku", "shards", "workers", "incremental")
+
+
+class Schedule(Protocol):
+    def next_delay(self, now: float) -> float:
+        """Seconds from ``now`` until the next scheduled run."""
+
+
+@dataclass
+class IntervalSchedule:
+    """Every ``interval`` seconds plus a uniform random jitter in [0, jitter)."""
+
+    interval: float
+    jitter: float = 0.0
+
+    def next_delay(self, now: float) -> float:
+        return self.interval + (random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+
+def _cron_field(spec: str, lo: int, hi: int) -> frozenset[int]:
+    values: set[int] = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+        if part == "*":
+            start, end = lo, hi
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if start < lo or end > hi or step < 1:
+            raise ValueError(f"Cron field {spec!r} out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+@dataclass
+class CronSchedule:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week; ``*``,
+    ``a-b``, ``*/n`` and lists), evaluated in local time, plus optional jitter.
+    """
+
+    expression: str
+    jitter: float = 0.0
+    _fields: tuple[frozenset[int], ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        parts = self.expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {self.expression!r}")
+        bounds = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+        self._fields = tuple(_cron_field(p, lo, hi) for p, (lo, hi) in zip(parts, bounds))
+
+    def _matches(self, moment: datetime) -> bool:
+        minute, hour, dom, month, dow = self._fields
+        return (
+            moment.minute in minute
+            and moment.hour in hour
+            and moment.day in dom
+            and moment.month in month
+            and (moment.weekday() + 1) % 7 in dow  # cron: 0 = Sunday
+        )
+
+    def next_fire(self, now: float) -> datetime:
+        moment = datetime.fromtimestamp(now).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(366 * 24 * 60):
+            if self._matches(moment):
+                return moment
+            moment += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def next_delay(self, now: float) -> float:
+        delay = self.next_fire(now).timestamp() - now
+        return delay + (random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+
+@dataclass
+class RunRecord:
+    """One scheduled or ad-hoc run."""
+
+    run_id: str
+    source: str
+    params: dict[str, Any]
+    started_at: float
+    finished_at: Optional[float] = None
+    status: str = "running"
+    error: Optional[str] = None
+
+
+class OrchestratorDaemon:
+    """
+    Calls ``run_fn(**params)`` on ``schedule`` and on demand. At most one run is active:
+    a scheduled tick that finds a run in progress is skipped and an ad-hoc request is
+    refused. stop() (also SIGTERM/SIGINT) lets the active run finish before returning.
+    """
+
+    def __init__(
+        self,
+        run_fn: Callable[..., Any],
+        schedule: Optional[Schedule],
+        *,
+        control_host: str = "127.0.0.1",
+        control_port: Optional[int] = None,
+        run_on_start: bool = False,
+        shutdown_timeout: float = 300.0,
+        history: int = 50,
+    ) -> None:
+        self.run_fn = run_fn
+        self.schedule = schedule
+        self.control_host = control_host
+        self.control_port = control_port
+        self.run_on_start = run_on_start
+        self.shutdown_timeout = shutdown_timeout
+        self.next_run_at: Optional[float] = None
+        self._stop = threading.Event()
+        self._run_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        self._current: Optional[RunRecord] = None
+        self._worker: Optional[threading.Thread] = None
+        self._history: deque[RunRecord] = deque(maxlen=history)
+        self._counts = {"completed": 0, "failed": 0, "skipped": 0}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._server_thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls, run_fn: Callable[..., Any]) -> "OrchestratorDaemon":
+        settings = get_settings()
+        schedule: Optional[Schedule] = None
+        if settings.daemon_cron:
+            schedule = CronSchedule(settings.daemon_cron, jitter=settings.daemon_jitter)
+        elif settings.daemon_interval > 0:
+            schedule = IntervalSchedule(settings.daemon_interval, jitter=settings.daemon_jitter)
+        return cls(
+            run_fn,
+            schedule,
+            control_host=settings.daemon_control_host,
+            control_port=settings.daemon_control_port,
+            run_on_start=settings.daemon_run_on_start,
+            shutdown_timeout=settings.daemon_shutdown_timeout,
+        )
+
+    # ----- runs -----
+
+    def trigger(self, source: str = "manual", **params: Any) -> Optional[str]:
+        """Start a run in the background; returns its id, or None if one is already active."""
+        unknown = set(params) - set(RUN_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown run parameters: {sorted(unknown)}")
+        if self._stop.is_set():
+            logger.info("Run request from %s ignored: daemon is stopping", source)
+            return None
+        if not self._run_lock.acquire(blocking=False):
+            with self._state_lock:
+                self._counts["skipped"] += 1
+            logger.info("Run request from %s skipped: a run is already in progress", source)
+            return None
+        record = RunRecord(uuid.uuid4().hex[:12], source, params, time.time())
+        with self._state_lock:
+            self._current = record
+        self._worker = threading.Thread(
+            target=self._execute, args=(record,), name=f"orchestrator-run-{record.run_id}"
+        )
+        self._worker.start()
+        return record.run_id
+
+    def _execute(self, record: RunRecord) -> None:
+        logger.info("Run %s started (%s) %s", record.run_id, record.source, record.params)
+        try:
+            self.run_fn(**record.params)
+            record.status = "ok"
+        except Exception as e:
+            logger.exception("Run %s failed: %s", record.run_id, e)
+            record.status = "error"
+            record.error = str(e)
+        finally:
+            record.finished_at = time.time()
+            with self._state_lock:
+                self._counts["completed" if record.status == "ok" else "failed"] += 1
+                self._history.append(record)
+                self._current = None
+            self._run_lock.release()
+            logger.info(
+                "Run %s finished: %s in %.1fs",
+                record.run_id,
+                record.status,
+                record.finished_at - record.started_at,
+            )
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no run is active; False on timeout."""
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+            return not worker.is_alive()
+        return True
+
+    def status(self) -> dict[str, Any]:
+        with self._state_lock:
+            current = asdict(self._current) if self._current else None
+            last = asdict(self._history[-1]) if self._history else None
+            return {
+                "state": "stopping" if self._stop.is_set() else ("running" if current else "idle"),
+                "current_run": current,
+                "last_run": last,
+                "next_run_at": self.next_run_at,
+                "runs": dict(self._counts),
+            }
+
+    def history(self) -> list[dict[str, Any]]:
+        with self._state_lock:
+            return [asdict(r) for r in self._history]
+
+    # ----- lifecycle -----
+
+    def start_control_server(self) -> Optional[int]:
+        """Serve the control API on a background thread; returns the bound port."""
+        if self.control_port is None:
+            return None
+        self._server = ThreadingHTTPServer((self.control_host, self.control_port), _handler_for(self))
+        self._server.daemon_threads = True
+        self.control_port = self._server.server_address[1]
+        self._server_thread = threading.Thread(
+            target=self._server.serve_forever, name="orchestrator-control", daemon=True
+        )
+        self._server_thread.start()
+        logger.info("Control API listening on http://%s:%s", self.control_host, self.control_port)
+        return self.control_port
+
+    def serve_forever(self, install_signal_handlers: bool = True) -> None:
+        """Run the scheduler loop until stop() or SIGTERM/SIGINT."""
+        if install_signal_handlers and threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda signum, frame: self.stop())
+        self.start_control_server()
+        if self.run_on_start:
+            self.trigger("startup")
+        try:
+            while not self._stop.is_set():
+                if self.schedule is None:
+                    self.next_run_at = None
+                    self._stop.wait()
+                    break
+                self.next_run_at = time.time() + self.schedule.next_delay(time.time())
+                if self._stop.wait(max(0.0, self.next_run_at - time.time())):
+                    break
+                self.trigger("schedule")
+        finally:
+            self._shutdown()
+
+    def stop(self) -> None:
+        """Request a graceful shutdown (safe to call from signal handlers and other threads)."""
+        self._stop.set()
+
+    def _shutdown(self) -> None:
+        logger.info("Daemon stopping; waiting for the active run to finish")
+        if not self.wait_idle(self.shutdown_timeout):
+            logger.warning("Active run did not finish within %ss", self.shutdown_timeout)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _handler_for(daemon: OrchestratorDaemon) -> type[BaseHTTPRequestHandler]:
+    """
+    GET /status, GET /runs, GET /metrics (Prometheus text), GET /traces (OTLP/JSON of
+    sampled spans), POST /runs (JSON body with optional focus_sku, shards, workers,
+    incremental) -> 202 or 409 if busy, POST /shutdown.
+    """
+
+    class ControlHandler(BaseHTTPRequestHandler):
+        def _reply(self, code: int, payload: Any) -> None:
+            self._send(code, json.dumps(payload, default=str), "application/json")
+
+        def _send(self, code: int, text: str, content_type: str) -> None:
+            body = text.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            if self.path == "/status":
+                self._reply(200, daemon.status())
+            elif self.path == "/runs":
+                self._reply(200, daemon.history())
+            elif self.path == "/metrics":
+                self._send(200, to_prometheus(get_tracer()), "text/plain; version=0.0.4")
+            elif self.path == "/traces":
+                self._reply(200, to_otlp_json(get_tracer()))
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                params = json.loads(self.rfile.read(length) or b"{}") if length else {}
+            except json.JSONDecodeError as e:
+                self._reply(400, {"error": f"invalid JSON: {e}"})
+                return
+            if self.path == "/runs":
+                try:
+                    run_id = daemon.trigger("http", **params)
+                except (TypeError, ValueError) as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+                if run_id is None:
+                    self._reply(409, {"error": "a run is already in progress"})
+                else:
+                    self._reply(202, {"run_id": run_id})
+            elif self.path == "/shutdown":
+                daemon.stop()
+                self._reply(202, {"status": "stopping"})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def log_message(self, format: str, *args: Any) -> None:
+            logger.debug("control %s - %s", self.address_string(), format % args)
+
+    return ControlHandler
@@ -0,0 +1,143 @@
+"""One orchestrator run (single crew, focused, incremental or sharded) on warm resources."""
+
+import logging
+from typing import Any, Callable, Optional
+
+from config import get_settings
+from llm.compaction import get_context_compactor
+from orchestration.sharding import Shard, plan_shards, run_sharded, shard_failures
+from telemetry import get_tracer
+from tools.registry import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def run_pipeline(
+    registry: ToolRegistry,
+    *,
+    llm_factory: Callable[[], Any],
+    llm: Any = None,
+    focus_sku: Optional[str] = None,
+    shards: Optional[int] = None,
+    workers: Optional[int] = None,
+    incremental: Optional[bool] = None,
+    verbose: bool = True,
+) -> Any:
+    """
+    Run analyze -> strategize -> execute once on an existing tool registry (nothing is
+    torn down). ``focus_sku`` limits the run to one product; with more than one shard
+    (SHARD_COUNT or ``shards``) the catalog is split into SKU ranges run as independent
+    crews; ``incremental`` (ANALYSIS_INCREMENTAL) analyzes only products changed since
+    the last successful incremental run. The LLM (``llm`` or ``llm_factory()``) and
+    CrewAI are only loaded once a crew is needed. Returns the crew (or merged sharded)
+    result, or None when there was nothing to do. The run is recorded as a "run" span
+    with the task, LLM and tool spans of its crew(s) nested under it, and the prompt
+    tokens context compaction saved in this process (``tokens_saved``).
+    """
+    with get_tracer().span("pipeline.run", "run", focus_sku=focus_sku or "") as span:
+        from analysis import ChangeSet, ChangeTracker, InventoryAnalyzer
+
+        compactor = get_context_compactor()
+        saved_before = compactor.tokens_saved()
+
+        settings = get_settings()
+        if incremental is None:
+            incremental = settings.analysis_incremental
+        span.set(incremental=bool(incremental))
+        if not incremental:
+            # Only incremental runs consume the change log; keep it bounded in every mode
+            ChangeTracker(registry.database_tool, registry.competitor_tool).prune(
+                settings.analysis_change_log_max_rows
+            )
+        tracker: Optional[ChangeTracker] = None
+        changes: Optional[ChangeSet] = None
+        shard_count = shards if shards is not None else settings.shard_count
+        if focus_sku is None and shard_count > 1:
+            if incremental and settings.analysis_fast_path:
+                tracker = ChangeTracker(registry.database_tool, registry.competitor_tool)
+                changes = tracker.pending()
+                if changes.empty:
+                    logger.info("No product or competitor price changes since the last run")
+                    tracker.commit(changes)
+                    return None
+            elif incremental:
+                logger.warning("Incremental mode needs ANALYSIS_FAST_PATH=true; running full shards")
+            plan = plan_shards(registry.database_tool, shard_count, settings.shard_strategy)
+            logger.info("Running %d shards (%s executor)", len(plan), settings.shard_executor)
+            span.set(shards=len(plan))
+            result = run_sharded(
+                plan,
+                llm_factory,
+                workers=workers or settings.shard_workers,
+                executor=settings.shard_executor,
+                registry=registry,
+                skus=None if changes is None or changes.full else changes.skus,
+            )
+            logger.info("Sharded run finished. Result: %s", result.model_dump_json())
+            span.set(tokens_saved=compactor.tokens_saved() - saved_before)
+            if tracker is not None and changes is not None:
+                if shard_failures(result):
+                    logger.warning("Not advancing the change watermark: some shards failed")
+                else:
+                    tracker.commit(changes)
+            return result
+
+        shard = Shard.for_sku(focus_sku) if focus_sku else None
+        scope = shard.describe() if shard else None
+        analyst_report = None
+        if settings.analysis_fast_path:
+            analyzer = InventoryAnalyzer(registry.database_tool, registry.competitor_tool)
+            if incremental and shard is None:
+                tracker = ChangeTracker(registry.database_tool, registry.competitor_tool)
+                changes = tracker.pending()
+                if changes.empty:
+                    logger.info("No product or competitor price changes since the last run")
+                    tracker.commit(changes)
+                    return None
+                analyst_report = analyzer.analyze(skus=None if changes.full else changes.skus)
+                if not changes.full:
+                    scope = (
+                        f"the {len(changes.skus)} products whose stock, price or competitor "
+                        "prices changed since the last run"
+                    )
+                    report = analyst_report
+                    if not report.low_stock_items and not report.uncompetitive_prices:
+                        logger.info("Changed products need no action; skipping crew")
+                        tracker.commit(changes)
+                        return None
+            else:
+                analyst_report = analyzer.analyze(sku_range=shard.sku_range if shard else None)
+        elif incremental:
+            logger.warning("Incremental mode needs ANALYSIS_FAST_PATH=true; running a full crew")
+
+        if analyst_report is not None:
+            span.set(
+                low_stock_items=len(analyst_report.low_stock_items),
+                uncompetitive_prices=len(analyst_report.uncompetitive_prices),
+            )
+
+        from agents import create_crew
+
+        crew = create_crew(
+            llm if llm is not None else llm_factory(),
+            registry=registry,
+            analyst_report=analyst_report,
+            scope=scope,
+            verbose=verbose,
+        )
+
+        logger.info("Starting crew kickoff...")
+        inputs = {"focus_sku": focus_sku} if focus_sku else {}
+        try:
+            result = crew.kickoff(inputs=inputs)
+        finally:
+            registry.supplier_tool.flush()
+            registry.database_tool.flush_logs()
+        logger.info("Crew finished. Result: %s", result)
+        saved = compactor.tokens_saved() - saved_before
+        span.set(tokens_saved=saved)
+        if saved:
+            logger.info("Context compaction saved ~%d prompt tokens this run", saved)
+        if tracker is not None and changes is not None:
+            tracker.commit(changes)
+        return result
@@ -0,0 +1,226 @@
+"""Sharded crew execution: independent analyze -> strategize -> execute pipelines per SKU range."""
+
+import contextvars
+import json
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional
+
+from models.schemas import ExecutionResult
+
+if TYPE_CHECKING:
+    from tools.database_tool import DatabaseTool
+    from tools.registry import ToolRegistry
+
+logger = logging.getLogger(__name__)
+
+ShardStrategy = Literal["range", "prefix"]
+_SHARD_FAILED = "shard failed: "
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Half-open SKU range [sku_from, sku_to); a None bound is open-ended."""
+
+    name: str
+    sku_from: Optional[str] = None
+    sku_to: Optional[str] = None
+
+    @classmethod
+    def for_sku(cls, sku: str) -> "Shard":
+        """Shard containing exactly one SKU."""
+        return cls(name=sku, sku_from=sku, sku_to=sku + "\0")
+
+    @property
+    def sku_range(self) -> tuple[Optional[str], Optional[str]]:
+        return self.sku_from, self.sku_to
+
+    def contains(self, sku: str) -> bool:
+        return (self.sku_from is None or sku >= self.sku_from) and (
+            self.sku_to is None or sku < self.sku_to
+        )
+
+    def describe(self) -> str:
+        if self.sku_from is not None and self.sku_to == self.sku_from + "\0":
+            return f"the product with SKU {self.sku_from!r}"
+        bounds = []
+        if self.sku_from is not None:
+            bounds.append(f"SKU >= {self.sku_from!r}")
+        if self.sku_to is not None:
+            bounds.append(f"SKU < {self.sku_to!r}")
+        return "products with " + " and ".join(bounds) if bounds else "all products"
+
+
+def _sku_prefix(sku: str) -> str:
+    return sku.split("_", 1)[0]
+
+
+def plan_shards(
+    db_tool: "DatabaseTool", count: int, strategy: ShardStrategy = "range"
+) -> list[Shard]:
+    """
+    Partition the catalog into at most ``count`` contiguous SKU ranges. "range" balances
+    product counts; "prefix" keeps SKU families (text before the first '_', our stand-in
+    for a category) together. Ranges always cover the whole key space.
+    """
+    with db_tool.pool.connection() as conn:
+        skus = [row[0] for row in conn.execute("SELECT sku FROM products ORDER BY sku")]
+    if count <= 1 or len(skus) <= 1:
+        return [Shard(name="all")]
+    if strategy == "prefix":
+        groups = sorted({_sku_prefix(s) for s in skus})
+        per_shard = -(-len(groups) // count)
+        starts = [groups[i] for i in range(0, len(groups), per_shard)]
+    else:
+        per_shard = -(-len(skus) // count)
+        starts = [skus[i] for i in range(0, len(skus), per_shard)]
+    starts = list(dict.fromkeys(starts))
+    shards = []
+    for i, start in enumerate(starts):
+        lo = None if i == 0 else start
+        hi = starts[i + 1] if i + 1 < len(starts) else None
+        shards.append(Shard(name=f"shard-{i + 1}", sku_from=lo, sku_to=hi))
+    return shards
+
+
+def _to_execution_result(output: Any) -> ExecutionResult:
+    structured = getattr(output, "pydantic", None)
+    if isinstance(structured, ExecutionResult):
+        return structured
+    raw = getattr(output, "raw", None) or str(output)
+    try:
+        return ExecutionResult.model_validate_json(raw)
+    except ValueError:
+        return ExecutionResult(errors=[f"Unstructured execution output: {raw[:200]}"])
+
+
+def run_shard(
+    shard: Shard,
+    llm_factory: Callable[[], Any],
+    verbose: bool = False,
+    *,
+    registry: Optional["ToolRegistry"] = None,
+    skus: Optional[list[str]] = None,
+) -> ExecutionResult:
+    """
+    Run one analyze -> strategize -> execute pipeline restricted to ``shard`` on
+    ``registry`` (the process-wide one if None, e.g. in a worker process). ``skus``, the
+    changed SKUs of an incremental run, limits it further to those products. Buffered
+    supplier emails and log rows are flushed even if the crew fails.
+    """
+    from agents import create_crew
+    from analysis import InventoryAnalyzer
+    from config import get_settings
+    from tools.registry import get_tool_registry
+
+    registry = registry or get_tool_registry()
+    try:
+        report = None
+        scope = shard.describe()
+        if get_settings().analysis_fast_path:
+            if skus is not None:
+                skus = [sku for sku in skus if shard.contains(sku)]
+                scope = f"the {len(skus)} changed SKUs among {scope}"
+            analyzer = InventoryAnalyzer(registry.database_tool, registry.competitor_tool)
+            report = analyzer.analyze(sku_range=shard.sku_range, skus=skus) if skus != [] else None
+            if report is None or (not report.low_stock_items and not report.uncompetitive_prices):
+                logger.info("Shard %s: no findings, skipping crew", shard.name)
+                return ExecutionResult()
+        crew = create_crew(
+            llm_factory(),
+            registry=registry,
+            analyst_report=report,
+            scope=scope,
+            structured_output=True,
+            verbose=verbose,
+        )
+        logger.info("Shard %s: starting crew kickoff (%s)", shard.name, scope)
+        output = crew.kickoff(inputs={"shard": shard.name})
+        return _to_execution_result(output)
+    finally:
+        registry.supplier_tool.flush()
+        registry.database_tool.flush_logs()
+
+
+def merge_results(results: list[tuple[Shard, ExecutionResult]]) -> ExecutionResult:
+    """Concatenate per-shard results in shard order; errors are prefixed with the shard name."""
+    merged = ExecutionResult()
+    for shard, result in results:
+        merged.emails_sent.extend(result.emails_sent)
+        merged.prices_updated.extend(result.prices_updated)
+        merged.stock_adjusted.extend(result.stock_adjusted)
+        merged.errors.extend(f"[{shard.name}] {e}" for e in result.errors)
+    return merged
+
+
+def run_sharded(
+    shards: list[Shard],
+    llm_factory: Callable[[], Any],
+    *,
+    workers: int = 4,
+    executor: Literal["thread", "process"] = "thread",
+    verbose: bool = False,
+    registry: Optional["ToolRegistry"] = None,
+    skus: Optional[list[str]] = None,
+) -> ExecutionResult:
+    """
+    Run shards concurrently and merge their ExecutionResults. Thread shards use
+    ``registry`` (the process-wide one if None). With ``executor="process"`` each
+    (spawned) worker process builds its own LLM, tools and DB pool, so ``llm_factory``
+    must be a picklable top-level function. ``skus`` restricts every shard to those
+    products (incremental runs). A shard that raises is reported in ``errors`` (see
+    shard_failures).
+    """
+    max_workers = max(1, min(workers, len(shards)))
+    pool: Executor
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+    else:
+        pool = ThreadPoolExecutor(max_workers, thread_name_prefix="shard")
+    results: list[tuple[Shard, ExecutionResult]] = []
+    with pool:
+        if executor == "process":
+            futures = [
+                pool.submit(run_shard, shard, llm_factory, verbose, skus=skus) for shard in shards
+            ]
+        else:
+            # Threads inherit the caller's trace context so shard spans nest under the run
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    run_shard,
+                    shard,
+                    llm_factory,
+                    verbose,
+                    registry=registry,
+                    skus=skus,
+                )
+                for shard in shards
+            ]
+        for shard, future in zip(shards, futures):
+            try:
+                results.append((shard, future.result()))
+            except Exception as e:
+                logger.exception("Shard %s failed: %s", shard.name, e)
+                results.append((shard, ExecutionResult(errors=[f"{_SHARD_FAILED}{e!s}"])))
+    merged = merge_results(results)
+    logger.info(
+        "Sharded run finished: %d shards, %s",
+        len(shards),
+        json.dumps(
+            {
+                "emails_sent": len(merged.emails_sent),
+                "prices_updated": len(merged.prices_updated),
+                "stock_adjusted": len(merged.stock_adjusted),
+                "errors": len(merged.errors),
+            }
+        ),
+    )
+    return merged
+
+
+def shard_failures(result: ExecutionResult) -> list[str]:
+    """Errors of shards that raised, so their products were not (fully) processed."""
+    return [e for e in result.errors if f"] {_SHARD_FAILED}" in e]
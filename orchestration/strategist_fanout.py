@@ -0,0 +1,141 @@
+"""Map-reduce strategist: split an AnalystReport into chunks, decide them concurrently, merge."""
+
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from config import get_settings
+from llm.compaction import parse_model
+from models.schemas import (
+    ActionType,
+    AnalystReport,
+    LowStockItem,
+    PriceFinding,
+    StrategistDecision,
+    StrategistDecisions,
+)
+
+logger = logging.getLogger(__name__)
+
+ChunkDecider = Callable[[int, AnalystReport], Optional[StrategistDecisions]]
+
+
+def finding_skus(report: AnalystReport) -> list[str]:
+    """SKUs with at least one finding, in report order (low stock first), without repeats."""
+    skus = [item.sku for item in report.low_stock_items]
+    skus += [finding.sku for finding in report.uncompetitive_prices]
+    return list(dict.fromkeys(skus))
+
+
+def chunk_report(
+    report: AnalystReport, chunk_size: int, max_chunks: int = 0
+) -> list[AnalystReport]:
+    """
+    Split ``report`` into reports of at most ``chunk_size`` findings, in SKU order. All
+    findings for one SKU (low stock and price) stay in the same chunk, so each SKU gets
+    exactly one decision. ``chunk_size`` <= 0 returns the report as a single chunk. With
+    ``max_chunks`` > 0 a report that would need more chunks gets larger ones instead, so
+    the LLM calls per run stay bounded as the catalog grows.
+    """
+    if chunk_size <= 0:
+        return [report]
+    groups: dict[str, tuple[list[LowStockItem], list[PriceFinding]]] = {}
+    for item in report.low_stock_items:
+        groups.setdefault(item.sku, ([], []))[0].append(item)
+    for finding in report.uncompetitive_prices:
+        groups.setdefault(finding.sku, ([], []))[1].append(finding)
+    total = len(report.low_stock_items) + len(report.uncompetitive_prices)
+    if max_chunks > 0 and total > chunk_size * max_chunks:
+        # A chunk closes before the group that would overflow it, so it holds at least
+        # chunk_size - largest + 1 findings; size chunks so max_chunks always suffice
+        largest = max(len(low_stock) + len(prices) for low_stock, prices in groups.values())
+        chunk_size = -(-total // max_chunks) + largest - 1
+    chunks: list[AnalystReport] = []
+    current = AnalystReport(summary=report.summary)
+    size = 0
+    for sku in sorted(groups):
+        low_stock, prices = groups[sku]
+        if size and size + len(low_stock) + len(prices) > chunk_size:
+            chunks.append(current)
+            current, size = AnalystReport(summary=report.summary), 0
+        current.low_stock_items.extend(low_stock)
+        current.uncompetitive_prices.extend(prices)
+        size += len(low_stock) + len(prices)
+    if size or not chunks:
+        chunks.append(current)
+    return chunks
+
+
+def parse_decisions(raw: str) -> Optional[StrategistDecisions]:
+    """StrategistDecisions from the first JSON object in ``raw`` (None if there is none)."""
+    return parse_model(raw, StrategistDecisions, "decisions")
+
+
+def merge_decisions(
+    chunks: list[AnalystReport],
+    results: list[Optional[StrategistDecisions]],
+    errors: Optional[list[Optional[str]]] = None,
+) -> StrategistDecisions:
+    """
+    One decision per finding SKU, in chunk order and SKU order within each chunk, whatever
+    order the chunks finished in. Only a chunk's own SKUs are taken from its result (first
+    decision wins, SKUs matched case-insensitively). A SKU without a decision, for example
+    because its chunk failed, gets no_action, so nothing is executed for it.
+    """
+    merged = StrategistDecisions()
+    for index, (chunk, result) in enumerate(zip(chunks, results)):
+        chosen: dict[str, StrategistDecision] = {}
+        for decision in result.decisions if result is not None else []:
+            chosen.setdefault(decision.finding_ref.strip().lower(), decision)
+        error = errors[index] if errors else None
+        for sku in finding_skus(chunk):
+            decision = chosen.get(sku.lower())
+            if decision is None:
+                reason = f"strategist chunk failed: {error}" if error else "no decision returned"
+                decision = StrategistDecision(
+                    finding_ref=sku, action=ActionType.NO_ACTION, justification=reason
+                )
+            elif decision.finding_ref != sku:
+                decision = decision.model_copy(update={"finding_ref": sku})
+            merged.decisions.append(decision)
+    return merged
+
+
+def run_fanout(
+    chunks: list[AnalystReport],
+    decide: ChunkDecider,
+    *,
+    max_workers: Optional[int] = None,
+) -> StrategistDecisions:
+    """
+    Call ``decide(index, chunk)`` for every chunk on a pool of at most LLM_MAX_CONCURRENCY
+    threads and merge the results (the LLM calls themselves take the process-wide slot in
+    TracedLLM). A chunk that raises or returns nothing is logged and its SKUs get no_action.
+    """
+    workers = max(1, min(len(chunks), max_workers or get_settings().llm_max_concurrency))
+
+    results: list[Optional[StrategistDecisions]] = []
+    errors: list[Optional[str]] = []
+    with ThreadPoolExecutor(workers, thread_name_prefix="strategist") as pool:
+        # Threads inherit the caller's trace context so chunk spans nest under the task
+        futures = [
+            pool.submit(contextvars.copy_context().run, decide, index, chunk)
+            for index, chunk in enumerate(chunks)
+        ]
+        for index, future in enumerate(futures):
+            try:
+                result = future.result()
+                error = None if result is not None else "no parseable decisions in its output"
+            except Exception as e:
+                result, error = None, str(e)
+            if error is not None:
+                logger.warning("Strategist chunk %d/%d failed: %s", index + 1, len(chunks), error)
+            results.append(result)
+            errors.append(error)
+    merged = merge_decisions(chunks, results, errors)
+    logger.info(
+        "Strategist fan-out: %d chunks, %d decisions, %d failed chunks",
+        len(chunks), len(merged.decisions), sum(e is not None for e in errors),
+    )
+    return merged
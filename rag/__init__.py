@@ -0,0 +1,22 @@
+"""Local retrieval (RAG) over inventory logs and business documents."""
+
+from rag.embeddings import Embedder, HashingEmbedder, OpenAIEmbedder, get_embedder
+from rag.ivf_index import IVFIndex
+from rag.knowledge_base import (
+    KnowledgeBase,
+    chunk_text,
+    get_knowledge_base,
+    reset_knowledge_base,
+)
+
+__all__ = [
+    "Embedder",
+    "HashingEmbedder",
+    "IVFIndex",
+    "KnowledgeBase",
+    "OpenAIEmbedder",
+    "chunk_text",
+    "get_embedder",
+    "get_knowledge_base",
+    "reset_knowledge_base",
+]
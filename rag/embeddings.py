@@ -0,0 +1,129 @@
+"""Text embedders: a local feature-hashing embedder and a batched OpenAI embeddings client."""
+
+import logging
+import re
+import zlib
+from typing import Optional, Protocol
+
+import numpy as np
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_MEMO_LIMIT = 1_000_000
+
+
+class Embedder(Protocol):
+    """Maps texts to L2-normalized float32 vectors of a fixed dimension."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: list[str]) -> np.ndarray: ...
+
+
+class HashingEmbedder:
+    """
+    Offline embedder: words (weight 1), character trigrams of alphabetic words (0.25)
+    and word bigrams (0.5) are hashed (CRC32) into ``dim`` signed buckets, then damped
+    with a signed square root. No model, no network; texts that share vocabulary (SKUs,
+    actions, policy terms) land close together, which is what log and policy lookups
+    need. Features are memoized per word since log vocabulary repeats, and a batch is
+    accumulated with a single bincount.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self._memo: dict[str, tuple[list[int], list[float]]] = {}
+
+    def _hashed(self, tokens: list[str], weight: float) -> tuple[list[int], list[float]]:
+        hashes = [zlib.crc32(t.encode()) for t in tokens]
+        return [h % self.dim for h in hashes], [weight if h & 0x80000000 else -weight for h in hashes]
+
+    def _features(self, key: str, word: str, pair: bool) -> tuple[list[int], list[float]]:
+        features = self._memo.get(key)
+        if features is None:
+            if pair:
+                features = self._hashed([key], 0.5)
+            else:
+                buckets, weights = self._hashed([word], 1.0)
+                if len(word) > 3 and not word.isdigit():
+                    padded = f"#{word}#"
+                    grams = self._hashed([padded[i : i + 3] for i in range(len(padded) - 2)], 0.25)
+                    buckets, weights = buckets + grams[0], weights + grams[1]
+                features = (buckets, weights)
+            if len(self._memo) >= _MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[key] = features
+        return features
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        rows: list[int] = []
+        slots: list[int] = []
+        weights: list[float] = []
+        for row, text in enumerate(texts):
+            words = _TOKEN.findall(text.lower())
+            start = len(slots)
+            for word in words:
+                buckets, signed = self._features(word, word, False)
+                slots.extend(buckets)
+                weights.extend(signed)
+            for a, b in zip(words, words[1:]):
+                buckets, signed = self._features(f"{a} {b}", "", True)
+                slots.extend(buckets)
+                weights.extend(signed)
+            rows.append(len(slots) - start)
+        row_of = np.repeat(np.arange(len(texts), dtype=np.int64), rows)
+        flat = np.bincount(
+            row_of * self.dim + np.asarray(slots, dtype=np.int64),
+            weights=np.asarray(weights, dtype=np.float64),
+            minlength=len(texts) * self.dim,
+        )
+        out = flat.reshape(len(texts), self.dim).astype(np.float32)
+        out = np.sign(out) * np.sqrt(np.abs(out))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings API, ``batch_size`` texts per request, truncated to ``dim``."""
+
+    def __init__(self, model: str, dim: int = 256, batch_size: int = 256) -> None:
+        from openai import OpenAI
+
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"openai-{model}-{dim}"
+        self._client = OpenAI()
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = [t or " " for t in texts[start : start + self.batch_size]]
+            response = self._client.embeddings.create(
+                model=self.model, input=batch, dimensions=self.dim
+            )
+            out[start : start + len(batch)] = [item.embedding for item in response.data]
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+
+def get_embedder(kind: Optional[str] = None, dim: Optional[int] = None) -> Embedder:
+    """
+    Embedder from RAG_EMBEDDER / RAG_EMBEDDING_DIM. "openai" needs the openai package and
+    an API key; otherwise (or on failure) the local hashing embedder is used.
+    """
+    settings = get_settings()
+    kind = kind or settings.rag_embedder
+    dim = dim or settings.rag_embedding_dim
+    if kind == "openai":
+        try:
+            return OpenAIEmbedder(settings.rag_embedding_model, dim)
+        except Exception as e:
+            logger.warning("OpenAI embeddings unavailable (%s); using hashing embedder", e)
+    return HashingEmbedder(dim)
+
@@ -0,0 +1,249 @@
+"""IVF-flat approximate nearest-neighbour index over NumPy, persisted as .npy files."""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rewritten only after a merge; the small files are written on every save
+_MAIN_FILES = ("ids", "vectors", "scales", "offsets", "centroids", "id_order")
+_DELTA_FILES = ("alive", "pending_ids", "pending_vectors")
+_TRAIN_SAMPLE = 65_536
+_KMEANS_ITERATIONS = 12
+_ASSIGN_CHUNK = 65_536
+
+
+def _nlist_for(n: int) -> int:
+    """About sqrt(n) lists, clamped to [1, 4096]."""
+    return int(min(max(np.sqrt(n), 1), 4096))
+
+
+def kmeans(vectors: np.ndarray, k: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means (cosine) on at most _TRAIN_SAMPLE rows; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > _TRAIN_SAMPLE:
+        vectors = vectors[rng.choice(len(vectors), _TRAIN_SAMPLE, replace=False)]
+    vectors = np.asarray(vectors, dtype=np.float32)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        labels = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        empty = np.bincount(labels, minlength=k) == 0
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]  # reseed empty lists
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = sums / np.where(norms == 0, 1.0, norms)
+    return centroids
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Per-row symmetric int8 quantization: (codes, scales) with vectors ~= codes * scales."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    peak = np.abs(vectors).max(axis=1) if len(vectors) else np.empty(0, dtype=np.float32)
+    scales = (np.where(peak == 0, 1.0, peak) / 127).astype(np.float32)
+    return np.rint(vectors / scales[:, None]).astype(np.int8), scales
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    if len(scores) <= k:
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file index for cosine similarity. Vectors (int8 codes with a per-row scale,
+    a quarter of float32) are stored grouped by
+    their nearest of ``nlist`` k-means centroids, so a query scores the centroids and then
+    only the ``nprobe`` closest lists. Upserts go to a pending buffer that is searched
+    exhaustively and merged into the lists once it reaches ``merge_threshold``; the
+    centroids are retrained when the index has grown 4x since they were trained.
+    Replacing an id tombstones its old row. Saved indexes are opened with mmap_mode="r",
+    so millions of vectors are paged in on demand rather than read up front.
+    """
+
+    def __init__(self, dim: int, *, nprobe: int = 16, merge_threshold: int = 20_000) -> None:
+        self.dim = dim
+        self.nprobe = nprobe
+        self.merge_threshold = merge_threshold
+        self.ids = np.empty(0, dtype=np.int64)
+        self.vectors = np.empty((0, dim), dtype=np.int8)
+        self.scales = np.empty(0, dtype=np.float32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.centroids = np.empty((0, dim), dtype=np.float32)
+        self.alive = np.empty(0, dtype=bool)
+        self.pending_ids = np.empty(0, dtype=np.int64)
+        self.pending_vectors = np.empty((0, dim), dtype=np.float32)
+        self.trained_size = 0
+        self.id_order = np.empty(0, dtype=np.int64)
+        self._main_dirty = True
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return int(self.alive.sum()) + len(self.pending_ids)
+
+    # ----- writes -----
+
+    def upsert(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Insert or replace vectors (unit-normalized float32) by int64 id."""
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        with self._lock:
+            self.delete(ids)
+            # The last occurrence of a repeated id in this batch wins
+            _, last = np.unique(ids[::-1], return_index=True)
+            last = len(ids) - 1 - last
+            self.pending_ids = np.concatenate([self.pending_ids, ids[last]])
+            self.pending_vectors = np.concatenate([self.pending_vectors, vectors[last]])
+            if len(self.pending_ids) >= self.merge_threshold:
+                self.merge()
+
+    def delete(self, ids: np.ndarray) -> None:
+        """Tombstone merged rows and drop pending rows with these ids."""
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            if len(self.ids):
+                sorted_ids = self.ids[self.id_order]
+                at = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+                hit = sorted_ids[at] == ids
+                if hit.any():
+                    self.alive[self.id_order[at[hit]]] = False
+            if len(self.pending_ids):
+                keep = ~np.isin(self.pending_ids, ids)
+                self.pending_ids = self.pending_ids[keep]
+                self.pending_vectors = self.pending_vectors[keep]
+
+    def merge(self) -> None:
+        """Fold pending vectors and drop tombstones; retrain centroids if the index outgrew them."""
+        with self._lock:
+            live = np.flatnonzero(self.alive)
+            n = len(live) + len(self.pending_ids)
+            if n == 0:
+                return
+            retrain = not len(self.centroids) or n >= 4 * max(self.trained_size, 1)
+            ids = np.concatenate([self.ids[live], self.pending_ids])
+            codes, scales = quantize(self.pending_vectors)
+            vectors = np.concatenate([self.vectors[live], codes])
+            scales = np.concatenate([self.scales[live], scales])
+            if retrain:
+                sample = np.random.default_rng(0).choice(n, min(n, _TRAIN_SAMPLE), replace=False)
+                self.centroids = kmeans(vectors[sample] * scales[sample, None], min(_nlist_for(n), n))
+                self.trained_size = n
+                assign_from = 0
+                labels = np.empty(n, dtype=np.int64)
+            else:
+                # Merged rows keep their list; only the pending rows are assigned
+                lists = np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets))
+                labels = np.concatenate([lists[live], np.empty(len(self.pending_ids), np.int64)])
+                assign_from = len(live)
+            for start in range(assign_from, n, _ASSIGN_CHUNK):
+                # A positive per-row scale does not change the argmax, so codes are used as-is
+                chunk = vectors[start : start + _ASSIGN_CHUNK].astype(np.float32)
+                labels[start : start + _ASSIGN_CHUNK] = np.argmax(chunk @ self.centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            self.ids = ids[order]
+            self.vectors = vectors[order]
+            self.scales = scales[order]
+            counts = np.bincount(labels, minlength=len(self.centroids))
+            self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+            self.alive = np.ones(n, dtype=bool)
+            self.id_order = np.argsort(self.ids, kind="stable")
+            self.pending_ids = np.empty(0, dtype=np.int64)
+            self.pending_vectors = np.empty((0, self.dim), dtype=np.float32)
+            self._main_dirty = True
+            logger.info(
+                "IVF index merged: %d vectors in %d lists%s",
+                n, len(self.centroids), " (retrained)" if retrain else "",
+            )
+
+    # ----- queries -----
+
+    def search(
+        self, query: np.ndarray, k: int = 5, nprobe: Optional[int] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(ids, cosine scores) of the ``k`` best matches for one unit query vector."""
+        query = np.asarray(query, dtype=np.float32).reshape(self.dim)
+        with self._lock:
+            ids, vectors, scales, offsets = self.ids, self.vectors, self.scales, self.offsets
+            alive, centroids = self.alive, self.centroids
+            pending_ids, pending_vectors = self.pending_ids, self.pending_vectors
+        found_ids: list[np.ndarray] = []
+        found_scores: list[np.ndarray] = []
+        if len(centroids):
+            probes = _top_k(centroids @ query, min(nprobe or self.nprobe, len(centroids)))
+            rows = np.concatenate(
+                [np.arange(offsets[p], offsets[p + 1]) for p in probes] or [np.empty(0, np.int64)]
+            )
+            rows = rows[alive[rows]]
+            if rows.size:
+                scores = (vectors[rows].astype(np.float32) @ query) * scales[rows]
+                best = _top_k(scores, k)
+                found_ids.append(ids[rows[best]])
+                found_scores.append(scores[best])
+        if len(pending_ids):
+            scores = pending_vectors @ query
+            best = _top_k(scores, k)
+            found_ids.append(pending_ids[best])
+            found_scores.append(scores[best])
+        if not found_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        all_ids, all_scores = np.concatenate(found_ids), np.concatenate(found_scores)
+        best = _top_k(all_scores, k)
+        return all_ids[best], all_scores[best]
+
+    def contains(self, ids: np.ndarray) -> np.ndarray:
+        ids = np.asarray(ids, dtype=np.int64)
+        with self._lock:
+            found = np.isin(ids, self.pending_ids)
+            if len(self.ids):
+                sorted_ids = self.ids[self.id_order]
+                at = np.clip(np.searchsorted(sorted_ids, ids), 0, len(sorted_ids) - 1)
+                found |= (sorted_ids[at] == ids) & self.alive[self.id_order[at]]
+            return found
+
+    # ----- persistence -----
+
+    def save(self, directory: Path | str, meta: Optional[dict] = None) -> None:
+        """
+        Write the index as .npy files plus index.json (each file replaced atomically). The
+        large merged arrays are rewritten only if a merge happened since the last save.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            names = _MAIN_FILES + _DELTA_FILES if self._main_dirty else _DELTA_FILES
+            for name in names:
+                tmp = directory / f"{name}.tmp.npy"
+                np.save(tmp, getattr(self, name))
+                os.replace(tmp, directory / f"{name}.npy")
+            info = {"dim": self.dim, "trained_size": self.trained_size, **(meta or {})}
+            tmp = directory / "index.json.tmp"
+            tmp.write_text(json.dumps(info))
+            os.replace(tmp, directory / "index.json")
+            self._main_dirty = False
+
+    @classmethod
+    def load(cls, directory: Path | str, **kwargs) -> Optional[tuple["IVFIndex", dict]]:
+        """Open a saved index (large arrays memory-mapped read-only); None if absent."""
+        directory = Path(directory)
+        info_path = directory / "index.json"
+        if not info_path.exists():
+            return None
+        info = json.loads(info_path.read_text())
+        index = cls(info["dim"], **kwargs)
+        for name in _MAIN_FILES:
+            setattr(index, name, np.load(directory / f"{name}.npy", mmap_mode="r"))
+        for name in _DELTA_FILES:
+            setattr(index, name, np.load(directory / f"{name}.npy"))
+        index.centroids = np.array(index.centroids)
+        index.offsets = np.array(index.offsets)
+        index.trained_size = info["trained_size"]
+        index._main_dirty = False
+        return index, info
@@ -0,0 +1,300 @@
+"""Local knowledge base: inventory logs and policy documents in IVF indexes for retrieval."""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Mapping, Optional
+
+import numpy as np
+
+from config import get_settings
+from rag.embeddings import Embedder, get_embedder
+from rag.ivf_index import IVFIndex
+from tools.db_pool import ConnectionPool, get_pool
+
+if TYPE_CHECKING:
+    from tools.database_tool import DatabaseTool
+
+logger = logging.getLogger(__name__)
+
+LOGS = "logs"
+DOCS = "docs"
+SOURCES = (LOGS, DOCS)
+
+_CHUNKS_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS rag_chunks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ref TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        text TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_rag_chunks_ref ON rag_chunks(ref);
+    CREATE TABLE IF NOT EXISTS rag_documents (
+        ref TEXT PRIMARY KEY,
+        digest TEXT NOT NULL
+    );
+"""
+_LOG_ROWS_SQL = """
+    SELECT l.id, l.created_at, l.action, l.quantity, p.sku, p.name, l.note
+    FROM inventory_logs l LEFT JOIN products p ON p.id = l.product_id
+"""
+
+
+def _apply_chunks_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(_CHUNKS_SCHEMA_SQL)
+    conn.commit()
+
+
+def log_text(created_at: Any, action: str, quantity: int, sku: Any, name: Any, note: Any) -> str:
+    """The text embedded for one inventory_logs row."""
+    text = f"{created_at} {action} {quantity} units of {sku or 'unknown'} ({name or 'unknown'})"
+    return f"{text}: {note}" if note else text
+
+
+def chunk_text(text: str, max_chars: int = 800) -> list[str]:
+    """Split on blank lines, packing paragraphs into chunks of at most ~max_chars."""
+    chunks: list[str] = []
+    current = ""
+    for paragraph in (p.strip() for p in re.split(r"\n\s*\n", text)):
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        while len(paragraph) > max_chars:
+            cut = paragraph.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class KnowledgeBase:
+    """
+    Retrieval over two sources, each in its own IVFIndex under ``directory``: ``logs``
+    (ERP inventory_logs rows, keyed by log id, synced incrementally from a watermark)
+    and ``docs`` (policy documents split into chunks stored in ``chunks.db``). Indexes
+    built with a different embedder are discarded and rebuilt.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        *,
+        db_tool: Optional["DatabaseTool"] = None,
+        embedder: Optional[Embedder] = None,
+        nprobe: int = 16,
+        merge_threshold: int = 20_000,
+        embed_batch: int = 4096,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or get_embedder()
+        self.embed_batch = embed_batch
+        self._db_tool = db_tool
+        self._lock = threading.RLock()
+        self.logs_watermark = 0
+        self.indexes: dict[str, IVFIndex] = {}
+        for source in SOURCES:
+            loaded = IVFIndex.load(
+                self.directory / source, nprobe=nprobe, merge_threshold=merge_threshold
+            )
+            if loaded is not None and loaded[1].get("embedder") == self.embedder.name:
+                self.indexes[source] = loaded[0]
+                if source == LOGS:
+                    self.logs_watermark = loaded[1].get("watermark", 0)
+            else:
+                if loaded is not None:
+                    logger.warning("RAG %s index was built with another embedder; rebuilding", source)
+                self.indexes[source] = IVFIndex(
+                    self.embedder.dim, nprobe=nprobe, merge_threshold=merge_threshold
+                )
+        self._chunks_pool: Optional[ConnectionPool] = None
+
+    @classmethod
+    def from_settings(cls, db_tool: Optional["DatabaseTool"] = None) -> "KnowledgeBase":
+        settings = get_settings()
+        kb = cls(settings.rag_index_path, db_tool=db_tool, nprobe=settings.rag_nprobe)
+        if settings.rag_docs_path and Path(settings.rag_docs_path).is_dir():
+            kb.index_directory(settings.rag_docs_path)
+        return kb
+
+    @property
+    def _chunks(self) -> ConnectionPool:
+        """Pool for chunks.db (re-acquired if it was closed by a registry teardown)."""
+        if self._chunks_pool is None or self._chunks_pool.closed:
+            self._chunks_pool = get_pool(self.directory / "chunks.db")
+            self._chunks_pool.ensure_initialized("rag_chunks", _apply_chunks_schema)
+        return self._chunks_pool
+
+    @property
+    def db_tool(self) -> "DatabaseTool":
+        if self._db_tool is None:
+            from tools.registry import get_tool_registry
+
+            self._db_tool = get_tool_registry().database_tool
+        return self._db_tool
+
+    # ----- ingestion -----
+
+    def sync_inventory_logs(self, limit: Optional[int] = None) -> int:
+        """Embed inventory_logs rows added since the last sync; returns how many were added."""
+        added = 0
+        self.db_tool.flush_logs()
+        with self._lock, self.db_tool.pool.connection() as conn:
+            latest = conn.execute("SELECT MAX(id) FROM inventory_logs").fetchone()[0] or 0
+            if latest <= self.logs_watermark:
+                return 0
+            cursor = conn.execute(
+                f"{_LOG_ROWS_SQL} WHERE l.id > ? ORDER BY l.id", [self.logs_watermark]
+            )
+            while limit is None or added < limit:
+                rows = cursor.fetchmany(self.embed_batch)
+                if not rows:
+                    break
+                ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+                self.indexes[LOGS].upsert(ids, self.embedder.embed([log_text(*r[1:]) for r in rows]))
+                self.logs_watermark = int(ids[-1])
+                added += len(rows)
+        if added:
+            logger.info("RAG: indexed %d new inventory log entries", added)
+            self.save(LOGS)
+        return added
+
+    def add_documents(self, documents: Mapping[str, str], max_chars: int = 800) -> int:
+        """
+        Index (or re-index) documents by reference; unchanged documents are skipped.
+        Returns the number of chunks written.
+        """
+        index = self.indexes[DOCS]
+        written = 0
+        with self._lock, self._chunks.connection() as conn:
+            for ref, text in documents.items():
+                digest = hashlib.sha256(text.encode()).hexdigest()
+                row = conn.execute("SELECT digest FROM rag_documents WHERE ref = ?", [ref]).fetchone()
+                if row is not None and row[0] == digest:
+                    continue
+                conn.execute("INSERT OR REPLACE INTO rag_documents (ref, digest) VALUES (?, ?)", [ref, digest])
+                old = [r[0] for r in conn.execute("SELECT id FROM rag_chunks WHERE ref = ?", [ref])]
+                if old:
+                    index.delete(np.asarray(old, dtype=np.int64))
+                    conn.execute("DELETE FROM rag_chunks WHERE ref = ?", [ref])
+                chunks = chunk_text(text, max_chars)
+                ids = [
+                    conn.execute(
+                        "INSERT INTO rag_chunks (ref, position, text) VALUES (?, ?, ?)",
+                        [ref, position, chunk],
+                    ).lastrowid
+                    for position, chunk in enumerate(chunks)
+                ]
+                if ids:
+                    index.upsert(np.asarray(ids, dtype=np.int64), self.embedder.embed(chunks))
+                written += len(ids)
+            conn.commit()
+        if written:
+            self.save(DOCS)
+        return written
+
+    def index_directory(self, path: Path | str, patterns: Iterable[str] = ("*.md", "*.txt")) -> int:
+        """Index every matching file under ``path`` (reference = path relative to it)."""
+        root = Path(path)
+        documents = {
+            str(file.relative_to(root)): file.read_text(encoding="utf-8", errors="replace")
+            for pattern in patterns
+            for file in sorted(root.rglob(pattern))
+        }
+        return self.add_documents(documents) if documents else 0
+
+    def save(self, source: Optional[str] = None) -> None:
+        with self._lock:
+            for name in [source] if source else SOURCES:
+                meta = {"embedder": self.embedder.name}
+                if name == LOGS:
+                    meta["watermark"] = self.logs_watermark
+                self.indexes[name].save(self.directory / name, meta)
+
+    # ----- retrieval -----
+
+    def search(
+        self, query: str, top_k: int = 5, sources: Optional[Iterable[str]] = None
+    ) -> list[dict[str, Any]]:
+        """Best ``top_k`` matches across ``sources`` (default: all) with their text."""
+        vector = self.embedder.embed([query])[0]
+        hits: list[tuple[float, str, int]] = []
+        for source in sources or SOURCES:
+            ids, scores = self.indexes[source].search(vector, top_k)
+            hits.extend((float(s), source, int(i)) for i, s in zip(ids, scores))
+        hits.sort(key=lambda h: -h[0])
+        hits = hits[:top_k]
+        texts = {
+            LOGS: self._log_texts([i for _, s, i in hits if s == LOGS]),
+            DOCS: self._chunk_texts([i for _, s, i in hits if s == DOCS]),
+        }
+        results = []
+        for score, source, item_id in hits:
+            ref, text = texts[source].get(item_id, (f"{source}:{item_id}", ""))
+            results.append(
+                {"source": source, "id": item_id, "ref": ref, "score": round(score, 4), "text": text}
+            )
+        return results
+
+    def _log_texts(self, ids: list[int]) -> dict[int, tuple[str, str]]:
+        if not ids:
+            return {}
+        with self.db_tool.pool.connection() as conn:
+            rows = conn.execute(
+                f"{_LOG_ROWS_SQL} WHERE l.id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {r[0]: (f"inventory_logs:{r[0]}", log_text(*r[1:])) for r in rows}
+
+    def _chunk_texts(self, ids: list[int]) -> dict[int, tuple[str, str]]:
+        if not ids:
+            return {}
+        with self._chunks.connection() as conn:
+            rows = conn.execute(
+                f"SELECT id, ref, text FROM rag_chunks WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        return {r[0]: (r[1], r[2]) for r in rows}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "embedder": self.embedder.name,
+            "logs": len(self.indexes[LOGS]),
+            "docs": len(self.indexes[DOCS]),
+            "logs_watermark": self.logs_watermark,
+        }
+
+    def close(self) -> None:
+        self.save()
+
+
+_knowledge_base: KnowledgeBase | None = None
+_knowledge_base_lock = threading.Lock()
+
+
+def get_knowledge_base() -> KnowledgeBase:
+    """Return the process-wide knowledge base (configured from RAG_* settings)."""
+    global _knowledge_base
+    if _knowledge_base is None:
+        with _knowledge_base_lock:
+            if _knowledge_base is None:
+                _knowledge_base = KnowledgeBase.from_settings()
+    return _knowledge_base
+
+
+def reset_knowledge_base() -> None:
+    """Save and discard the process-wide knowledge base."""
+    global _knowledge_base
+    with _knowledge_base_lock:
+        kb, _knowledge_base = _knowledge_base, None
+    if kb is not None:
+        kb.close()
@@ -0,0 +1,17 @@
+"""Tracing and metrics for crew runs (spans, latency histograms, OTLP / Prometheus export)."""
+
+from telemetry.export import to_otlp_json, to_prometheus, write_otlp_json
+from telemetry.histogram import Histogram
+from telemetry.tracer import Span, Tracer, get_tracer, is_error_result, reset_tracer
+
+__all__ = [
+    "Histogram",
+    "Span",
+    "Tracer",
+    "get_tracer",
+    "is_error_result",
+    "reset_tracer",
+    "to_otlp_json",
+    "to_prometheus",
+    "write_otlp_json",
+]
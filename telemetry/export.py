@@ -0,0 +1,128 @@
+"""Exporters: OTLP/JSON traces and Prometheus text exposition for the tracer's metrics."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from telemetry.tracer import Span, Tracer
+
+# OTLP SpanKind: INTERNAL for runs and tasks, CLIENT for calls leaving the process
+_OTLP_KIND = {"run": 1, "task": 1, "llm": 3, "tool": 3}
+_LATENCY_BOUNDS_S = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+_BYTES_BOUNDS = tuple(4**i * 64 for i in range(10))  # 64 B .. 16 MiB
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(span: Span) -> dict[str, Any]:
+    item: dict[str, Any] = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": _OTLP_KIND.get(span.kind, 1),
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in {"orchestrator.kind": span.kind, **span.attributes}.items()
+        ],
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent_id:
+        item["parentSpanId"] = span.parent_id
+    return item
+
+
+def to_otlp_json(tracer: Tracer) -> dict[str, Any]:
+    """Retained spans as an OTLP/JSON ExportTraceServiceRequest (POST to /v1/traces)."""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": tracer.service_name}}
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "orchestrator.telemetry"},
+                        "spans": [_otlp_span(s) for s in tracer.spans()],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def write_otlp_json(tracer: Tracer, path: Path | str) -> int:
+    """Write retained spans as OTLP/JSON to ``path``; returns the number of spans written."""
+    payload = to_otlp_json(tracer)
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(json.dumps(payload, separators=(",", ":")))
+    return len(payload["resourceSpans"][0]["scopeSpans"][0]["spans"])
+
+
+def _labels(**labels: str) -> str:
+    return "{" + ",".join(f'{k}="{json.dumps(v)[1:-1]}"' for k, v in labels.items()) + "}"
+
+
+def _histogram_lines(
+    metric: str, labels: dict[str, str], histogram: Any, bounds: tuple[float, ...], scale: float
+) -> list[str]:
+    lines = [
+        f"{metric}_bucket{_labels(**labels, le=f'{le / scale:g}')} {count}"
+        for le, count in histogram.cumulative([b * scale for b in bounds])
+    ]
+    lines.append(f"{metric}_bucket{_labels(**labels, le='+Inf')} {histogram.count}")
+    lines.append(f"{metric}_sum{_labels(**labels)} {histogram.total / scale:g}")
+    lines.append(f"{metric}_count{_labels(**labels)} {histogram.count}")
+    return lines
+
+
+def to_prometheus(tracer: Tracer, prefix: str = "orchestrator") -> str:
+    """Metrics in the Prometheus text exposition format (version 0.0.4)."""
+    metrics = sorted(tracer.metrics().items())
+    out: list[str] = []
+
+    def header(metric: str, kind: str, help_text: str) -> None:
+        out.extend([f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} {kind}"])
+
+    header("span_duration_seconds", "histogram", "Span latency by kind and name")
+    for (kind, name), m in metrics:
+        out.extend(_histogram_lines(
+            f"{prefix}_span_duration_seconds", {"kind": kind, "name": name},
+            m.latency_us, _LATENCY_BOUNDS_S, 1e6,
+        ))
+    for direction, help_text in (("in", "Request payload size"), ("out", "Response payload size")):
+        header(f"payload_{direction}_bytes", "histogram", help_text)
+        for (kind, name), m in metrics:
+            histogram = m.bytes_in if direction == "in" else m.bytes_out
+            if histogram.count:
+                out.extend(_histogram_lines(
+                    f"{prefix}_payload_{direction}_bytes", {"kind": kind, "name": name},
+                    histogram, _BYTES_BOUNDS, 1.0,
+                ))
+    for counter, help_text, attr in (
+        ("calls_total", "Completed spans", "calls"),
+        ("errors_total", "Spans that raised or returned an error result", "errors"),
+        ("prompt_tokens_total", "LLM prompt tokens", "prompt_tokens"),
+        ("completion_tokens_total", "LLM completion tokens", "completion_tokens"),
+        ("context_tokens_saved_total", "Prompt tokens removed by compaction", "tokens_saved"),
+    ):
+        header(counter, "counter", help_text)
+        for (kind, name), m in metrics:
+            if attr.endswith("tokens") and kind != "llm":
+                continue
+            if attr == "tokens_saved" and kind not in ("task", "tool"):
+                continue
+            out.append(f"{prefix}_{counter}{_labels(kind=kind, name=name)} {getattr(m, attr)}")
+    return "\n".join(out) + "\n"
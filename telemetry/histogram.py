@@ -0,0 +1,91 @@
+"""HDR-style log-linear histogram: constant relative error, sparse buckets, mergeable."""
+
+from typing import Iterable, Iterator
+
+# 2**7 sub-buckets per power of two: every recorded value is within ~1.6% of its bucket
+_SUB_BITS = 7
+_SUB_COUNT = 1 << _SUB_BITS
+_HALF = _SUB_COUNT // 2
+
+
+def bucket_index(value: int) -> int:
+    """Bucket for a non-negative integer: exact below 128, then 64 buckets per octave."""
+    if value < _SUB_COUNT:
+        return max(value, 0)
+    shift = value.bit_length() - _SUB_BITS
+    return _SUB_COUNT + (shift - 1) * _HALF + ((value >> shift) - _HALF)
+
+
+def bucket_bounds(index: int) -> tuple[int, int]:
+    """Half-open value range [low, high) covered by bucket ``index``."""
+    if index < _SUB_COUNT:
+        return index, index + 1
+    shift, offset = divmod(index - _SUB_COUNT, _HALF)
+    shift += 1
+    mantissa = offset + _HALF
+    return mantissa << shift, (mantissa + 1) << shift
+
+
+class Histogram:
+    """
+    Records non-negative integer values (e.g. microseconds or bytes) into log-linear
+    buckets, so p50/p99/p999 stay accurate to about two significant digits whatever the
+    range, in memory proportional to the number of distinct octaves seen. Not thread-safe;
+    the Tracer serializes access.
+    """
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def record(self, value: int) -> None:
+        value = max(int(value), 0)
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: "Histogram") -> None:
+        for index, n in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + n
+        if other.count:
+            self.min = other.min if self.count == 0 else min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, q: float) -> int:
+        """Highest value equivalent to the ``q``-th percentile (0-100), capped at max."""
+        if self.count == 0:
+            return 0
+        rank = max(1, int(round(q / 100.0 * self.count + 0.4999999)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_bounds(index)[1] - 1, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def cumulative(self, bounds: Iterable[float]) -> Iterator[tuple[float, int]]:
+        """(le, count of values <= le) for ascending ``bounds``, by whole buckets."""
+        ordered = sorted(self.counts.items())
+        seen = 0
+        position = 0
+        for le in bounds:
+            while position < len(ordered) and bucket_bounds(ordered[position][0])[1] - 1 <= le:
+                seen += ordered[position][1]
+                position += 1
+            yield le, seen
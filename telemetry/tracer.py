@@ -0,0 +1,224 @@
+"""Spans and per-operation metrics for tool calls, LLM calls, tasks and runs."""
+
+import contextvars
+import logging
+import random
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from config import get_settings
+from telemetry.histogram import Histogram
+
+logger = logging.getLogger(__name__)
+
+_ERROR_PREFIXES = ("Error", "Query error", "Execute error", '{"status": "error"', '{"status":"error"')
+
+
+def is_error_result(result: Any) -> bool:
+    """True for the error strings our tools return instead of raising."""
+    return isinstance(result, str) and result.startswith(_ERROR_PREFIXES)
+
+
+@dataclass
+class Span:
+    """One timed operation. ``sampled`` spans are kept for export; all feed the metrics."""
+
+    name: str
+    kind: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    sampled: bool = True
+    start_ns: int = 0
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def fail(self, message: str) -> None:
+        self.error = message
+
+    @property
+    def duration_us(self) -> int:
+        return max(self.end_ns - self.start_ns, 0) // 1000
+
+
+@dataclass
+class OperationMetrics:
+    """Aggregates for one (kind, name): latency and payload histograms plus counters."""
+
+    latency_us: Histogram = field(default_factory=Histogram)
+    bytes_in: Histogram = field(default_factory=Histogram)
+    bytes_out: Histogram = field(default_factory=Histogram)
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    tokens_saved: int = 0  # prompt tokens removed by context compaction
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "orchestrator_span", default=None
+)
+
+
+class Tracer:
+    """
+    Records spans and metrics. Every span updates the histograms and counters (a few
+    dict operations); whether a span is also kept for trace export is decided once per
+    trace at its root with probability ``sample_rate`` (children follow the root), and
+    at most ``max_spans`` recent spans are retained.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        sample_rate: float = 0.1,
+        max_spans: int = 10_000,
+        service_name: str = "inventory-orchestrator",
+    ) -> None:
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.service_name = service_name
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._metrics: dict[tuple[str, str], OperationMetrics] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @classmethod
+    def from_settings(cls) -> "Tracer":
+        settings = get_settings()
+        return cls(
+            enabled=settings.tracing_enabled,
+            sample_rate=settings.tracing_sample_rate,
+            max_spans=settings.tracing_max_spans,
+        )
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+        """
+        Time the enclosed block as a child of the current span (or a new trace). An
+        exception marks the span as failed and is re-raised.
+        """
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        else:
+            sampled = self.enabled and self._random.random() < self.sample_rate
+            trace_id = secrets.token_hex(16) if sampled else ""
+        span = Span(
+            name,
+            kind,
+            trace_id,
+            secrets.token_hex(8) if sampled else "",  # ids only matter for exported spans
+            parent.span_id if parent is not None else None,
+            sampled,
+            time.time_ns(),
+            attributes=attributes,
+        )
+        if not self.enabled:
+            yield span
+            return
+        token = _current_span.set(span)
+        started = time.perf_counter_ns()
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            span.end_ns = span.start_ns + (time.perf_counter_ns() - started)
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span) -> None:
+        attrs = span.attributes
+        with self._lock:
+            metrics = self._metrics.get((span.kind, span.name))
+            if metrics is None:
+                metrics = self._metrics[(span.kind, span.name)] = OperationMetrics()
+            metrics.calls += 1
+            metrics.latency_us.record(span.duration_us)
+            if span.error is not None:
+                metrics.errors += 1
+            if "bytes_in" in attrs:
+                metrics.bytes_in.record(attrs["bytes_in"])
+            if "bytes_out" in attrs:
+                metrics.bytes_out.record(attrs["bytes_out"])
+            metrics.prompt_tokens += attrs.get("prompt_tokens", 0)
+            metrics.completion_tokens += attrs.get("completion_tokens", 0)
+            metrics.tokens_saved += attrs.get("tokens_saved", 0)
+            if span.sampled:
+                self._spans.append(span)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def metrics(self) -> dict[tuple[str, str], OperationMetrics]:
+        """Snapshot of the per-operation metrics (histograms are copied)."""
+        with self._lock:
+            snapshot = {}
+            for key, m in self._metrics.items():
+                copy = OperationMetrics(
+                    calls=m.calls,
+                    errors=m.errors,
+                    prompt_tokens=m.prompt_tokens,
+                    completion_tokens=m.completion_tokens,
+                    tokens_saved=m.tokens_saved,
+                )
+                copy.latency_us.merge(m.latency_us)
+                copy.bytes_in.merge(m.bytes_in)
+                copy.bytes_out.merge(m.bytes_out)
+                snapshot[key] = copy
+            return snapshot
+
+    def summary(self) -> list[str]:
+        """One line per operation: calls, errors, p50/p95/p99 latency and compaction savings."""
+        lines = []
+        for (kind, name), m in sorted(self.metrics().items()):
+            h = m.latency_us
+            lines.append(
+                f"{kind}/{name}: {m.calls} calls, {m.errors} errors, "
+                f"p50 {h.percentile(50) / 1000:.1f} ms, p95 {h.percentile(95) / 1000:.1f} ms, "
+                f"p99 {h.percentile(99) / 1000:.1f} ms"
+                + (f", {m.tokens_saved} tokens saved" if m.tokens_saved else "")
+            )
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._metrics.clear()
+
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer (configured from TRACING_* settings)."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_settings()
+    return _tracer
+
+
+def reset_tracer() -> None:
+    """Discard the process-wide tracer; the next get_tracer() builds a fresh one."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = None
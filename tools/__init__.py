@@ -1,11 +1,35 @@
-"""Custom LangChain tools for ERP, supplier communication, and competitor data."""
+"""Custom LangChain tools for ERP, supplier communication, competitor data and retrieval."""
 
-from tools.database_tool import DatabaseTool
-from tools.supplier_communication_tool import SupplierCommunicationTool
-from tools.competitor_scraper_tool import CompetitorScraperTool
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from tools.competitor_scraper_tool import CompetitorScraperTool
+    from tools.database_tool import DatabaseTool
+    from tools.knowledge_base_tool import KnowledgeBaseTool
+    from tools.supplier_communication_tool import SupplierCommunicationTool
+
+# Tool classes are imported on first attribute access (PEP 562) so that importing a
+# lightweight submodule such as tools.registry does not pull in LangChain.
+_LAZY_EXPORTS = {
+    "DatabaseTool": "tools.database_tool",
+    "SupplierCommunicationTool": "tools.supplier_communication_tool",
+    "CompetitorScraperTool": "tools.competitor_scraper_tool",
+    "KnowledgeBaseTool": "tools.knowledge_base_tool",
+}
 
 __all__ = [
     "DatabaseTool",
     "SupplierCommunicationTool",
     "CompetitorScraperTool",
+    "KnowledgeBaseTool",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'tools' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
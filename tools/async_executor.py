@@ -0,0 +1,160 @@
+"""Bounded thread pools that run blocking tool work for async callers, with backpressure."""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when an async call waited ``queue_timeout`` seconds without getting a slot."""
+
+
+class _AsyncSlots:
+    """
+    Counting semaphore usable from any number of event loops (crews may each run their
+    own loop in a thread). Waiters are woken first come, first served.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._free = size
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def waiting(self) -> int:
+        with self._lock:
+            return len(self._waiters)
+
+    async def acquire(self, timeout: Optional[float]) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except BaseException:
+            with self._lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                    granted = False
+                except ValueError:
+                    granted = True  # release() already handed us the slot
+            if granted:
+                self._hand_back(waiter)
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._free += 1
+                return
+            loop, waiter = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._grant, waiter)
+        except RuntimeError:  # the waiter's loop is closed
+            self.release()
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():  # cancelled between release() and now
+            self.release()
+        else:
+            waiter.set_result(None)
+
+    def _hand_back(self, waiter: asyncio.Future) -> None:
+        """A granted slot whose caller gave up: pass it on once the grant has landed."""
+        if waiter.done():
+            self.release()
+        else:
+            waiter.add_done_callback(lambda _: self.release())
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking calls made from async code. At most ``max_workers`` calls
+    run at once and ``max_queue`` more wait in the pool; beyond that, callers await a
+    slot without blocking their event loop, and give up with ExecutorSaturated after
+    ``queue_timeout`` seconds. Calls run in a copy of the caller's context, so
+    tracing spans nest under the caller's span.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_workers: int,
+        *,
+        max_queue: int = 256,
+        queue_timeout: Optional[float] = 30.0,
+    ) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self._slots = _AsyncSlots(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counts = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0, "peak_in_flight": 0}
+
+    @classmethod
+    def from_settings(cls, name: str, max_workers: int) -> "BoundedExecutor":
+        settings = get_settings()
+        return cls(
+            name,
+            max_workers,
+            max_queue=settings.tool_async_queue_max,
+            queue_timeout=settings.tool_async_queue_timeout,
+        )
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        try:
+            await self._slots.acquire(self.queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._counts["rejected"] += 1
+            logger.warning("%s: async call rejected, executor saturated", self.name)
+            raise ExecutorSaturated(
+                f"{self.name}: no slot after {self.queue_timeout}s "
+                f"({self.max_workers} running, {self.max_queue} queued)"
+            ) from None
+        with self._lock:
+            self._in_flight += 1
+            self._counts["submitted"] += 1
+            self._counts["peak_in_flight"] = max(self._counts["peak_in_flight"], self._in_flight)
+        call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            self._done(None)
+            raise
+        # The slot is freed when the call finishes, even if the awaiting task is cancelled
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, future: Optional[Future]) -> None:
+        failed = future is None or future.cancelled() or future.exception() is not None
+        with self._lock:
+            self._in_flight -= 1
+            self._counts["failed" if failed else "completed"] += 1
+        self._slots.release()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts, in_flight=self._in_flight, waiting=self._slots.waiting)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
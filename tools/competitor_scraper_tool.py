@@ -3,10 +3,22 @@
 import json
 import logging
 import random
-from typing import Any, Optional
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
 
+import numpy as np
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
+
+from config import get_settings
+from tools.price_cache import PriceCache
+
+if TYPE_CHECKING:
+    # Imported on first use (aiohttp only when an HTTP backend is configured)
+    from tools.async_executor import BoundedExecutor
+    from tools.price_store import PriceStore
+    from tools.scraper_backend import AsyncScraperBackend, FetchResult
 
 logger = logging.getLogger(__name__)
 
@@ -32,32 +44,381 @@ class CompetitorScraperInput(BaseModel):
     )
 
 
+class CompetitorBatchInput(BaseModel):
+    """Input for batch competitor price lookup."""
+
+    product_identifiers: list[str] | str = Field(
+        description='List of SKUs, or "all" for every SKU in the ERP products table'
+    )
+    competitor_count: Optional[int] = Field(
+        default=3,
+        description="Max number of competitor prices per SKU (simulated)",
+    )
+
+
+def mock_competitor_prices(product_identifier: str, competitor_count: int = 3) -> list[float]:
+    """Simulated competitor prices for one product (also served by the local stub server)."""
+    key = product_identifier.strip().lower().replace(" ", "_")
+    if key not in _MOCK_COMPETITOR_PRICES:
+        # Generate deterministic-ish mock prices for unknown products
+        rng = random.Random(key)
+        return [round(rng.uniform(5.0, 150.0), 2) for _ in range(competitor_count)]
+    return _MOCK_COMPETITOR_PRICES[key][:competitor_count]
+
+
+def price_stats(matrix: np.ndarray) -> dict[str, np.ndarray]:
+    """Per-row min/max/mean/median/spread of a NaN-padded price matrix (rows without data stay NaN)."""
+    n = matrix.shape[0]
+    stats = {k: np.full(n, np.nan) for k in ("min", "max", "mean", "median", "spread")}
+    has_data = ~np.isnan(matrix).all(axis=1) if matrix.size else np.zeros(n, dtype=bool)
+    if has_data.any():
+        rows = matrix[has_data]
+        stats["min"][has_data] = np.nanmin(rows, axis=1)
+        stats["max"][has_data] = np.nanmax(rows, axis=1)
+        stats["mean"][has_data] = np.nanmean(rows, axis=1)
+        stats["median"][has_data] = np.nanmedian(rows, axis=1)
+        stats["spread"][has_data] = stats["max"][has_data] - stats["min"][has_data]
+    return stats
+
+
+def _cache_key(product_identifier: str, competitor_count: int) -> str:
+    return f"{competitor_count}:{product_identifier.strip().lower().replace(' ', '_')}"
+
+
+def _unkey(
+    identifiers: list[str], cached: dict[str, list[float]], competitor_count: int
+) -> dict[str, list[float]]:
+    prices: dict[str, list[float]] = {}
+    for identifier in identifiers:
+        value = cached.get(_cache_key(identifier, competitor_count))
+        if value is not None:
+            prices[identifier] = value
+    return prices
+
+
+def _pack_prices(
+    identifiers: list[str], prices: dict[str, list[float]], competitor_count: int
+) -> np.ndarray:
+    matrix = np.full((len(identifiers), competitor_count), np.nan)
+    for i, identifier in enumerate(identifiers):
+        row = prices.get(identifier, [])[:competitor_count]
+        matrix[i, : len(row)] = row
+    return matrix
+
+
+def _batch_payload(
+    skus: list[str],
+    prices: dict[str, list[float]],
+    competitor_count: int,
+    errors: Optional[dict[str, str]] = None,
+) -> dict[str, Any]:
+    stats = price_stats(_pack_prices(skus, prices, competitor_count))
+    columns = {
+        name: [None if np.isnan(v) else v for v in np.round(values, 2).tolist()]
+        for name, values in stats.items()
+    }
+    payload = {
+        "columns": ["sku", "min_price", "max_price", "mean_price", "median_price", "spread"],
+        "sku": skus,
+        "min_price": columns["min"],
+        "max_price": columns["max"],
+        "mean_price": columns["mean"],
+        "median_price": columns["median"],
+        "spread": columns["spread"],
+        "competitor_count": competitor_count,
+    }
+    if errors:
+        payload["errors"] = errors  # SKUs the API failed for (their columns are null)
+    return payload
+
+
 class CompetitorScraperTool(BaseTool):
     """
     Simulates web scraping of competitor price points. Returns mock prices
-    for a given product identifier. In production, replace with real scraping or API.
+    for a given product identifier. When COMPETITOR_API_URL is set (or a backend is
+    injected), prices are fetched concurrently over HTTP by AsyncScraperBackend. When
+    COMPETITOR_STORE_PATH is set (or a store is injected), SKUs found in the memory-mapped
+    PriceStore are served from it directly; only the rest go through the cache and fetch.
+    Async calls await the HTTP backend; the blocking parts (simulated prices, SQLite
+    cache tier, ERP SKU listing) run on a bounded pool of COMPETITOR_ASYNC_WORKERS threads.
     """
 
     name: str = "competitor_scraper"
     description: str = (
         "Get competitor prices for a product. Input: product_identifier (e.g. widget_a, "
         "gadget_x, or product name). Returns simulated competitor prices. "
-        "Use to compare our prices against the market."
+        "Use to compare our prices against the market. For many products at once pass "
+        "JSON {\"product_identifiers\": [\"sku1\", \"sku2\"]} or "
+        "{\"product_identifiers\": \"all\"}; the result is one columnar payload "
+        "with min/max/mean/median/spread per SKU."
     )
+    erp_db: Optional[Any] = None
+    backend: Optional[Any] = None
+    cache: Optional[Any] = None
+    store: Optional[Any] = None
+    _backend_resolved: bool = PrivateAttr(default=False)
+    _cache_resolved: bool = PrivateAttr(default=False)
+    _store_resolved: bool = PrivateAttr(default=False)
+    _executor: Optional["BoundedExecutor"] = PrivateAttr(default=None)
+    _executor_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _fetch_errors: dict[str, str] = PrivateAttr(default_factory=dict)
 
     def _run(self, raw_input: str, **kwargs: Any) -> str:
-        """Return simulated competitor prices. Parses product_identifier from raw_input."""
+        """Return simulated competitor prices. Parses product_identifier(s) from raw_input."""
+        batch = self._parse_batch_input(raw_input)
+        if batch is not None:
+            return self._scrape_batch(*batch)
         product_identifier, competitor_count = self._parse_input(raw_input)
         return self._scrape(product_identifier, competitor_count)
 
+    def _get_backend(self) -> Optional["AsyncScraperBackend"]:
+        if self.backend is None and not self._backend_resolved:
+            from tools.scraper_backend import AsyncScraperBackend, ScraperBackendConfig
+
+            config = ScraperBackendConfig.from_settings()
+            if config is not None:
+                self.backend = AsyncScraperBackend(config)
+        self._backend_resolved = True
+        return self.backend
+
+    def _get_cache(self) -> Optional[PriceCache]:
+        if self.cache is None and not self._cache_resolved:
+            self.cache = PriceCache.from_settings()
+        self._cache_resolved = True
+        return self.cache
+
+    def _get_store(self) -> Optional["PriceStore"]:
+        if self.store is None and not self._store_resolved:
+            from tools.price_store import PriceStore
+
+            self.store = PriceStore.from_settings()
+        self._store_resolved = True
+        return self.store
+
+    def _get_executor(self) -> "BoundedExecutor":
+        with self._executor_lock:
+            if self._executor is None:
+                from tools.async_executor import BoundedExecutor
+
+                self._executor = BoundedExecutor.from_settings(
+                    "competitor-lookup", get_settings().competitor_async_workers
+                )
+            return self._executor
+
+    def _load_prices(
+        self, identifiers: list[str], competitor_count: int
+    ) -> dict[str, list[float]]:
+        """Uncached fetch: network backend when configured, else simulated prices."""
+        backend = self._get_backend()
+        if backend is not None:
+            return self._record_fetch(backend.fetch_many_sync(identifiers, competitor_count))
+        return {i: mock_competitor_prices(i, competitor_count) for i in identifiers}
+
+    def _record_fetch(self, result: "FetchResult") -> dict[str, list[float]]:
+        """Remember which SKUs the API failed for (until they load), and return the prices."""
+        for identifier in result.prices:
+            self._fetch_errors.pop(identifier, None)
+        self._fetch_errors.update(result.errors)
+        return result.prices
+
+    def fetch_errors(
+        self, identifiers: Iterable[str], prices: dict[str, list[float]]
+    ) -> dict[str, str]:
+        """Last API error for each of ``identifiers`` that has no prices."""
+        return {
+            i: self._fetch_errors[i]
+            for i in identifiers
+            if i not in prices and i in self._fetch_errors
+        }
+
+    def fetch_price_map(
+        self, product_identifiers: Iterable[str], competitor_count: int = 3
+    ) -> dict[str, list[float]]:
+        """Prices per identifier: price store first, then the price cache when enabled."""
+        identifiers = list(product_identifiers)
+        store = self._get_store()
+        if store is not None:
+            prices = store.get_many(identifiers, competitor_count)
+            missing = [i for i in identifiers if i not in prices]
+            if missing:
+                prices.update(self._fetch_cached(missing, competitor_count))
+            return prices
+        return self._fetch_cached(identifiers, competitor_count)
+
+    def _fetch_cached(
+        self, identifiers: list[str], competitor_count: int
+    ) -> dict[str, list[float]]:
+        cache = self._get_cache()
+        if cache is None:
+            return self._load_prices(identifiers, competitor_count)
+        keys = {_cache_key(i, competitor_count): i for i in identifiers}
+        cached = cache.get_or_load_many(keys, self._cache_loader(keys, competitor_count))
+        return _unkey(identifiers, cached, competitor_count)
+
+    async def afetch_price_map(
+        self, product_identifiers: Iterable[str], competitor_count: int = 3
+    ) -> dict[str, list[float]]:
+        """Async fetch_price_map: awaits the network backend for cache misses."""
+        identifiers = list(product_identifiers)
+        backend = self._get_backend()
+        if backend is None:
+            return await self._get_executor().run(
+                self.fetch_price_map, identifiers, competitor_count
+            )
+        store = self._get_store()
+        if store is not None:
+            prices = store.get_many(identifiers, competitor_count)
+            missing = [i for i in identifiers if i not in prices]
+            if missing:
+                prices.update(await self._afetch_cached(missing, competitor_count, backend))
+            return prices
+        return await self._afetch_cached(identifiers, competitor_count, backend)
+
+    async def _afetch_cached(
+        self, identifiers: list[str], competitor_count: int, backend: "AsyncScraperBackend"
+    ) -> dict[str, list[float]]:
+        cache = self._get_cache()
+        if cache is None:
+            return self._record_fetch(await backend.fetch_many(identifiers, competitor_count))
+        keys = {_cache_key(i, competitor_count): i for i in identifiers}
+        values, stale, missing = cache.lookup(keys)
+        if missing:
+            loaded = self._record_fetch(
+                await backend.fetch_many([keys[k] for k in missing], competitor_count)
+            )
+            loaded_by_key = {_cache_key(i, competitor_count): v for i, v in loaded.items()}
+            cache.put_many(loaded_by_key)
+            values.update(loaded_by_key)
+        if stale:
+            cache.revalidate(stale, self._cache_loader(keys, competitor_count))
+        return _unkey(identifiers, values, competitor_count)
+
+    def _cache_loader(
+        self, keys: dict[str, str], competitor_count: int
+    ) -> Callable[[list[str]], dict[str, list[float]]]:
+        """Loader for PriceCache: cache keys -> prices, via the uncached fetch path."""
+
+        def _loader(missing: list[str]) -> dict[str, list[float]]:
+            loaded = self._load_prices([keys[k] for k in missing], competitor_count)
+            return {_cache_key(i, competitor_count): v for i, v in loaded.items()}
+
+        return _loader
+
+    def lookup_prices(self, product_identifier: str, competitor_count: int = 3) -> list[float]:
+        """Return raw competitor prices for one product (no JSON, no logging)."""
+        return self.fetch_price_map([product_identifier], competitor_count).get(
+            product_identifier, []
+        )
+
+    def cache_stats(self) -> dict[str, float]:
+        """Hit/miss/eviction counters of the price cache (empty if disabled)."""
+        cache = self._get_cache()
+        return cache.stats() if cache is not None else {}
+
+    def price_change_watermark(self) -> float:
+        """Current position for prices_changed_since() (0.0 without a cache or store)."""
+        cache = self._get_cache()
+        if cache is not None:
+            return cache.now()
+        return time.time() if self._get_store() is not None else 0.0
+
+    def prices_changed_since(self, since: float, competitor_count: int = 3) -> list[str]:
+        """
+        Normalized SKUs whose cached competitor prices changed after ``since``, plus SKUs
+        in price store segments written since then. Needs the SQLite cache tier or a
+        store; without either no competitor changes are reported.
+        """
+        changed: list[str] = []
+        cache = self._get_cache()
+        if cache is not None:
+            prefix = f"{competitor_count}:"
+            changed = [k[len(prefix) :] for k in cache.changed_since(since) if k.startswith(prefix)]
+        store = self._get_store()
+        if store is not None:
+            changed = sorted(set(changed).union(store.skus_changed_since(since)))
+        return changed
+
+    def close(self) -> None:
+        """
+        Finish async lookups, close the HTTP backend's session, stop background cache
+        revalidation and unmap the price store.
+        """
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.backend is not None:
+            self.backend.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.store is not None:
+            self.store.close()
+
+    def price_matrix(
+        self, product_identifiers: Iterable[str], competitor_count: int = 3
+    ) -> np.ndarray:
+        """Competitor prices packed one row per identifier; missing observations are NaN."""
+        identifiers = list(product_identifiers)
+        store = self._get_store()
+        if store is None:
+            return _pack_prices(
+                identifiers, self.fetch_price_map(identifiers, competitor_count), competitor_count
+            )
+        # Stored rows are copied straight from the mapped segments; only misses are fetched
+        matrix, found = store.matrix(identifiers, competitor_count)
+        missing = np.flatnonzero(~found)
+        if missing.size:
+            rest = [identifiers[i] for i in missing]
+            matrix[missing] = _pack_prices(
+                rest, self._fetch_cached(rest, competitor_count), competitor_count
+            )
+        return matrix
+
+    def _all_erp_skus(self) -> list[str]:
+        db = self.erp_db
+        if db is None:
+            from tools.registry import get_tool_registry
+
+            db = get_tool_registry().database_tool
+        with db.pool.connection() as conn:
+            return [row[0] for row in conn.execute("SELECT sku FROM products ORDER BY id")]
+
+    def _resolve_identifiers(self, product_identifiers: list[str] | str) -> list[str]:
+        if isinstance(product_identifiers, str):
+            if product_identifiers.strip().lower() != "all":
+                raise ValueError('product_identifiers must be a list or "all"')
+            return self._all_erp_skus()
+        return [str(p) for p in product_identifiers]
+
+    def batch_stats(
+        self, product_identifiers: list[str] | str, competitor_count: int = 3
+    ) -> dict[str, Any]:
+        """Columnar per-SKU price statistics for a list of identifiers or "all" ERP SKUs."""
+        skus = self._resolve_identifiers(product_identifiers)
+        prices = self.fetch_price_map(skus, competitor_count)
+        return _batch_payload(skus, prices, competitor_count, self.fetch_errors(skus, prices))
+
+    def _scrape_batch(
+        self, product_identifiers: list[str] | str, competitor_count: int = 3
+    ) -> str:
+        try:
+            result = self.batch_stats(product_identifiers, competitor_count)
+        except Exception as e:
+            logger.exception("CompetitorScraper batch lookup failed: %s", e)
+            return json.dumps({"status": "error", "message": str(e)})
+        logger.info("CompetitorScraper returned batch stats for %d SKUs", len(result["sku"]))
+        return json.dumps(result, separators=(",", ":"))
+
     def _scrape(self, product_identifier: str, competitor_count: int = 3) -> str:
-        key = product_identifier.strip().lower().replace(" ", "_")
-        if key not in _MOCK_COMPETITOR_PRICES:
-            # Generate deterministic-ish mock prices for unknown products
-            rng = random.Random(key)
-            prices = [round(rng.uniform(5.0, 150.0), 2) for _ in range(competitor_count)]
-        else:
-            prices = _MOCK_COMPETITOR_PRICES[key][:competitor_count]
+        prices = self.lookup_prices(product_identifier, competitor_count)
+        return self._format_single(product_identifier, prices)
+
+    def _format_single(self, product_identifier: str, prices: list[float]) -> str:
+        if not prices:
+            error = self.fetch_errors([product_identifier], {}).get(product_identifier)
+            message = f"No competitor prices for {product_identifier}"
+            return json.dumps(
+                {"status": "error", "message": f"{message}: {error}" if error else message}
+            )
         result = {
             "product_identifier": product_identifier,
             "competitor_prices": prices,
@@ -65,7 +426,7 @@ class CompetitorScraperTool(BaseTool):
             "max_price": max(prices),
             "note": "Simulated competitor data for demo.",
         }
-        logger.info("CompetitorScraper returned %s for %s", result, product_identifier)
+        logger.info("CompetitorScraper returned %d prices for %s", len(prices), product_identifier)
         return json.dumps(result)
 
     def _parse_input(self, raw: str) -> tuple[str, int]:
@@ -82,16 +443,48 @@ class CompetitorScraperTool(BaseTool):
                 pass
         return raw, 3
 
+    def _parse_batch_input(self, raw: str) -> Optional[tuple[list[str] | str, int]]:
+        """Return (identifiers, count) if raw is a batch request, else None."""
+        raw = raw.strip()
+        if not raw.startswith("{"):
+            return None
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        if "product_identifiers" not in data:
+            return None
+        return data["product_identifiers"], int(data.get("competitor_count", 3))
+
     def invoke(self, input: str | dict[str, Any], **kwargs: Any) -> str:
         """Handle string or dict input."""
         if isinstance(input, dict):
+            if "product_identifiers" in input:
+                return self._scrape_batch(
+                    input["product_identifiers"],
+                    int(input.get("competitor_count", 3)),
+                )
             return self._scrape(
                 input.get("product_identifier", ""),
                 int(input.get("competitor_count", 3)),
             )
-        product_id, count = self._parse_input(input)
-        return self._scrape(product_id, count)
+        return self._run(input)
 
-    async def _arun(self, *args: Any, **kwargs: Any) -> str:
-        """Async: delegate to sync."""
-        return self._run(*args, **kwargs)
+    async def _arun(self, raw_input: str, **kwargs: Any) -> str:
+        """Async: awaits the network backend when configured; otherwise runs on the lookup pool."""
+        try:
+            if self._get_backend() is None:
+                return await self._get_executor().run(self._run, raw_input, **kwargs)
+            batch = self._parse_batch_input(raw_input)
+            if batch is not None:
+                skus = await self._get_executor().run(self._resolve_identifiers, batch[0])
+                prices = await self.afetch_price_map(skus, batch[1])
+                result = _batch_payload(skus, prices, batch[1], self.fetch_errors(skus, prices))
+                logger.info("CompetitorScraper returned batch stats for %d SKUs", len(skus))
+                return json.dumps(result, separators=(",", ":"))
+            product_identifier, competitor_count = self._parse_input(raw_input)
+            prices = await self.afetch_price_map([product_identifier], competitor_count)
+            return self._format_single(product_identifier, prices.get(product_identifier, []))
+        except Exception as e:
+            logger.exception("CompetitorScraper async lookup failed: %s", e)
+            return json.dumps({"status": "error", "message": str(e)})
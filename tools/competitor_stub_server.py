@@ -0,0 +1,124 @@
+"""
+Local HTTP stub of the competitor price API, serving the simulated catalog offline.
+Run: python -m tools.competitor_stub_server [--port 8765]
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+from typing import Optional
+
+from aiohttp import web
+
+from tools.competitor_scraper_tool import mock_competitor_prices
+
+logger = logging.getLogger(__name__)
+
+
+class CompetitorStubServer:
+    """
+    Serves ``GET /prices/{sku}?count=N`` -> {"product_identifier", "competitor_prices"}.
+    ``fail_first`` makes the first N requests return 503 (for exercising retries).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, fail_first: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self.fail_first = fail_first
+        self.request_count = 0
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    async def _handle_prices(self, request: web.Request) -> web.Response:
+        self.request_count += 1
+        if self.request_count <= self.fail_first:
+            return web.json_response({"error": "unavailable"}, status=503)
+        sku = request.match_info["sku"]
+        count = int(request.query.get("count", 3))
+        return web.json_response(
+            {"product_identifier": sku, "competitor_prices": mock_competitor_prices(sku, count)}
+        )
+
+    async def start(self) -> str:
+        """Start serving on the current loop; returns the base URL."""
+        app = web.Application()
+        app.router.add_get("/prices/{sku}", self._handle_prices)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logger.info("Competitor stub server listening on %s", self.base_url)
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start_in_thread(self, timeout: float = 10.0) -> str:
+        """
+        Run the server on a background event loop thread; returns the base URL. An error
+        while starting (e.g. the port is taken) is re-raised here.
+        """
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        failed: list[BaseException] = []
+
+        def _serve() -> None:
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                failed.append(e)
+                self._loop.run_until_complete(self.stop())
+                return
+            finally:
+                ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_serve, name="competitor-stub", daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise TimeoutError(f"Competitor stub server did not start within {timeout}s")
+        if failed:
+            self._thread.join()
+            self._loop.close()
+            self._loop = self._thread = None
+            raise failed[0]
+        return self.base_url
+
+    def stop_thread(self) -> None:
+        """Stop a server started with start_in_thread()."""
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Competitor price API stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = CompetitorStubServer(args.host, args.port)
+
+    async def _forever() -> None:
+        await server.start()
+        await asyncio.Event().wait()
+
+    asyncio.run(_forever())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,83 @@
 """
 CrewAI-compatible tool wrappers. CrewAI expects tools that inherit from crewai.tools.BaseTool;
-our LangChain tools are wrapped here so agents can use them.
+our LangChain tools are wrapped here so agents can use them. Each wrapper delegates to an
+injected LangChain instance, or to the shared instance from the process-wide ToolRegistry.
+Every call is recorded as a "tool" span (latency, payload sizes, errors) on the process tracer.
+Async calls (arun) await the LangChain tool's _arun, which keeps blocking work off the event loop.
+Results pass through the context compactor (CONTEXT_TOOL_BUDGET) before they reach the agent.
 """
 
-from typing import Any
+from typing import Any, Optional
 
 from crewai.tools import BaseTool
 
-from tools.database_tool import DatabaseTool as LangChainDatabaseTool
-from tools.supplier_communication_tool import SupplierCommunicationTool as LangChainSupplierTool
-from tools.competitor_scraper_tool import CompetitorScraperTool as LangChainCompetitorTool
+from llm.compaction import get_context_compactor
+from telemetry import get_tracer, is_error_result
+from tools.registry import (
+    COMPETITOR_TOOL,
+    DATABASE_TOOL,
+    KNOWLEDGE_TOOL,
+    SUPPLIER_TOOL,
+    get_tool_registry,
+)
 
 
-class ERPDatabaseTool(BaseTool):
+class _RegistryBackedTool(BaseTool):
+    """Base for wrappers: resolves the LangChain tool once, never per call."""
+
+    langchain_tool: Optional[Any] = None
+    registry_key: str = ""
+
+    def _delegate(self) -> Any:
+        if self.langchain_tool is None:
+            self.langchain_tool = get_tool_registry().get(self.registry_key)
+        return self.langchain_tool
+
+    def _traced_run(self, raw_input: str, **kwargs: Any) -> str:
+        raw_input = get_context_compactor().tool_input(self.name, raw_input)
+        with get_tracer().span(f"tool.{self.name}", "tool", bytes_in=len(str(raw_input))) as span:
+            result = self._delegate()._run(raw_input, **kwargs)
+            return self._finish(span, result)
+
+    async def _traced_arun(self, raw_input: str, **kwargs: Any) -> str:
+        raw_input = get_context_compactor().tool_input(self.name, raw_input)
+        with get_tracer().span(f"tool.{self.name}", "tool", bytes_in=len(str(raw_input))) as span:
+            result = await self._delegate()._arun(raw_input, **kwargs)
+            return self._finish(span, result)
+
+    def _finish(self, span: Any, result: Any) -> Any:
+        """Record the result on the span and return it compacted for the agent."""
+        if is_error_result(result):
+            span.fail(result[:200])
+        compacted = get_context_compactor().compact_tool_result(self.name, result)
+        span.set(
+            bytes_out=len(result) if isinstance(result, str) else 0,
+            tokens_saved=compacted.tokens_saved,
+        )
+        return compacted.text
+
+    async def _arun(self, raw_input: str, **kwargs: Any) -> str:
+        return await self._traced_arun(raw_input, **kwargs)
+
+
+class ERPDatabaseTool(_RegistryBackedTool):
     """CrewAI wrapper for ERP (SQLite) read/write. Pass JSON: {\"query\": \"SELECT ...\"} or {\"statement\": \"UPDATE ...\"}."""
 
     name: str = "erp_database"
     description: str = (
         "Read or write to the ERP (SQLite) database. "
-        "Use JSON input: {\"query\": \"SELECT ...\"} for reads, {\"statement\": \"UPDATE/INSERT/DELETE ...\"} for writes."
+        "Use JSON input: {\"query\": \"SELECT ...\"} for reads, {\"statement\": \"UPDATE/INSERT/DELETE ...\"} for writes. "
+        "Reads return {\"columns\": [...], \"rows\": [[...]], \"next_page_token\": ...}; pass \"page_token\" to get the next page. "
+        "Apply many price changes / reorders in one call with "
+        "{\"bulk_updates\": [{\"product_id\": 1, \"sku\": \"...\", \"new_price\": 9.99, \"reorder_quantity\": 50}]}."
     )
+    registry_key: str = DATABASE_TOOL
 
     def _run(self, query_or_json: str, **kwargs: Any) -> str:
-        tool = LangChainDatabaseTool()
-        return tool._run(query_or_json, **kwargs)
+        return self._traced_run(query_or_json, **kwargs)
 
 
-class SupplierCommunicationCrewTool(BaseTool):
+class SupplierCommunicationCrewTool(_RegistryBackedTool):
     """CrewAI wrapper for sending supplier emails. Pass JSON: {\"to_email\": \"...\", \"subject\": \"...\", \"body\": \"...\"}."""
 
     name: str = "supplier_communication"
@@ -34,21 +85,37 @@ class SupplierCommunicationCrewTool(BaseTool):
         "Send an email to a supplier. Input: JSON with to_email, subject, and body. "
         "Use for reorder requests or alerts. Mock mode logs only unless SMTP is configured."
     )
+    registry_key: str = SUPPLIER_TOOL
 
     def _run(self, raw_input: str, **kwargs: Any) -> str:
-        tool = LangChainSupplierTool()
-        return tool._run(raw_input, **kwargs)
+        return self._traced_run(raw_input, **kwargs)
 
 
-class CompetitorScraperCrewTool(BaseTool):
+class CompetitorScraperCrewTool(_RegistryBackedTool):
     """CrewAI wrapper for competitor prices. Pass product identifier (e.g. widget_a) or JSON {\"product_identifier\": \"...\"}."""
 
     name: str = "competitor_scraper"
     description: str = (
         "Get competitor prices for a product. Input: product_identifier (e.g. widget_a, gadget_x) or JSON. "
-        "Returns simulated competitor prices for comparison."
+        "Returns simulated competitor prices for comparison. For many SKUs in one call use "
+        "{\"product_identifiers\": [\"sku1\", \"sku2\"]} or {\"product_identifiers\": \"all\"}."
+    )
+    registry_key: str = COMPETITOR_TOOL
+
+    def _run(self, raw_input: str, **kwargs: Any) -> str:
+        return self._traced_run(raw_input, **kwargs)
+
+
+class KnowledgeBaseCrewTool(_RegistryBackedTool):
+    """CrewAI wrapper for knowledge base search. Pass a question or JSON {\"query\": \"...\", \"top_k\": 5}."""
+
+    name: str = "knowledge_base"
+    description: str = (
+        "Search inventory history (past reorders, price changes) and business policy documents. "
+        "Input: a question, or JSON {\"query\": \"...\", \"top_k\": 5, \"source\": \"logs\" | \"docs\"}. "
+        "Returns the best-matching log entries and policy passages with similarity scores."
     )
+    registry_key: str = KNOWLEDGE_TOOL
 
     def _run(self, raw_input: str, **kwargs: Any) -> str:
-        tool = LangChainCompetitorTool()
-        return tool._run(raw_input, **kwargs)
+        return self._traced_run(raw_input, **kwargs)
@@ -1,18 +1,102 @@
 """SQLite-backed DatabaseTool simulating ERP read/write operations."""
 
+import base64
+import hashlib
 import json
 import logging
+import re
 import sqlite3
+import threading
+import time
+from contextlib import AbstractContextManager, contextmanager, nullcontext
 from pathlib import Path
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Iterator, Optional
 
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from config import get_settings
+from models.schemas import ExecutionResult, ProductSummary
+from tools.db_pool import ConnectionPool, get_pool
+
+if TYPE_CHECKING:
+    from tools.async_executor import BoundedExecutor
+    from tools.inventory_snapshot import InventorySnapshot
+    from tools.log_appender import InventoryLogAppender
+    from tools.query_cache import QueryResultCache
+    from tools.query_guard import QueryGuard
 
 logger = logging.getLogger(__name__)
 
+ERP_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sku TEXT UNIQUE NOT NULL,
+        name TEXT NOT NULL,
+        price REAL NOT NULL,
+        stock_quantity INTEGER NOT NULL DEFAULT 0,
+        min_stock_level INTEGER NOT NULL DEFAULT 10,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS inventory_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        action TEXT NOT NULL,
+        quantity INTEGER NOT NULL,
+        note TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (product_id) REFERENCES products(id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
+    CREATE INDEX IF NOT EXISTS idx_inventory_logs_product ON inventory_logs(product_id);
+    CREATE INDEX IF NOT EXISTS idx_products_updated_at ON products(updated_at);
+
+    -- Change log for incremental runs: one row per product insert or price/stock change
+    CREATE TABLE IF NOT EXISTS product_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        sku TEXT NOT NULL,
+        change TEXT NOT NULL,
+        changed_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS sync_state (
+        name TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TRIGGER IF NOT EXISTS trg_products_insert_change AFTER INSERT ON products
+    BEGIN
+        INSERT INTO product_changes (product_id, sku, change) VALUES (NEW.id, NEW.sku, 'insert');
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_products_update_change
+    AFTER UPDATE OF price, stock_quantity, min_stock_level ON products
+    WHEN OLD.price IS NOT NEW.price
+        OR OLD.stock_quantity IS NOT NEW.stock_quantity
+        OR OLD.min_stock_level IS NOT NEW.min_stock_level
+    BEGIN
+        INSERT INTO product_changes (product_id, sku, change) VALUES (NEW.id, NEW.sku, 'update');
+    END;
+    -- Keep updated_at current for direct UPDATEs (InventorySnapshot refreshes from it)
+    CREATE TRIGGER IF NOT EXISTS trg_products_touch_updated_at
+    AFTER UPDATE OF sku, price, stock_quantity, min_stock_level ON products
+    WHEN NEW.updated_at IS OLD.updated_at
+    BEGIN
+        UPDATE products SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+    END;
+    -- Count deletes and SKU renames, which leave a stale row in an InventorySnapshot
+    CREATE TRIGGER IF NOT EXISTS trg_products_delete_removal AFTER DELETE ON products
+    BEGIN
+        INSERT INTO sync_state (name, value) VALUES ('products.removals', 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1, updated_at = CURRENT_TIMESTAMP;
+    END;
+    CREATE TRIGGER IF NOT EXISTS trg_products_rename_removal AFTER UPDATE OF sku ON products
+    WHEN OLD.sku IS NOT NEW.sku
+    BEGIN
+        INSERT INTO sync_state (name, value) VALUES ('products.removals', 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1, updated_at = CURRENT_TIMESTAMP;
+    END;
+"""
+
 
 class DatabaseQueryInput(BaseModel):
     """Input schema for database query (read)."""
@@ -22,6 +106,22 @@ class DatabaseQueryInput(BaseModel):
         default=None,
         description="Optional list of parameters for parameterized query",
     )
+    max_rows: Optional[int] = Field(
+        default=None, description="Rows per page (capped by ERP_QUERY_MAX_ROWS)"
+    )
+    max_bytes: Optional[int] = Field(
+        default=None, description="Encoded row bytes per page (capped by ERP_QUERY_MAX_BYTES)"
+    )
+    page_token: Optional[str] = Field(
+        default=None, description="next_page_token from a previous page of the same query"
+    )
+    format: str = Field(
+        default="columnar",
+        description=(
+            "'columnar' ({columns, rows, next_page_token}) or "
+            "'records' ({records: [objects], next_page_token})"
+        ),
+    )
 
 
 class DatabaseExecuteInput(BaseModel):
@@ -47,9 +147,22 @@ class DatabaseTool(BaseTool):
         "Read or write to the ERP (SQLite) database. "
         "Use 'query' for SELECT (read) and 'execute' for INSERT/UPDATE/DELETE (write). "
         "Input must be JSON: for query use {\"query\": \"SELECT ...\", \"params\": []}; "
-        "for execute use {\"statement\": \"UPDATE ...\", \"params\": []}."
+        "for execute use {\"statement\": \"UPDATE ...\", \"params\": []}. "
+        "Query results are columnar ({\"columns\": [...], \"rows\": [[...]]}) and paged: "
+        "if next_page_token is set, repeat the same query with \"page_token\" to continue. "
+        "To apply many price changes / reorders in one transaction use "
+        "{\"bulk_updates\": [{\"product_id\": 1, \"sku\": \"...\", \"new_price\": 9.99, "
+        "\"reorder_quantity\": 50}]}."
     )
     db_path: Optional[Path] = None
+    _pool: ConnectionPool = PrivateAttr()
+    _snapshot: Optional["InventorySnapshot"] = PrivateAttr(default=None)
+    _log_appender: Optional["InventoryLogAppender"] = PrivateAttr(default=None)
+    _query_guard: Optional["QueryGuard"] = PrivateAttr(default=None)
+    _query_cache: Optional["QueryResultCache"] = PrivateAttr(default=None)
+    _readers: Optional["BoundedExecutor"] = PrivateAttr(default=None)
+    _writer: Optional["BoundedExecutor"] = PrivateAttr(default=None)
+    _async_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     def __init__(self, db_path: Optional[Path | str] = None, **kwargs: Any) -> None:
         super().__init__(**kwargs)
@@ -58,37 +171,118 @@ class DatabaseTool(BaseTool):
             self.db_path = settings.get_erp_path()
         else:
             self.db_path = Path(db_path)
+        self._pool = get_pool(self.db_path)
         self._ensure_schema()
 
+    @property
+    def pool(self) -> ConnectionPool:
+        """Shared connection pool for this tool's database (re-acquired if it was closed)."""
+        if self._pool.closed:
+            self._pool = get_pool(self.db_path)
+        return self._pool
+
+    def snapshot(self) -> "InventorySnapshot":
+        """
+        Columnar in-memory copy of ``products`` shared by everything using this tool
+        (loaded on first use; call refresh() on it to pick up changes).
+        """
+        if self._snapshot is None:
+            from tools.inventory_snapshot import InventorySnapshot
+
+            self._snapshot = InventorySnapshot(self)
+        return self._snapshot
+
+    @property
+    def log_appender(self) -> "InventoryLogAppender":
+        """
+        Write-behind buffer that single-row inventory_logs INSERTs are routed through
+        (ERP_LOG_* settings). Queries that read inventory_logs flush it first.
+        """
+        if self._log_appender is None:
+            from tools.log_appender import InventoryLogAppender
+
+            self._log_appender = InventoryLogAppender.from_settings(
+                lambda: self.pool, lambda: self._write_scope(tables=["inventory_logs"])
+            )
+        return self._log_appender
+
+    @property
+    def query_guard(self) -> "QueryGuard":
+        """Plan check, slow-query statistics and index advisor for queries run by the agents."""
+        if self._query_guard is None:
+            from tools.query_guard import QueryGuard
+
+            self._query_guard = QueryGuard.from_settings(lambda: self.pool)
+        return self._query_guard
+
+    @property
+    def query_cache(self) -> "QueryResultCache":
+        """Results of _run_query, invalidated by writes made through this tool (ERP_QUERY_CACHE*)."""
+        if self._query_cache is None:
+            from tools.query_cache import QueryResultCache
+
+            self._query_cache = QueryResultCache.from_settings(self.db_path)
+        return self._query_cache
+
+    def _write_scope(
+        self, statement: Optional[str] = None, tables: Optional[list[str]] = None
+    ) -> AbstractContextManager:
+        """
+        Context for a write, yielding ``commit(conn)`` to commit it with: cached reads of
+        the tables it touches are dropped after it.
+        """
+        if self._query_cache is None:
+            return nullcontext(sqlite3.Connection.commit)
+        return self._query_cache.writing(statement, tables)
+
+    def _async_executor(self, write: bool) -> "BoundedExecutor":
+        """Single writer thread, or the ERP_ASYNC_READERS reader threads, for _arun."""
+        executor = self._writer if write else self._readers
+        if executor is not None:
+            return executor
+        from tools.async_executor import BoundedExecutor
+
+        with self._async_lock:
+            if write and self._writer is None:
+                self._writer = BoundedExecutor.from_settings("erp-write", 1)
+            elif not write and self._readers is None:
+                self._readers = BoundedExecutor.from_settings(
+                    "erp-read", get_settings().erp_async_readers
+                )
+            return self._writer if write else self._readers
+
+    def async_stats(self) -> dict[str, dict[str, int]]:
+        """Counters of the async reader and writer pools (empty until _arun is used)."""
+        return {
+            role: executor.stats()
+            for role, executor in (("read", self._readers), ("write", self._writer))
+            if executor is not None
+        }
+
+    def flush_logs(self) -> None:
+        """Write buffered inventory_logs rows (no-op if nothing was buffered)."""
+        if self._log_appender is not None and self._log_appender.pending:
+            self._log_appender.flush()
+
+    def close(self) -> None:
+        """
+        Finish async calls, flush buffered inventory_logs rows, stop the appender thread
+        and drop cached results.
+        """
+        for executor in (self._readers, self._writer):
+            if executor is not None:
+                executor.shutdown()
+        self._readers = self._writer = None
+        if self._log_appender is not None:
+            self._log_appender.close()
+        if self._query_cache is not None:
+            self._query_cache.close()
+
     def _ensure_schema(self) -> None:
-        """Create ERP-like tables if they do not exist."""
+        """Create ERP-like tables if they do not exist (once per process and db_path)."""
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            conn.executescript("""
-                CREATE TABLE IF NOT EXISTS products (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    sku TEXT UNIQUE NOT NULL,
-                    name TEXT NOT NULL,
-                    price REAL NOT NULL,
-                    stock_quantity INTEGER NOT NULL DEFAULT 0,
-                    min_stock_level INTEGER NOT NULL DEFAULT 10,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                );
-                CREATE TABLE IF NOT EXISTS inventory_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    product_id INTEGER NOT NULL,
-                    action TEXT NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    note TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (product_id) REFERENCES products(id)
-                );
-                CREATE INDEX IF NOT EXISTS idx_products_sku ON products(sku);
-                CREATE INDEX IF NOT EXISTS idx_inventory_logs_product ON inventory_logs(product_id);
-            """)
-            conn.commit()
-            conn.close()
-            logger.info("ERP schema ensured at %s", self.db_path)
+            if self.pool.ensure_initialized("erp_schema", _apply_erp_schema):
+                logger.info("ERP schema ensured at %s", self.db_path)
         except Exception as e:
             logger.exception("Failed to ensure ERP schema: %s", e)
             raise
@@ -111,7 +305,14 @@ class DatabaseTool(BaseTool):
                     return self._run_query(
                         data["query"],
                         data.get("params"),
+                        max_rows=data.get("max_rows"),
+                        max_bytes=data.get("max_bytes"),
+                        page_token=data.get("page_token"),
+                        fmt=data.get("format", "columnar"),
                     )
+                if "bulk_updates" in data:
+                    updates = [ProductSummary.model_validate(u) for u in data["bulk_updates"]]
+                    return self.apply_product_updates(updates).model_dump_json()
                 if "statement" in data:
                     return self._run_execute(
                         data["statement"],
@@ -126,22 +327,246 @@ class DatabaseTool(BaseTool):
             logger.exception("DatabaseTool error: %s", e)
             return f"Error: {e!s}"
 
-    def _run_query(self, query: str, params: Optional[list[Any]] = None) -> str:
-        """Execute a SELECT query and return results as JSON string."""
+    @contextmanager
+    def stream_query(
+        self,
+        query: str,
+        params: Optional[list[Any]] = None,
+        *,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        timeout_ms: Optional[float] = None,
+    ) -> Iterator[tuple[list[str], Iterator[sqlite3.Row]]]:
+        """
+        Yield (column names, row iterator) for a SELECT. Rows are pulled from the cursor
+        with fetchmany, so memory stays bounded; the pooled connection is held until exit.
+        ``limit`` caps the rows SQLite produces (an ORDER BY becomes a top-N sort) and
+        ``timeout_ms`` interrupts the statement once it has run that long.
+        """
+        args = list(params or [])
+        if offset or limit:
+            args += [limit if limit is not None else -1, offset]
+        with self._stream(self._paged_sql(query, offset, limit), args, timeout_ms) as result:
+            yield result
+
+    @contextmanager
+    def _stream(
+        self, sql: str, args: list[Any], timeout_ms: Optional[float]
+    ) -> Iterator[tuple[list[str], Iterator[sqlite3.Row]]]:
+        if "inventory_logs" in sql.lower():
+            self.flush_logs()
+        batch_size = get_settings().erp_query_fetch_size
+        with self.pool.connection() as conn:
+            if timeout_ms:
+                deadline = time.monotonic() + timeout_ms / 1000
+                conn.set_progress_handler(lambda: time.monotonic() > deadline, 10_000)
+            try:
+                cursor = conn.execute(sql, args)
+                columns = [d[0] for d in cursor.description or []]
+
+                def _rows() -> Iterator[sqlite3.Row]:
+                    while True:
+                        batch = cursor.fetchmany(batch_size)
+                        if not batch:
+                            return
+                        yield from batch
+
+                yield columns, _rows()
+            finally:
+                if timeout_ms:
+                    conn.set_progress_handler(None, 0)
+
+    @staticmethod
+    def _paged_sql(query: str, offset: int = 0, limit: Optional[int] = None) -> str:
+        sql = query.strip().rstrip(";")
+        if offset or limit:
+            sql = f"SELECT * FROM ({sql}) LIMIT ? OFFSET ?"
+        return sql
+
+    def _keyset_sql(self, query: str, resume: bool) -> Optional[str]:
+        """
+        ``query`` rewritten to page by rowid, with the row's rowid as an extra last column
+        and ``rowid >/< ?`` (when ``resume``) and ``LIMIT ?`` parameters appended, if it is
+        a plain single-table SELECT that is unordered or ordered by rowid; None otherwise
+        (joins, aggregates, DISTINCT, subqueries, other orderings, views, WITHOUT ROWID
+        tables), which pages with LIMIT/OFFSET instead.
+        """
+        sql = query.strip().rstrip(";")
+        masked = _QUOTED_OR_SPACE.sub(
+            lambda m: "_" * len(m.group(1)) if m.group(1) else m.group(0), sql
+        )
+        match = _KEYSET_QUERY.fullmatch(masked)
+        if match is None or _NOT_KEYSET.search(masked, len("SELECT")):
+            return None
+        if match.group("where") and re.search(r"\bORDER\b", match.group("where"), re.IGNORECASE):
+            return None
+        columns, table, where = (
+            sql[match.start(g) : match.end(g)] if match.group(g) else None
+            for g in ("columns", "table", "where")
+        )
+        alias = match.group("alias")
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE",
+                [table],
+            ).fetchone()
+            if row is None or re.search(r"\bWITHOUT\s+ROWID\b", row[0] or "", re.IGNORECASE):
+                return None
+            pk = [c for c in conn.execute(f"PRAGMA table_info({table})") if c[5]]
+        keys = {"rowid", "_rowid_", "oid"}
+        if len(pk) == 1 and str(pk[0][2]).upper() == "INTEGER":
+            keys.add(pk[0][1].lower())  # INTEGER PRIMARY KEY aliases the rowid
+        ref = alias or table
+        if match.group("order"):
+            qualifier, _, column = match.group("order").rpartition(".")
+            if column.lower() not in keys or qualifier.lower() not in ("", ref.lower()):
+                return None
+        descending = (match.group("direction") or "").upper() == "DESC"
+        conditions = [f"({where})"] if where else []
+        if resume:
+            conditions.append(f"{ref}._rowid_ {'<' if descending else '>'} ?")
+        return (
+            f"SELECT {columns}, {ref}._rowid_ FROM {table}" + (f" AS {alias}" if alias else "")
+            + (" WHERE " + " AND ".join(conditions) if conditions else "")
+            + f" ORDER BY {ref}._rowid_ {'DESC' if descending else 'ASC'} LIMIT ?"
+        )
+
+    def _run_query(
+        self,
+        query: str,
+        params: Optional[list[Any]] = None,
+        *,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        page_token: Optional[str] = None,
+        fmt: str = "columnar",
+    ) -> str:
+        """
+        Execute a SELECT and return one page of results as JSON. Pages stop at
+        ERP_QUERY_MAX_ROWS rows (or ``max_rows``) or ERP_QUERY_MAX_BYTES (or ``max_bytes``)
+        of encoded rows (whole rows only; a single oversized row is still returned so
+        paging makes progress). Plain single-table reads resume after the last rowid
+        (see _keyset_sql), so a page costs the same however deep it is; other queries
+        resume with OFFSET, which re-reads the skipped rows.
+        """
         if not query.strip().upper().startswith("SELECT"):
             return "Error: Only SELECT queries are allowed in query mode. Use execute for writes."
+        if fmt not in ("columnar", "records"):
+            return "Error: format must be 'columnar' or 'records'."
+        settings = get_settings()
+        row_cap = settings.erp_query_max_rows
+        if max_rows is not None:
+            row_cap = max(1, min(int(max_rows), row_cap))
+        byte_cap = settings.erp_query_max_bytes
+        if max_bytes is not None:
+            byte_cap = max(1, min(int(max_bytes), byte_cap))
+        fingerprint = _query_fingerprint(query, params)
+        try:
+            offset, after = _decode_page_token(page_token, fingerprint) if page_token else (0, None)
+        except ValueError as e:
+            return f"Error: {e!s}"
+        cache = self.query_cache if settings.erp_query_cache else None
+        if cache is not None:
+            if "inventory_logs" in query.lower():
+                self.flush_logs()
+            cache_key = json.dumps(
+                [_normalize_sql(query), params or [], row_cap, byte_cap, offset, after, fmt],
+                default=str,
+            )
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            generation = cache.generation
+        try:
+            keyset = self._keyset_sql(query, resume=after is not None)
+        except sqlite3.Error as e:
+            return f"Query error: {e!s}"
+        if page_token and (after is not None) != (keyset is not None):
+            return "Error: page_token does not belong to this query and params"
+        args = list(params or [])
+        if keyset is not None:
+            sql = keyset
+            args += ([] if after is None else [after]) + [row_cap + 1]
+        else:
+            sql = self._paged_sql(query, offset, row_cap + 1)
+            args += [row_cap + 1, offset]
+        plan = None
+        guard = self.query_guard if settings.erp_query_guard else None
+        if guard is not None:
+            from tools.query_guard import QueryRejected
+
+            try:
+                # Estimate what actually runs: one page, so an ORDER BY is a top-N sort
+                plan = guard.check(
+                    query.strip().rstrip(";"), params, executed=(sql, args), limit=row_cap + 1
+                )
+            except QueryRejected as e:
+                logger.warning("ERP query rejected: %s", e)
+                return f"Error: query rejected: {e!s}"
+            except sqlite3.Error as e:
+                return f"Query error: {e!s}"
+        timeout_ms = settings.erp_query_timeout_ms
+        encoded: list[str] = []
+        size = 0
+        truncated = False
+        last_key = None
+        start = time.perf_counter()
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            cursor.execute(query, params or [])
-            rows = cursor.fetchall()
-            result = [dict(zip(row.keys(), row)) for row in rows]
-            conn.close()
-            return json.dumps(result, default=str)
+            with self._stream(sql, args, timeout_ms) as (columns, rows):
+                if keyset is not None:
+                    columns = columns[:-1]
+                for row in rows:
+                    if len(encoded) >= row_cap:
+                        truncated = True
+                        break
+                    values = list(row)
+                    key = values.pop() if keyset is not None else None
+                    item = json.dumps(
+                        dict(zip(columns, values)) if fmt == "records" else values,
+                        default=str,
+                        separators=(",", ":"),
+                    )
+                    if encoded and size + len(item) + 1 > byte_cap:
+                        truncated = True
+                        break
+                    encoded.append(item)
+                    size += len(item) + 1
+                    last_key = key
+        except sqlite3.OperationalError as e:
+            if str(e) != "interrupted":
+                logger.exception("Database query failed: %s", e)
+                return f"Query error: {e!s}"
+            logger.warning("ERP query cancelled after %s ms: %s", timeout_ms, query[:300])
+            return (
+                f"Query error: cancelled after {timeout_ms} ms (ERP_QUERY_TIMEOUT_MS); "
+                "narrow the query with an indexed filter or LIMIT"
+            )
         except sqlite3.Error as e:
             logger.exception("Database query failed: %s", e)
             return f"Query error: {e!s}"
+        finally:
+            if guard is not None:
+                guard.record(query, (time.perf_counter() - start) * 1000, plan)
+        body = "[" + ",".join(encoded) + "]"
+        next_token = None
+        if truncated:
+            next_token = _encode_page_token(
+                fingerprint, offset=offset + len(encoded), key=last_key if keyset else None
+            )
+        head = (
+            '{"records":'
+            if fmt == "records"
+            else '{"columns":' + json.dumps(columns, separators=(",", ":")) + ',"rows":'
+        )
+        result = (
+            head + body
+            + ',"row_count":' + str(len(encoded))
+            + ',"next_page_token":' + json.dumps(next_token)
+            + "}"
+        )
+        if cache is not None:
+            cache.put(cache_key, query, result, generation)
+        return result
 
     def _run_execute(
         self,
@@ -149,18 +574,242 @@ class DatabaseTool(BaseTool):
         params: Optional[list[Any]] = None,
     ) -> str:
         """Execute an INSERT/UPDATE/DELETE and return rowcount and message."""
+        log_row = _parse_log_insert(statement, params)
+        if log_row is not None and get_settings().erp_log_durability != "immediate":
+            try:
+                self.log_appender.append(**log_row)
+            except sqlite3.Error as e:
+                logger.exception("Database execute failed: %s", e)
+                return f"Execute error: {e!s}"
+            return json.dumps({"rowcount": 1, "status": "ok"})
+        if "inventory_logs" in statement.lower():
+            self.flush_logs()  # keep buffered rows ahead of other log writes
         try:
-            conn = sqlite3.connect(str(self.db_path))
-            cursor = conn.cursor()
-            cursor.execute(statement, params or [])
-            conn.commit()
-            count = cursor.rowcount
-            conn.close()
+            with self._write_scope(statement) as commit, self.pool.connection() as conn:
+                cursor = conn.execute(statement, params or [])
+                commit(conn)
+                count = cursor.rowcount
             return json.dumps({"rowcount": count, "status": "ok"})
         except sqlite3.Error as e:
             logger.exception("Database execute failed: %s", e)
             return f"Execute error: {e!s}"
 
+    def apply_product_updates(self, updates: list[ProductSummary]) -> ExecutionResult:
+        """
+        Apply price changes and reorder quantities (added to stock) for many products in
+        one transaction, writing matching inventory_logs rows. Products that do not exist
+        (or whose sku does not match product_id) and invalid values are reported in errors.
+        """
+        result = ExecutionResult()
+        if not updates:
+            return result
+        ids = list(dict.fromkeys(u.product_id for u in updates))
+        self.flush_logs()
+        try:
+            with (
+                self._write_scope(tables=["products", "inventory_logs"]) as commit,
+                self.pool.connection() as conn,
+            ):
+                conn.execute("BEGIN IMMEDIATE")
+                current: dict[int, sqlite3.Row] = {}
+                for start in range(0, len(ids), 500):
+                    chunk = ids[start : start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    for row in conn.execute(
+                        f"SELECT id, sku, price, stock_quantity FROM products WHERE id IN ({placeholders})",
+                        chunk,
+                    ):
+                        current[row["id"]] = row
+                price_rows: list[tuple[float, int]] = []
+                stock_rows: list[tuple[int, int]] = []
+                log_rows: list[tuple[int, str, int, str]] = []
+                stock: dict[int, int] = {}
+                for u in updates:
+                    row = current.get(u.product_id)
+                    if row is None or row["sku"] != u.sku:
+                        result.errors.append(f"{u.sku}: product_id {u.product_id} not found")
+                        continue
+                    if u.new_price is not None:
+                        if u.new_price <= 0:
+                            result.errors.append(f"{u.sku}: invalid new_price {u.new_price}")
+                        else:
+                            price_rows.append((u.new_price, u.product_id))
+                            log_rows.append(
+                                (u.product_id, "price_update", 0, f"{row['price']} -> {u.new_price}")
+                            )
+                            result.prices_updated.append(
+                                {"sku": u.sku, "old_price": row["price"], "new_price": u.new_price}
+                            )
+                    if u.reorder_quantity is not None:
+                        if u.reorder_quantity <= 0:
+                            result.errors.append(
+                                f"{u.sku}: invalid reorder_quantity {u.reorder_quantity}"
+                            )
+                        else:
+                            base = stock.get(u.product_id, row["stock_quantity"])
+                            new_stock = stock[u.product_id] = base + u.reorder_quantity
+                            stock_rows.append((u.reorder_quantity, u.product_id))
+                            log_rows.append((u.product_id, "reorder", u.reorder_quantity, "bulk reorder"))
+                            result.stock_adjusted.append(
+                                {"sku": u.sku, "quantity": u.reorder_quantity, "new_stock": new_stock}
+                            )
+                conn.executemany(
+                    "UPDATE products SET price = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    price_rows,
+                )
+                conn.executemany(
+                    "UPDATE products SET stock_quantity = stock_quantity + ?, "
+                    "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    stock_rows,
+                )
+                conn.executemany(
+                    "INSERT INTO inventory_logs (product_id, action, quantity, note) VALUES (?, ?, ?, ?)",
+                    log_rows,
+                )
+                commit(conn)
+        except sqlite3.Error as e:
+            logger.exception("Bulk product update failed: %s", e)
+            return ExecutionResult(errors=[f"Bulk update error: {e!s}"])
+        logger.info(
+            "Bulk update: %d prices, %d reorders, %d errors",
+            len(result.prices_updated),
+            len(result.stock_adjusted),
+            len(result.errors),
+        )
+        return result
+
     async def _arun(self, query_or_json: str, **kwargs: Any) -> str:
-        """Async not implemented; delegate to sync."""
-        return self._run(query_or_json, **kwargs)
+        """
+        Run the call on a worker thread so the event loop keeps serving other tool calls.
+        Writes go through one writer thread (SQLite admits one writer at a time, so they
+        queue here instead of spinning on busy_timeout); reads, and log inserts handed to
+        the appender, run on the reader threads.
+        """
+        from tools.async_executor import ExecutorSaturated
+
+        try:
+            executor = self._async_executor(_writes_erp(query_or_json))
+            return await executor.run(self._run, query_or_json, **kwargs)
+        except ExecutorSaturated as e:
+            return f"Error: {e!s}"
+
+
+def _apply_erp_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(ERP_SCHEMA_SQL)
+    conn.commit()
+
+
+_LOG_INSERT = re.compile(
+    r"\s*INSERT\s+INTO\s+inventory_logs\s*\(([\w\s,]+)\)\s*VALUES\s*\((.*)\)\s*;?\s*",
+    re.IGNORECASE | re.DOTALL,
+)
+_SQL_VALUE = re.compile(r"\s*(\?|NULL|-?\d+(?:\.\d+)?|'(?:[^']|'')*')\s*(?:,|$)", re.IGNORECASE)
+_QUOTED_OR_SPACE = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`)|\s+")
+# SELECT <columns> FROM <table> [[AS] alias] [WHERE ...] [ORDER BY <column> [ASC|DESC]]
+_KEYSET_QUERY = re.compile(
+    r"SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>\w+)"
+    r"(?:\s+(?:AS\s+)?(?P<alias>(?!(?:WHERE|ORDER)\b)\w+))?"
+    r"(?:\s+WHERE\s+(?P<where>.+?))?"
+    r"(?:\s+ORDER\s+BY\s+(?P<order>(?:\w+\.)?\w+)(?:\s+(?P<direction>ASC|DESC))?)?",
+    re.IGNORECASE | re.DOTALL,
+)
+# Anything that stops result rows mapping one-to-one onto table rows
+_NOT_KEYSET = re.compile(
+    r"\b(?:SELECT|JOIN|GROUP|HAVING|LIMIT|UNION|INTERSECT|EXCEPT|DISTINCT|WINDOW|OVER"
+    r"|COUNT|SUM|AVG|MIN|MAX|TOTAL|GROUP_CONCAT|JSON_GROUP_ARRAY|JSON_GROUP_OBJECT)\b",
+    re.IGNORECASE,
+)
+
+
+def _parse_log_insert(statement: str, params: Optional[list[Any]]) -> Optional[dict[str, Any]]:
+    """
+    Column -> value for a single-row ``INSERT INTO inventory_logs (...) VALUES (...)``
+    whose values are ? placeholders or plain literals; None for anything else.
+    """
+    from tools.log_appender import LOG_COLUMNS
+
+    match = _LOG_INSERT.fullmatch(statement)
+    if match is None:
+        return None
+    columns = [c.strip().lower() for c in match.group(1).split(",")]
+    if len(set(columns)) != len(columns) or not set(columns) <= set(LOG_COLUMNS):
+        return None
+    raw, values, pos = match.group(2), [], 0
+    args = iter(params or [])
+    while pos < len(raw):
+        token = _SQL_VALUE.match(raw, pos)
+        if token is None or token.end() == pos:
+            return None
+        literal = token.group(1)
+        if literal == "?":
+            value = next(args, _MISSING)
+            if value is _MISSING:
+                return None
+        elif literal.upper() == "NULL":
+            value = None
+        elif literal.startswith("'"):
+            value = literal[1:-1].replace("''", "'")
+        else:
+            value = float(literal) if "." in literal else int(literal)
+        values.append(value)
+        pos = token.end()
+    if len(values) != len(columns) or next(args, _MISSING) is not _MISSING:
+        return None
+    row = dict(zip(columns, values))
+    if not {"product_id", "action", "quantity"} <= row.keys():
+        return None  # let SQLite report the missing NOT NULL column
+    return row
+
+
+_MISSING = object()
+
+
+def _writes_erp(query_or_json: str) -> bool:
+    """True if _run would write to SQLite on the calling thread."""
+    stripped = query_or_json.strip()
+    if not stripped.startswith("{"):
+        return False
+    try:
+        data = json.loads(stripped)
+    except json.JSONDecodeError:
+        return False
+    if not isinstance(data, dict) or "query" in data:
+        return False
+    if "bulk_updates" in data:
+        return True
+    if "statement" in data:
+        if get_settings().erp_log_durability == "immediate":
+            return True
+        return _parse_log_insert(data["statement"], data.get("params")) is None
+    return False
+
+
+def _normalize_sql(query: str) -> str:
+    """``query`` with whitespace runs collapsed to one space, except inside quoted strings and names."""
+    return _QUOTED_OR_SPACE.sub(lambda m: m.group(1) or " ", query).strip()
+
+
+def _query_fingerprint(query: str, params: Optional[list[Any]]) -> str:
+    raw = json.dumps([_normalize_sql(query), params or []], default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _encode_page_token(fingerprint: str, *, offset: int = 0, key: Optional[int] = None) -> str:
+    """A keyset token carries the last rowid returned (``key``), an OFFSET token the offset."""
+    cursor = {"o": offset} if key is None else {"k": key}
+    raw = json.dumps({**cursor, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_page_token(token: str, fingerprint: str) -> tuple[int, Optional[int]]:
+    """(offset, last rowid or None) from a page token of the query ``fingerprint``."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        offset = int(data.get("o", 0))
+        key = int(data["k"]) if "k" in data else None
+    except Exception:
+        raise ValueError("invalid page_token") from None
+    if data.get("f") != fingerprint or offset < 0:
+        raise ValueError("page_token does not belong to this query and params")
+    return offset, key
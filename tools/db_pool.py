@@ -0,0 +1,179 @@
+"""Thread-safe, process-wide SQLite connection pool for the ERP database."""
+
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection and PRAGMA settings applied to every pooled connection."""
+
+    max_connections: int = 8
+    busy_timeout_ms: int = 5000
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -20000
+    statement_cache_size: int = 256
+    acquire_timeout: float = 30.0
+
+    @classmethod
+    def from_settings(cls) -> "PoolConfig":
+        """Build a config from the ERP_* settings."""
+        settings = get_settings()
+        return cls(
+            max_connections=settings.erp_pool_size,
+            busy_timeout_ms=settings.erp_busy_timeout_ms,
+            mmap_size=settings.erp_mmap_size,
+            cache_size=settings.erp_cache_size,
+            statement_cache_size=settings.erp_statement_cache_size,
+        )
+
+
+class ConnectionPool:
+    """
+    Bounded pool of long-lived SQLite connections for a single database file.
+    Connections are opened lazily in WAL mode, reused across tool calls and
+    threads (one borrower at a time), and keep their prepared-statement cache.
+    """
+
+    def __init__(self, db_path: Path | str, config: Optional[PoolConfig] = None) -> None:
+        self.db_path = Path(db_path)
+        self.config = config or PoolConfig()
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+        self._init_lock = threading.Lock()
+        self._initialized: set[str] = set()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _connect(self) -> sqlite3.Connection:
+        cfg = self.config
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=cfg.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=cfg.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(cfg.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size={int(cfg.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={int(cfg.cache_size)}")
+        logger.debug("Opened pooled SQLite connection to %s", self.db_path)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.config.max_connections:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.config.acquire_timeout)
+        except queue.Empty:
+            raise TimeoutError(
+                f"Timed out waiting for a connection to {self.db_path}"
+            ) from None
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection; any uncommitted transaction is rolled back on return."""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            finally:
+                self._release(conn)
+
+    def ensure_initialized(self, key: str, init: Callable[[sqlite3.Connection], None]) -> bool:
+        """
+        Run ``init`` once per pool (i.e. once per process and db_path) for ``key``.
+        Returns True if ``init`` ran on this call.
+        """
+        if key in self._initialized:
+            return False
+        with self._init_lock:
+            if key in self._initialized:
+                return False
+            with self.connection() as conn:
+                init(conn)
+            self._initialized.add(key)
+            return True
+
+    def close(self) -> None:
+        """Close idle connections; borrowed ones are closed when released."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path | str, config: Optional[PoolConfig] = None) -> ConnectionPool:
+    """Return the process-wide pool for ``db_path``, creating it on first use."""
+    key = str(Path(db_path).resolve())
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, config or PoolConfig.from_settings())
+            _pools[key] = pool
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every pool (call on shutdown or between tests)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
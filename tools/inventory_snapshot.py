@@ -0,0 +1,316 @@
+"""Columnar in-memory copy of the ERP products table for vectorized analysis."""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Iterable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from tools.database_tool import DatabaseTool
+
+logger = logging.getLogger(__name__)
+
+_FETCH_BATCH = 50_000
+# Changed rows are re-read from slightly before the previous refresh, so a write that
+# committed after it but carries an older (second-resolution) timestamp is still picked up.
+_REFRESH_OVERLAP_SECONDS = 5
+# Bumped by triggers on products for every delete or SKU rename
+_REMOVALS_SQL = "SELECT COALESCE((SELECT value FROM sync_state WHERE name = 'products.removals'), 0)"
+_EMPTY = -1
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_MIX_1 = np.uint64(0xFF51AFD7ED558CCD)
+_MIX_2 = np.uint64(0xC4CEB9FE1A85EC53)
+_SHIFT = np.uint64(33)
+
+
+def _hash_keys(keys: np.ndarray) -> np.ndarray:
+    """
+    FNV-1a over 8-byte words of fixed-width byte strings (vectorized across keys), then
+    the murmur3 finalizer so the low bits used for slots depend on every byte.
+    """
+    width = keys.dtype.itemsize
+    padded = keys.astype(f"S{width + (-width) % 8}") if width % 8 else keys
+    words = np.frombuffer(padded.tobytes(), dtype="<u8").reshape(len(keys), -1)
+    h = np.full(len(keys), _FNV_OFFSET, dtype=np.uint64)
+    for column in words.T:
+        h ^= column
+        h *= _FNV_PRIME
+    h ^= h >> _SHIFT
+    h *= _MIX_1
+    h ^= h >> _SHIFT
+    h *= _MIX_2
+    return h ^ (h >> _SHIFT)
+
+
+class InventorySnapshot:
+    """
+    The products table held as NumPy columns (id, price, stock_quantity, min_stock_level)
+    plus a fixed-width byte-string SKU table with an open-addressing hash index, for O(1)
+    SKU -> row lookups. About 50 bytes per product instead of a Python row tuple with
+    boxed values. Names are not kept; fetch them for the few rows that need them.
+
+    refresh() re-reads only rows whose ``updated_at`` is at or after the previous refresh
+    (a trigger keeps ``updated_at`` current for direct UPDATEs). Deleted or renamed
+    products cannot be seen that way; triggers count them in ``sync_state`` and a changed
+    count (or row count) triggers a full reload.
+    """
+
+    def __init__(self, db_tool: "DatabaseTool") -> None:
+        self.db_tool = db_tool
+        self.ids = np.empty(0, dtype=np.int64)
+        self.prices = np.empty(0, dtype=np.float64)
+        self.stock = np.empty(0, dtype=np.int32)
+        self.min_level = np.empty(0, dtype=np.int32)
+        self.skus = np.empty(0, dtype="S1")
+        self.watermark: Optional[str] = None
+        self.removals = 0
+        self.ordered = True  # rows are in ascending id order
+        self._index = np.full(8, _EMPTY, dtype=np.int32)
+        self._loaded = False
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.ids, self.prices, self.stock, self.min_level, self.skus, self._index)
+        return sum(a.nbytes for a in arrays)
+
+    # ----- loading -----
+
+    def load(self) -> int:
+        """(Re)build the snapshot from a full scan; returns the number of products."""
+        with self._lock, self.db_tool.pool.connection() as conn:
+            conn.execute("BEGIN")  # one read snapshot for the count, the clock and the scan
+            count, width, watermark = conn.execute(
+                "SELECT COUNT(*), MAX(LENGTH(CAST(sku AS BLOB))), datetime('now') FROM products"
+            ).fetchone()
+            removals = int(conn.execute(_REMOVALS_SQL).fetchone()[0])
+            ids = np.empty(count, dtype=np.int64)
+            prices = np.empty(count, dtype=np.float64)
+            stock = np.empty(count, dtype=np.int32)
+            min_level = np.empty(count, dtype=np.int32)
+            skus = np.empty(count, dtype=f"S{max(width or 1, 1)}")
+            cursor = conn.cursor()
+            cursor.row_factory = None  # plain tuples; the pool's Row factory is slower to build
+            cursor.execute(
+                "SELECT id, sku, price, stock_quantity, min_stock_level FROM products ORDER BY id"
+            )
+            n = 0
+            while n < count:
+                batch = cursor.fetchmany(_FETCH_BATCH)
+                if not batch:
+                    break
+                end = n + len(batch)
+                batch_ids, batch_skus, batch_prices, batch_stock, batch_min = zip(*batch)
+                ids[n:end] = batch_ids
+                skus[n:end] = [s.encode() for s in batch_skus]
+                prices[n:end] = batch_prices
+                stock[n:end] = batch_stock
+                min_level[n:end] = batch_min
+                n = end
+            self.ids, self.prices = ids[:n], prices[:n]
+            self.stock, self.min_level, self.skus = stock[:n], min_level[:n], skus[:n]
+            self.watermark = watermark
+            self.removals = removals
+            self.ordered = True
+            self._rebuild_index()
+            self._loaded = True
+        logger.info("Inventory snapshot loaded: %d products, %.1f MiB", n, self.nbytes / 2**20)
+        return n
+
+    def refresh(self) -> int:
+        """
+        Bring the snapshot up to date (full load on first use); returns the number of
+        rows re-read from the database.
+        """
+        with self._lock:
+            if not self._loaded:
+                return self.load()
+            with self.db_tool.pool.connection() as conn:
+                conn.execute("BEGIN")
+                watermark = conn.execute("SELECT datetime('now')").fetchone()[0]
+                rows = conn.execute(
+                    "SELECT id, sku, price, stock_quantity, min_stock_level "
+                    "FROM products WHERE updated_at >= datetime(?, ?) OR updated_at IS NULL "
+                    "ORDER BY id",
+                    [self.watermark or "0000-01-01", f"-{_REFRESH_OVERLAP_SECONDS} seconds"],
+                ).fetchall()
+                count = conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+                removals = int(conn.execute(_REMOVALS_SQL).fetchone()[0])
+            if removals != self.removals:
+                logger.info("Products were deleted or renamed; reloading snapshot")
+                return self.load()
+            if rows:
+                self._apply(rows)
+            self.watermark = watermark
+            if count != len(self):
+                logger.info("Product count changed (%d -> %d); reloading snapshot", len(self), count)
+                return self.load()
+            return len(rows)
+
+    def _apply(self, rows: list[tuple]) -> None:
+        ids, skus, prices, stock, min_level = zip(*rows)
+        positions = self.rows_for(skus)
+        known = positions >= 0
+        at = positions[known]
+        self.prices[at] = np.asarray(prices, dtype=np.float64)[known]
+        self.stock[at] = np.asarray(stock, dtype=np.int32)[known]
+        self.min_level[at] = np.asarray(min_level, dtype=np.int32)[known]
+        fresh = np.flatnonzero(~known)
+        if fresh.size:
+            new_ids = np.asarray(ids, dtype=np.int64)[fresh]
+            new_skus = np.array([skus[i].encode() for i in fresh])
+            if len(self) and new_ids.min() < self.ids[-1]:
+                self.ordered = False
+            start = len(self)
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.prices = np.concatenate([self.prices, np.asarray(prices, dtype=np.float64)[fresh]])
+            self.stock = np.concatenate([self.stock, np.asarray(stock, dtype=np.int32)[fresh]])
+            self.min_level = np.concatenate(
+                [self.min_level, np.asarray(min_level, dtype=np.int32)[fresh]]
+            )
+            old_width = self.skus.dtype.itemsize
+            width = max(old_width, new_skus.dtype.itemsize)
+            self.skus = np.concatenate([self.skus.astype(f"S{width}"), new_skus.astype(f"S{width}")])
+            # Hashes depend on the key width, so a wider SKU means re-indexing everything
+            if width != old_width or len(self) * 2 > len(self._index) or start == 0:
+                self._rebuild_index()
+            else:
+                self._insert(np.arange(start, len(self), dtype=np.int32))
+
+    # ----- hash index -----
+
+    def _rebuild_index(self) -> None:
+        capacity = 8
+        while capacity < 2 * len(self):
+            capacity *= 2
+        self._index = np.full(capacity, _EMPTY, dtype=np.int32)
+        if len(self):
+            self._insert(np.arange(len(self), dtype=np.int32))
+
+    def _insert(self, rows: np.ndarray) -> None:
+        """Linear probing, one vectorized round per probe step; the first claimant wins a slot."""
+        mask = np.uint64(len(self._index) - 1)
+        pos = (_hash_keys(self.skus[rows]) & mask).astype(np.int64)
+        pending = rows
+        while pending.size:
+            free = np.flatnonzero(self._index[pos] == _EMPTY)
+            slots, first = np.unique(pos[free], return_index=True)
+            self._index[slots] = pending[free[first]]
+            placed = np.zeros(len(pending), dtype=bool)
+            placed[free[first]] = True
+            pending = pending[~placed]
+            pos = (pos[~placed] + 1) & int(mask)
+
+    def rows_for(self, skus: Iterable[str]) -> np.ndarray:
+        """Row position of each SKU (-1 if unknown), vectorized over the batch."""
+        encoded = [s.encode() for s in skus]
+        result = np.full(len(encoded), _EMPTY, dtype=np.int64)
+        if not encoded or not len(self):
+            return result
+        width = self.skus.dtype.itemsize
+        fits = np.fromiter((len(s) <= width for s in encoded), dtype=bool, count=len(encoded))
+        active = np.flatnonzero(fits)
+        keys = np.array(encoded, dtype=f"S{width}")
+        mask = len(self._index) - 1
+        pos = (_hash_keys(keys[active]) & np.uint64(mask)).astype(np.int64)
+        while active.size:
+            slot = self._index[pos].astype(np.int64)
+            occupied = slot != _EMPTY
+            hit = occupied.copy()
+            hit[occupied] = self.skus[slot[occupied]] == keys[active[occupied]]
+            result[active[hit]] = slot[hit]
+            probe = occupied & ~hit
+            active = active[probe]
+            pos = (pos[probe] + 1) & mask
+        return result
+
+    def row_of(self, sku: str) -> Optional[int]:
+        row = int(self.rows_for([sku])[0])
+        return row if row >= 0 else None
+
+    # ----- scans -----
+
+    def select(
+        self,
+        sku_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+        skus: Optional[Iterable[str]] = None,
+    ) -> np.ndarray:
+        """Row positions (in id order) for a SKU range [from, to) or an explicit SKU list."""
+        with self._lock:
+            if skus is not None:
+                rows = self.rows_for(dict.fromkeys(skus))
+                rows = rows[rows >= 0]
+            else:
+                rows = None
+            lo, hi = sku_range or (None, None)
+            if lo is not None or hi is not None:
+                # Fixed-width byte strings drop trailing NULs, so "x\0" compares equal to "x":
+                # [x\0, ...) becomes (x, ...) and [..., x\0) becomes [..., x]
+                selected = np.ones(len(self), dtype=bool)
+                if lo is not None:
+                    key = lo.rstrip("\0").encode()
+                    selected &= self.skus > key if len(key) < len(lo) else self.skus >= key
+                if hi is not None:
+                    key = hi.rstrip("\0").encode()
+                    selected &= self.skus <= key if len(key) < len(hi) else self.skus < key
+                if rows is None:
+                    rows = np.flatnonzero(selected)
+                else:
+                    rows = rows[selected[rows]]
+            if rows is None:
+                return np.arange(len(self))
+            if skus is not None or not self.ordered:
+                rows = rows[np.argsort(self.ids[rows], kind="stable")]
+            return rows
+
+    def columns(
+        self,
+        sku_range: Optional[tuple[Optional[str], Optional[str]]] = None,
+        skus: Optional[Iterable[str]] = None,
+    ) -> tuple[np.ndarray, list[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (ids, skus, prices, stock, min_level) of the rows select() picks, copied under the
+        lock so a concurrent refresh() or load() cannot mix two versions of the table.
+        """
+        with self._lock:
+            rows = self.select(sku_range=sku_range, skus=skus)
+            return (
+                self.ids[rows],
+                self.sku_list(rows),
+                self.prices[rows],
+                self.stock[rows],
+                self.min_level[rows],
+            )
+
+    def low_stock_rows(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if rows is None:
+            return np.flatnonzero(self.stock < self.min_level)
+        return rows[self.stock[rows] < self.min_level[rows]]
+
+    def sku_list(self, rows: np.ndarray) -> list[str]:
+        return [s.decode() for s in self.skus[rows].tolist()]
+
+    def names(self, rows: np.ndarray) -> dict[int, str]:
+        """product id -> name for the given rows (see names_of)."""
+        with self._lock:
+            ids = self.ids[rows].tolist()
+        return self.names_of(ids)
+
+    def names_of(self, ids: list[int]) -> dict[int, str]:
+        """product id -> name (one indexed query per 500 ids)."""
+        names: dict[int, str] = {}
+        with self.db_tool.pool.connection() as conn:
+            for start in range(0, len(ids), 500):
+                chunk = ids[start : start + 500]
+                names.update(
+                    conn.execute(
+                        f"SELECT id, name FROM products WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    ).fetchall()
+                )
+        return names
@@ -0,0 +1,72 @@
+"""Retrieval tool over inventory history and business policy documents."""
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Optional
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, Field
+
+if TYPE_CHECKING:
+    from rag.knowledge_base import KnowledgeBase
+
+logger = logging.getLogger(__name__)
+
+
+class KnowledgeSearchInput(BaseModel):
+    """Input for a knowledge base search."""
+
+    query: str = Field(description="What to look for, e.g. 'past reorders of widget_a'")
+    top_k: int = Field(default=5, description="Number of passages to return")
+    source: Optional[str] = Field(
+        default=None, description="'logs' (inventory history), 'docs' (policies) or both"
+    )
+
+
+class KnowledgeBaseTool(BaseTool):
+    """
+    Searches the local knowledge base (rag.KnowledgeBase): inventory_logs entries and
+    policy document chunks, ranked by embedding similarity. New log rows are indexed
+    before each search, so results include the current run's reorders.
+    """
+
+    name: str = "knowledge_base"
+    description: str = (
+        "Search inventory history and business policy documents. Input: a question, or "
+        "JSON {\"query\": \"...\", \"top_k\": 5, \"source\": \"logs\" | \"docs\"}. Returns the "
+        "best-matching log entries and policy passages with similarity scores."
+    )
+    knowledge_base: Optional[Any] = None
+
+    def _get_knowledge_base(self) -> "KnowledgeBase":
+        if self.knowledge_base is None:
+            from rag.knowledge_base import get_knowledge_base
+
+            self.knowledge_base = get_knowledge_base()
+        return self.knowledge_base
+
+    def _run(self, raw_input: str, **kwargs: Any) -> str:
+        try:
+            request = self._parse_input(raw_input)
+            kb = self._get_knowledge_base()
+            kb.sync_inventory_logs()
+            sources = [request.source] if request.source in ("logs", "docs") else None
+            results = kb.search(request.query, max(1, min(request.top_k, 50)), sources)
+        except Exception as e:
+            logger.exception("Knowledge base search failed: %s", e)
+            return json.dumps({"status": "error", "message": str(e)})
+        logger.info("KnowledgeBase returned %d passages", len(results))
+        return json.dumps({"query": request.query, "results": results})
+
+    def _parse_input(self, raw: str) -> KnowledgeSearchInput:
+        raw = raw.strip()
+        if raw.startswith("{"):
+            try:
+                return KnowledgeSearchInput(**json.loads(raw))
+            except (json.JSONDecodeError, TypeError, ValueError):
+                pass
+        return KnowledgeSearchInput(query=raw)
+
+    def close(self) -> None:
+        if self.knowledge_base is not None:
+            self.knowledge_base.close()
@@ -0,0 +1,257 @@
+"""Write-behind appender that batches inventory_logs inserts into few transactions."""
+
+import atexit
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import AbstractContextManager, nullcontext
+from typing import Any, Callable, Literal, Optional
+
+from config import get_settings
+from tools.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+Durability = Literal["buffered", "group", "immediate"]
+
+LOG_COLUMNS = ("product_id", "action", "quantity", "note", "created_at")
+_REQUIRED = ("product_id", "action", "quantity")  # NOT NULL in the schema
+_INSERT_SQL = (
+    "INSERT INTO inventory_logs (product_id, action, quantity, note, created_at) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+LogRow = tuple[Any, Any, Any, Any, str]
+
+
+def _utc_timestamp() -> str:
+    """Same format as SQLite's CURRENT_TIMESTAMP, taken when the entry is appended."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+class InventoryLogAppender:
+    """
+    Buffers inventory_logs rows and writes them with one executemany per transaction,
+    flushed by a background thread once ``batch_size`` rows are waiting or
+    ``flush_interval`` seconds after the oldest one, and on flush()/close().
+    ``durability`` sets what append() guarantees on return:
+
+    - ``buffered``: nothing; a crash can lose up to ``flush_interval`` seconds of logs
+    - ``group``: the row is committed; concurrent callers share one transaction
+    - ``immediate``: the row is committed in its own transaction (no batching)
+
+    created_at is stamped at append time, so buffering does not shift log times. Rows
+    missing a NOT NULL value are rejected by append() before they are acknowledged; a
+    batch that still fails a constraint (e.g. a trigger) is retried row by row, and only
+    the failing rows are dropped and counted as ``rejected``. When ``max_pending`` rows
+    are waiting, append() flushes inline (backpressure).
+    ``write_scope``, if given, wraps each write and yields the ``commit(conn)`` to end it
+    with (DatabaseTool uses it to invalidate cached query results).
+    """
+
+    def __init__(
+        self,
+        pool: Callable[[], ConnectionPool],
+        *,
+        durability: Durability = "buffered",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 50_000,
+        write_scope: Optional[Callable[[], AbstractContextManager]] = None,
+    ) -> None:
+        self._pool = pool
+        self._write_scope = write_scope or (lambda: nullcontext(sqlite3.Connection.commit))
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._rows: list[LogRow] = []
+        self._oldest = 0.0
+        self._appended = 0  # sequence number of the last appended row
+        self._committed = 0  # ... and of the last committed row
+        self._failed: list[tuple[int, int, str]] = []  # (first, last seq, error) for group waiters
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()  # one writer transaction at a time
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._counts = {
+            "appended": 0, "written": 0, "transactions": 0, "failed_flushes": 0, "rejected": 0,
+        }
+
+    @classmethod
+    def from_settings(
+        cls,
+        pool: Callable[[], ConnectionPool],
+        write_scope: Optional[Callable[[], AbstractContextManager]] = None,
+    ) -> "InventoryLogAppender":
+        settings = get_settings()
+        return cls(
+            pool,
+            write_scope=write_scope,
+            durability=settings.erp_log_durability,
+            batch_size=settings.erp_log_batch_size,
+            flush_interval=settings.erp_log_flush_interval,
+            max_pending=settings.erp_log_max_pending,
+        )
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._rows)
+
+    def append(
+        self, product_id: Any, action: Any, quantity: Any, note: Any = None,
+        created_at: Optional[str] = None,
+    ) -> None:
+        """
+        Queue one log entry (see ``durability`` for when it is on disk). Raises
+        sqlite3.IntegrityError for a missing NOT NULL value, like the INSERT would.
+        """
+        row = (product_id, action, quantity, note, created_at or _utc_timestamp())
+        for column, value in zip(_REQUIRED, row):
+            if value is None:
+                raise sqlite3.IntegrityError(f"NOT NULL constraint failed: inventory_logs.{column}")
+        if self.durability == "immediate" or self._closed:
+            self._write([row])
+            with self._cond:
+                self._counts["appended"] += 1
+            return
+        self._start()
+        with self._cond:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            self._appended += 1
+            self._counts["appended"] += 1
+            seq = self._appended
+            backlog = len(self._rows)
+            if backlog >= self.batch_size or self.durability == "group":
+                self._cond.notify_all()
+        if backlog >= self.max_pending:
+            self.flush()
+        if self.durability == "group":
+            self._wait_committed(seq)
+
+    def _wait_committed(self, seq: int) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: self._committed >= seq)
+            for first, last, error in self._failed:
+                if first <= seq <= last:
+                    raise sqlite3.OperationalError(f"inventory_logs write failed: {error}")
+
+    def _start(self) -> None:
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._work, name="inventory-log-flush", daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed:
+                    if self._rows:
+                        due = self._oldest + self.flush_interval - time.monotonic()
+                        if len(self._rows) >= self.batch_size or self.durability == "group" or due <= 0:
+                            break
+                        self._cond.wait(due)
+                    else:
+                        self._cond.wait()
+                if self._closed:
+                    return
+            if not self.flush() and self.durability != "group":
+                time.sleep(self.flush_interval)  # ERP unavailable: retry on the next tick
+
+    def flush(self) -> bool:
+        """
+        Write every buffered row now. False if the write failed: in buffered mode the rows
+        are kept for the next attempt, in group mode their callers get the error. Rows
+        that violate a constraint are dropped (and reported) so they cannot hold back
+        the rest.
+        """
+        with self._flush_lock:
+            with self._cond:
+                rows, self._rows = self._rows, []
+                seq = self._appended
+            if not rows:
+                return True
+            try:
+                try:
+                    self._write(rows)
+                    rejected: list[tuple[int, str]] = []
+                except sqlite3.IntegrityError:
+                    rejected = self._write_each(rows)
+            except sqlite3.Error as e:
+                logger.exception("inventory_logs flush of %d rows failed: %s", len(rows), e)
+                with self._cond:
+                    self._counts["failed_flushes"] += 1
+                    if self.durability == "group":
+                        # The waiting callers get the error instead of a later retry
+                        self._failed = [*self._failed[-63:], (seq - len(rows) + 1, seq, str(e))]
+                        self._committed = seq
+                        self._cond.notify_all()
+                    else:
+                        self._rows[:0] = rows
+                        self._oldest = time.monotonic()
+                return False
+            first = seq - len(rows) + 1
+            with self._cond:
+                if rejected:
+                    self._counts["rejected"] += len(rejected)
+                    if self.durability == "group":
+                        failed = [(first + i, first + i, error) for i, error in rejected]
+                        self._failed = [*self._failed, *failed][-256:]
+                self._committed = seq
+                self._cond.notify_all()
+            if rejected:
+                logger.error(
+                    "Dropped %d of %d inventory_logs rows that violate a constraint (first: %s %s)",
+                    len(rejected), len(rows), rows[rejected[0][0]], rejected[0][1],
+                )
+            return True
+
+    def _write(self, rows: list[LogRow]) -> None:
+        with self._write_scope() as commit, self._pool().connection() as conn:
+            conn.executemany(_INSERT_SQL, rows)
+            commit(conn)
+        with self._cond:
+            self._counts["written"] += len(rows)
+            self._counts["transactions"] += 1
+        logger.debug("Wrote %d inventory_logs rows in one transaction", len(rows))
+
+    def _write_each(self, rows: list[LogRow]) -> list[tuple[int, str]]:
+        """
+        Insert ``rows`` one statement at a time in one transaction (a constraint error
+        rolls back only its own statement); returns (index, error) of the rejected rows.
+        """
+        rejected: list[tuple[int, str]] = []
+        with self._write_scope() as commit, self._pool().connection() as conn:
+            for index, row in enumerate(rows):
+                try:
+                    conn.execute(_INSERT_SQL, row)
+                except sqlite3.IntegrityError as e:
+                    rejected.append((index, str(e)))
+            commit(conn)
+        with self._cond:
+            self._counts["written"] += len(rows) - len(rejected)
+            self._counts["transactions"] += 1
+        return rejected
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return dict(self._counts, pending=len(self._rows))
+
+    def close(self) -> None:
+        """Flush and stop the background thread; later appends are written directly."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        if not self.flush():
+            logger.error("inventory_logs appender closed with %d rows unwritten", self.pending)
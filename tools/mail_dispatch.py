@@ -0,0 +1,320 @@
+"""Pooled, persistent SMTP sessions and a background queue for supplier emails."""
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Iterator, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutgoingEmail:
+    """One queued supplier email."""
+
+    to_email: str
+    subject: str
+    body: str
+    reply_to: Optional[str] = None
+    message_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+    def as_string(self, sender: str) -> str:
+        msg = MIMEMultipart("alternative")
+        msg["Subject"] = self.subject
+        msg["From"] = sender
+        msg["To"] = self.to_email
+        if self.reply_to:
+            msg["Reply-To"] = self.reply_to
+        msg.attach(MIMEText(self.body, "plain"))
+        return msg.as_string()
+
+
+class SMTPSessionPool:
+    """
+    Keeps up to ``max_sessions`` authenticated SMTP sessions open. A session idle for
+    longer than ``keepalive`` seconds is probed with NOOP before reuse and transparently
+    replaced if the server has dropped it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        *,
+        user: str = "",
+        password: str = "",
+        use_tls: bool = True,
+        max_sessions: int = 4,
+        keepalive: float = 60.0,
+        timeout: float = 30.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.max_sessions = max_sessions
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: queue.LifoQueue[tuple[smtplib.SMTP, float]] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "SMTPSessionPool":
+        settings = get_settings()
+        return cls(
+            settings.smtp_host,
+            settings.smtp_port,
+            user=settings.smtp_user,
+            password=settings.smtp_password,
+            use_tls=settings.smtp_use_tls,
+            max_sessions=settings.smtp_pool_size,
+            keepalive=settings.smtp_keepalive_interval,
+            timeout=settings.smtp_timeout,
+        )
+
+    @property
+    def sender(self) -> str:
+        return self.user or "noreply@orchestrator.local"
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            server.starttls()
+        if self.user and self.password:
+            server.login(self.user, self.password)
+        with self._lock:
+            self.connections_opened += 1
+        logger.debug("Opened SMTP session to %s:%s", self.host, self.port)
+        return server
+
+    def _is_alive(self, server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            try:
+                server, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.keepalive or self._is_alive(server):
+                return server
+            _quietly_close(server)
+
+    @contextmanager
+    def session(self) -> Iterator[smtplib.SMTP]:
+        """Borrow a live session; it is discarded instead of reused if the block fails."""
+        self._slots.acquire()
+        server: Optional[smtplib.SMTP] = None
+        try:
+            server = self._checkout()
+            yield server
+        except BaseException:
+            if server is not None:
+                _quietly_close(server)
+                server = None
+            raise
+        finally:
+            if server is not None:
+                self._idle.put((server, time.monotonic()))
+            self._slots.release()
+
+    def send_batch(self, emails: list[OutgoingEmail]) -> dict[str, Optional[str]]:
+        """
+        Send emails over one session; returns message_id -> None (sent) or error text.
+        A message the server refuses (recipient, sender or data) fails alone; other SMTP
+        errors fail the rest of the batch, and a dropped session is retried once.
+        """
+        results: dict[str, Optional[str]] = {}
+        pending = list(emails)
+        for attempt in range(2):
+            try:
+                with self.session() as server:
+                    while pending:
+                        email = pending[0]
+                        try:
+                            server.sendmail(self.sender, email.to_email, email.as_string(self.sender))
+                            results[email.message_id] = None
+                        except smtplib.SMTPRecipientsRefused as e:
+                            results[email.message_id] = f"recipient refused: {e.recipients}"
+                        except (smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            results[email.message_id] = f"refused: {e.smtp_code} {e.smtp_error!r}"
+                        pending.pop(0)
+                return results
+            except (smtplib.SMTPServerDisconnected, OSError) as e:
+                # Session dropped mid-batch: reconnect once and retry the rest
+                if attempt == 1:
+                    for email in pending:
+                        results[email.message_id] = str(e)
+            except smtplib.SMTPException as e:
+                for email in pending:
+                    results[email.message_id] = str(e)
+                return results
+        return results
+
+    def close(self) -> None:
+        while True:
+            try:
+                server, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                server.quit()
+            except (smtplib.SMTPException, OSError):
+                _quietly_close(server)
+
+
+_STOP = object()
+
+
+class MailDispatcher:
+    """
+    Background worker queue in front of an SMTPSessionPool. enqueue() returns at once;
+    workers drain up to ``batch_size`` messages per session checkout.
+    """
+
+    def __init__(
+        self,
+        pool: SMTPSessionPool,
+        *,
+        workers: Optional[int] = None,
+        batch_size: int = 20,
+        max_queue: int = 10_000,
+        max_results: int = 10_000,
+    ) -> None:
+        self.pool = pool
+        self.workers = workers or pool.max_sessions
+        self.batch_size = batch_size
+        self.max_results = max_results
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._threads: list[threading.Thread] = []
+        self._results: OrderedDict[str, str] = OrderedDict()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._counts = {"queued": 0, "sent": 0, "failed": 0}
+
+    @classmethod
+    def from_settings(cls) -> "MailDispatcher":
+        settings = get_settings()
+        return cls(
+            SMTPSessionPool.from_settings(),
+            batch_size=settings.smtp_batch_size,
+            max_queue=settings.smtp_queue_max,
+        )
+
+    def _start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"mail-dispatch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def enqueue(
+        self, to_email: str, subject: str, body: str, reply_to: Optional[str] = None
+    ) -> str:
+        """Queue an email and return its message_id (raises queue.Full when saturated)."""
+        self._start()
+        email = OutgoingEmail(to_email, subject, body, reply_to)
+        with self._cond:
+            self._pending += 1
+            self._counts["queued"] += 1
+            self._record(email.message_id, "queued")
+        try:
+            self._queue.put_nowait(email)
+        except queue.Full:
+            with self._cond:
+                self._pending -= 1
+                self._counts["queued"] -= 1
+                self._results.pop(email.message_id, None)
+            raise
+        return email.message_id
+
+    def _record(self, message_id: str, status: str) -> None:
+        """Caller holds the condition lock."""
+        self._results[message_id] = status
+        self._results.move_to_end(message_id)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(nxt)
+            try:
+                results = self.pool.send_batch(batch)
+            except Exception as e:
+                logger.exception("Mail dispatch batch failed: %s", e)
+                results = {m.message_id: str(e) for m in batch}
+            with self._cond:
+                for email in batch:
+                    error = results.get(email.message_id, "not sent")
+                    if error is None:
+                        self._counts["sent"] += 1
+                        self._record(email.message_id, "sent")
+                        logger.info("Email sent to %s: %s", email.to_email, email.subject)
+                    else:
+                        self._counts["failed"] += 1
+                        self._record(email.message_id, f"error: {error}")
+                        logger.error("Failed to send email to %s: %s", email.to_email, error)
+                self._pending -= len(batch)
+                self._cond.notify_all()
+
+    def status(self, message_id: str) -> Optional[str]:
+        """queued / sent / error: ... (None if unknown or aged out)."""
+        with self._cond:
+            return self._results.get(message_id)
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return dict(self._counts, pending=self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every queued email has been attempted; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """Flush, stop workers and close pooled sessions."""
+        if not self.flush(timeout):
+            logger.warning("Mail dispatcher closed with %d emails unsent", self._pending)
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+        self.pool.close()
+
+
+def _quietly_close(server: smtplib.SMTP) -> None:
+    try:
+        server.close()
+    except Exception:
+        pass
@@ -0,0 +1,289 @@
+"""Two-tier competitor price cache: in-memory LRU with TTL in front of a persistent SQLite tier."""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from config import get_settings
+from tools.db_pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[list[str]], dict[str, list[float]]]
+
+_CACHE_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS competitor_price_cache (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        changed_at REAL NOT NULL DEFAULT 0
+    );
+"""
+_SQLITE_MAX_PARAMS = 500
+
+
+@dataclass
+class CacheStats:
+    """Counters since the cache was created."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    revalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / total if total else 0.0
+
+
+class PriceCache:
+    """
+    Entries are fresh for ``ttl`` seconds, then served stale for up to ``stale_ttl``
+    more seconds while a background refresh runs (stale-while-revalidate); older
+    entries are treated as misses. ``path=None`` keeps the cache in memory only.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path | str] = None,
+        *,
+        max_entries: int = 100_000,
+        ttl: float = 3600.0,
+        stale_ttl: float = 86400.0,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._memory: OrderedDict[str, tuple[list[float], float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+        self._inflight: set[str] = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._closed = False
+        self.path = Path(path) if path is not None else None
+        self._pool_ref: Optional[ConnectionPool] = None
+
+    @property
+    def _pool(self) -> Optional[ConnectionPool]:
+        """Disk-tier pool (re-acquired if it was closed by a registry teardown)."""
+        if self.path is None:
+            return None
+        if self._pool_ref is None or self._pool_ref.closed:
+            self._pool_ref = get_pool(self.path)
+            self._pool_ref.ensure_initialized("competitor_price_cache", _apply_cache_schema)
+        return self._pool_ref
+
+    @classmethod
+    def from_settings(cls) -> Optional["PriceCache"]:
+        """Build the cache from COMPETITOR_CACHE_* settings; None if disabled."""
+        settings = get_settings()
+        if not settings.competitor_cache_enabled:
+            return None
+        path = None
+        if settings.competitor_cache_path:
+            path = Path(settings.competitor_cache_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+        return cls(
+            path,
+            max_entries=settings.competitor_cache_max_entries,
+            ttl=settings.competitor_cache_ttl,
+            stale_ttl=settings.competitor_cache_stale_ttl,
+        )
+
+    def _remember(self, key: str, value: list[float], fetched_at: float) -> None:
+        """Insert into the memory tier (caller holds the lock)."""
+        self._memory[key] = (value, fetched_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _read_disk(self, keys: list[str]) -> dict[str, tuple[list[float], float]]:
+        pool = self._pool
+        if pool is None or not keys:
+            return {}
+        found: dict[str, tuple[list[float], float]] = {}
+        with pool.connection() as conn:
+            for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+                chunk = keys[start : start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value, fetched_at in conn.execute(
+                    f"SELECT key, value, fetched_at FROM competitor_price_cache WHERE key IN ({placeholders})",
+                    chunk,
+                ):
+                    found[key] = (json.loads(value), fetched_at)
+        return found
+
+    def lookup(self, keys: Iterable[str]) -> tuple[dict[str, list[float]], list[str], list[str]]:
+        """Return (values for fresh or stale keys, stale keys, missing keys)."""
+        now = self._clock()
+        values: dict[str, list[float]] = {}
+        stale: list[str] = []
+        pending: list[str] = []
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is None:
+                    pending.append(key)
+                    continue
+                self._memory.move_to_end(key)
+                age = now - entry[1]
+                if age < self.ttl:
+                    values[key] = entry[0]
+                    self._stats.hits += 1
+                elif age < self.ttl + self.stale_ttl:
+                    values[key] = entry[0]
+                    stale.append(key)
+                    self._stats.stale_hits += 1
+                else:
+                    pending.append(key)
+        disk = self._read_disk(pending)
+        missing: list[str] = []
+        with self._lock:
+            for key in pending:
+                entry = disk.get(key)
+                age = now - entry[1] if entry is not None else None
+                if age is None or age >= self.ttl + self.stale_ttl:
+                    missing.append(key)
+                    self._stats.misses += 1
+                    continue
+                self._remember(key, entry[0], entry[1])
+                values[key] = entry[0]
+                self._stats.disk_hits += 1
+                if age < self.ttl:
+                    self._stats.hits += 1
+                else:
+                    stale.append(key)
+                    self._stats.stale_hits += 1
+        return values, stale, missing
+
+    def put_many(self, values: dict[str, list[float]]) -> None:
+        """Store values in both tiers (one disk transaction)."""
+        if not values:
+            return
+        now = self._clock()
+        with self._lock:
+            for key, value in values.items():
+                self._remember(key, value, now)
+        pool = self._pool
+        if pool is not None:
+            with pool.connection() as conn:
+                # changed_at only moves when new prices differ from stored ones; a first
+                # observation is not a price movement
+                conn.executemany(
+                    "INSERT INTO competitor_price_cache (key, value, fetched_at, changed_at) "
+                    "VALUES (?, ?, ?, 0) ON CONFLICT(key) DO UPDATE SET "
+                    "changed_at = CASE WHEN value = excluded.value THEN changed_at "
+                    "ELSE excluded.fetched_at END, "
+                    "value = excluded.value, fetched_at = excluded.fetched_at",
+                    [(k, json.dumps(v), now) for k, v in values.items()],
+                )
+                conn.commit()
+
+    def revalidate(self, keys: list[str], loader: Loader) -> None:
+        """
+        Refresh stale keys on a background thread (each key at most once in flight).
+        Ignored once the cache is closed; stale values are then served until they expire.
+        """
+
+        def _refresh() -> None:
+            try:
+                self.put_many(loader(todo))
+            except Exception as e:
+                logger.warning("Price cache revalidation failed: %s", e)
+            finally:
+                with self._lock:
+                    self._inflight.difference_update(todo)
+
+        with self._lock:
+            if self._closed:
+                return
+            todo = [k for k in keys if k not in self._inflight]
+            if not todo:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="price-cache-revalidate"
+                )
+            self._inflight.update(todo)
+            self._stats.revalidations += len(todo)
+            self._executor.submit(_refresh)
+
+    def get_or_load_many(self, keys: Iterable[str], loader: Loader) -> dict[str, list[float]]:
+        """Serve cached values, load misses synchronously and refresh stale ones in the background."""
+        values, stale, missing = self.lookup(keys)
+        if missing:
+            loaded = loader(missing)
+            self.put_many(loaded)
+            values.update(loaded)
+        if stale:
+            self.revalidate(stale, loader)
+        return values
+
+    def changed_since(self, since: float) -> list[str]:
+        """Keys whose stored prices changed after ``since`` (disk tier only; [] in memory mode)."""
+        pool = self._pool
+        if pool is None:
+            return []
+        with pool.connection() as conn:
+            return [
+                row[0]
+                for row in conn.execute(
+                    "SELECT key FROM competitor_price_cache WHERE changed_at > ?", (since,)
+                )
+            ]
+
+    def now(self) -> float:
+        """Current time on the cache clock (for change watermarks)."""
+        return self._clock()
+
+    def stats(self) -> dict[str, float]:
+        """Counters plus hit ratio and current memory-tier size."""
+        with self._lock:
+            data: dict[str, float] = asdict(self._stats)
+            data["hit_ratio"] = round(self._stats.hit_ratio, 4)
+            data["memory_entries"] = len(self._memory)
+        return data
+
+    def clear(self) -> None:
+        """Drop all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        pool = self._pool
+        if pool is not None:
+            with pool.connection() as conn:
+                conn.execute("DELETE FROM competitor_price_cache")
+                conn.commit()
+
+    def close(self, wait: bool = True) -> None:
+        """Stop the revalidation worker; later revalidate() calls are ignored."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def _apply_cache_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(_CACHE_SCHEMA_SQL)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(competitor_price_cache)")}
+    if "changed_at" not in columns:
+        conn.execute(
+            "ALTER TABLE competitor_price_cache ADD COLUMN changed_at REAL NOT NULL DEFAULT 0"
+        )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_price_cache_changed ON competitor_price_cache(changed_at)"
+    )
+    conn.commit()
@@ -0,0 +1,441 @@
+"""Memory-mapped, append-only store of versioned competitor price observations."""
+
+import datetime as dt
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Segment layout (little-endian), every section 8-byte aligned:
+#   header (64 B): magic, record count, SKU width, price slots, created_at (unix seconds)
+#   keys   n * width   fixed-width SKUs, NUL-padded, sorted (sku, day)
+#   days   n * 4       observation day (days since 1970-01-01)
+#   prices n * slots*8 float64, NaN-padded
+#   changed n * 8      float64 unix seconds the SKU's price last differed from the row before
+# Version 1 segments have no changed section; their records count as changed at created_at.
+_MAGIC = b"CPSEG\x00\x02\x00"
+_MAGIC_V1 = b"CPSEG\x00\x01\x00"
+_HEADER = struct.Struct("<8sQIId")
+_HEADER_SIZE = 64
+_MANIFEST = "MANIFEST.json"
+_EPOCH = dt.date(1970, 1, 1)
+# Below this many identifiers, per-key binary searches beat setting up key arrays
+_SCALAR_BATCH = 16
+
+
+def _align(n: int) -> int:
+    return n + (-n) % 8
+
+
+def normalize_sku(identifier: str) -> str:
+    """Key form shared with the scraper's mock prices and cache keys."""
+    return identifier.strip().lower().replace(" ", "_")
+
+
+def day_number(day: Optional[dt.date] = None) -> int:
+    return ((day or dt.datetime.now(dt.timezone.utc).date()) - _EPOCH).days
+
+
+def write_segment(
+    path: Path,
+    keys: np.ndarray,
+    days: np.ndarray,
+    prices: np.ndarray,
+    created_at: float,
+    changed: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Write one immutable segment (records already sorted by key, then day) atomically.
+    ``changed`` defaults to ``created_at`` for every record.
+    """
+    if changed is None:
+        changed = np.full(len(keys), created_at)
+    n, slots = prices.shape
+    width = max(keys.dtype.itemsize, 1)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n, width, slots, created_at).ljust(_HEADER_SIZE, b"\0"))
+        for block in (
+            keys.astype(f"S{width}").tobytes(),
+            days.astype("<u4").tobytes(),
+            prices.astype("<f8").tobytes(),
+            changed.astype("<f8").tobytes(),
+        ):
+            f.write(block.ljust(_align(len(block)), b"\0"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Segment:
+    """A read-only mmap of one segment file; the arrays are views into the mapping."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n, width, slots, created_at = _HEADER.unpack_from(self._mmap, 0)
+        if magic not in (_MAGIC, _MAGIC_V1):
+            self._mmap.close()
+            raise ValueError(f"{path} is not a competitor price segment")
+        self.created_at = created_at
+        offset = _HEADER_SIZE
+        self.keys = np.frombuffer(self._mmap, dtype=f"S{width}", count=n, offset=offset)
+        offset += _align(n * width)
+        self.days = np.frombuffer(self._mmap, dtype="<u4", count=n, offset=offset)
+        offset += _align(n * 4)
+        self.prices = np.frombuffer(
+            self._mmap, dtype="<f8", count=n * slots, offset=offset
+        ).reshape(n, slots)
+        offset += _align(n * slots * 8)
+        if magic == _MAGIC:
+            self.changed = np.frombuffer(self._mmap, dtype="<f8", count=n, offset=offset)
+        else:
+            self.changed = np.full(n, created_at)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def width(self) -> int:
+        return self.keys.dtype.itemsize
+
+    def find(self, key: bytes) -> int:
+        """Record index of the newest observation for one key, or -1."""
+        if len(key) > self.width:
+            return -1
+        at = int(self.keys.searchsorted(key, side="right")) - 1
+        return at if at >= 0 and self.keys[at] == key else -1
+
+    def latest(self, keys: np.ndarray) -> np.ndarray:
+        """Record index of the newest observation per key (-1 if absent); keys fit ``width``."""
+        if not len(self):
+            return np.full(len(keys), -1, dtype=np.int64)
+        at = np.searchsorted(self.keys, keys, side="right") - 1
+        found = at >= 0
+        found[found] = self.keys[at[found]] == keys[found]
+        return np.where(found, at, -1)
+
+    def close(self) -> None:
+        self.keys = self.days = self.prices = self.changed = None  # release the buffer exports
+        try:
+            self._mmap.close()
+        except BufferError:  # a caller still holds a view; the mapping goes with it
+            pass
+
+
+@dataclass
+class StoreStats:
+    segments: int
+    records: int
+    bytes: int
+
+
+class PriceStore:
+    """
+    Competitor prices as a directory of immutable, memory-mapped segments. Each append()
+    (e.g. one daily scrape) writes a new segment sorted by SKU; lookups binary-search the
+    segments newest-first, straight from the page cache, so opening a store parses only
+    a 64-byte header per segment and every worker process shares the same pages.
+    compact() merges segments, keeping the newest observation per SKU plus history for
+    ``retain_days``. Every record carries when its SKU's price last changed (an append
+    of identical prices keeps the earlier time, compaction keeps it as is), which is
+    what skus_changed_since() reports from. A MANIFEST.json (replaced atomically) lists the live segments;
+    readers pick up a new manifest within ``reload_interval`` seconds. One writer at a time.
+    """
+
+    def __init__(
+        self, directory: Path | str, *, retain_days: int = 30, reload_interval: float = 1.0
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.retain_days = retain_days
+        self.reload_interval = reload_interval
+        self._segments: list[Segment] = []  # newest first
+        self._generation = 0
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+        self._reload()
+
+    @classmethod
+    def from_settings(cls) -> Optional["PriceStore"]:
+        """Open the store at COMPETITOR_STORE_PATH; None if unset."""
+        settings = get_settings()
+        if not settings.competitor_store_path:
+            return None
+        return cls(settings.competitor_store_path, retain_days=settings.competitor_store_retain_days)
+
+    # ----- manifest -----
+
+    def _manifest(self) -> dict:
+        path = self.directory / _MANIFEST
+        if not path.exists():
+            return {"generation": 0, "segments": []}
+        return json.loads(path.read_text())
+
+    def _write_manifest(self, generation: int, segments: list[str]) -> None:
+        tmp = self.directory / (_MANIFEST + ".tmp")
+        tmp.write_text(json.dumps({"generation": generation, "segments": segments}))
+        os.replace(tmp, self.directory / _MANIFEST)
+
+    def _reload(self, attempts: int = 5) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            for attempt in range(attempts):
+                manifest = self._manifest()
+                if manifest["generation"] == self._generation:
+                    return
+                # Dropped segments are not closed: a concurrent reader may still hold them,
+                # and the mapping is released with the last reference (the file is unlinked)
+                opened = {s.path.name: s for s in self._segments}
+                try:
+                    segments = [
+                        opened.get(name) or Segment(self.directory / name)
+                        for name in manifest["segments"]
+                    ]
+                except FileNotFoundError:
+                    # A writer compacted (and unlinked) a segment of the manifest we read
+                    if attempt == attempts - 1:
+                        raise
+                    continue
+                self._segments = segments[::-1]
+                self._generation = manifest["generation"]
+                return
+
+    def _current(self) -> list[Segment]:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self._reload()
+        return self._segments
+
+    # ----- reads -----
+
+    def _locate(
+        self, segments: list[Segment], identifiers: list[str]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(segment position, record index) of the newest observation per identifier."""
+        where = np.full(len(identifiers), -1, dtype=np.int64)
+        records = np.full(len(identifiers), -1, dtype=np.int64)
+        if not segments or not identifiers:
+            return where, records
+        encoded = [normalize_sku(i).encode() for i in identifiers]
+        lengths = np.fromiter((len(k) for k in encoded), dtype=np.int64, count=len(encoded))
+        keys = np.array(encoded, dtype=f"S{max(int(lengths.max()), 1)}")
+        for position, segment in enumerate(segments):
+            pending = np.flatnonzero((where < 0) & (lengths <= segment.width))
+            if not pending.size:
+                continue
+            hits = segment.latest(keys[pending].astype(f"S{segment.width}"))
+            found = hits >= 0
+            where[pending[found]] = position
+            records[pending[found]] = hits[found]
+            if (where >= 0).all():
+                break
+        return where, records
+
+    def _newest(
+        self, segments: list[Segment], identifiers: list[str], slots: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(NaN-padded newest prices, their changed time, found mask) per identifier."""
+        where, records = self._locate(segments, identifiers)
+        prices = np.full((len(identifiers), slots), np.nan)
+        changed = np.zeros(len(identifiers))
+        for position, segment in enumerate(segments):
+            rows = np.flatnonzero(where == position)
+            if rows.size:
+                width = min(slots, segment.prices.shape[1])
+                prices[rows, :width] = segment.prices[records[rows], :width]
+                changed[rows] = segment.changed[records[rows]]
+        return prices, changed, where >= 0
+
+    def get_many(
+        self, identifiers: Iterable[str], competitor_count: int = 3
+    ) -> dict[str, list[float]]:
+        """Newest stored prices per identifier (identifiers without data are omitted)."""
+        identifiers = list(identifiers)
+        if len(identifiers) < _SCALAR_BATCH:
+            found = {i: self.get(i, competitor_count) for i in identifiers}
+            return {i: prices for i, prices in found.items() if prices is not None}
+        segments = self._current()
+        where, records = self._locate(segments, identifiers)
+        prices: dict[str, list[float]] = {}
+        for i in np.flatnonzero(where >= 0):
+            row = segments[where[i]].prices[records[i], :competitor_count]
+            prices[identifiers[i]] = row[~np.isnan(row)].tolist()
+        return prices
+
+    def get(self, identifier: str, competitor_count: int = 3) -> Optional[list[float]]:
+        """Single-SKU lookup: one binary search per segment, no array setup."""
+        key = normalize_sku(identifier).encode()
+        for segment in self._current():
+            at = segment.find(key)
+            if at >= 0:
+                row = segment.prices[at, :competitor_count]
+                return row[~np.isnan(row)].tolist()
+        return None
+
+    def matrix(
+        self, identifiers: Iterable[str], competitor_count: int = 3
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """(NaN-padded price matrix, found mask) for the identifiers, without Python lists."""
+        out, _, found = self._newest(self._current(), list(identifiers), competitor_count)
+        return out, found
+
+    def history(self, identifier: str) -> list[tuple[dt.date, list[float]]]:
+        """Every retained observation for one SKU, oldest first."""
+        key = normalize_sku(identifier).encode()
+        seen: dict[int, list[float]] = {}
+        for segment in self._current():  # newest first: the first write of a day wins
+            if len(key) > segment.width:
+                continue
+            lo = np.searchsorted(segment.keys, key, side="left")
+            hi = np.searchsorted(segment.keys, key, side="right")
+            for r in range(lo, hi):
+                row = segment.prices[r]
+                seen.setdefault(int(segment.days[r]), row[~np.isnan(row)].tolist())
+        return [(_EPOCH + dt.timedelta(days=d), seen[d]) for d in sorted(seen)]
+
+    def skus_changed_since(self, since: float) -> list[str]:
+        """
+        SKUs whose newest prices differ from the ones before them, where that change was
+        appended after ``since`` (unix seconds). Re-appending the same prices or
+        compacting does not count as a change.
+        """
+        segments = self._current()
+        changed: set[str] = set()
+        for segment in segments:
+            if segment.created_at > since:  # changed times never exceed their segment's
+                changed.update(k.decode() for k in segment.keys[segment.changed > since].tolist())
+        if not changed:
+            return []
+        # A SKU can change and then change back; only its newest record counts
+        candidates = sorted(changed)
+        _, when, found = self._newest(segments, candidates, 1)
+        return [sku for sku, t, ok in zip(candidates, when.tolist(), found.tolist()) if ok and t > since]
+
+    def stats(self) -> StoreStats:
+        segments = self._current()
+        return StoreStats(
+            segments=len(segments),
+            records=sum(len(s) for s in segments),
+            bytes=sum(s.path.stat().st_size for s in segments),
+        )
+
+    # ----- writes -----
+
+    def append(
+        self, prices: Mapping[str, Iterable[float]], day: Optional[dt.date] = None
+    ) -> Optional[Path]:
+        """Write one segment of observations for ``day`` (default: today, UTC)."""
+        if not prices:
+            return None
+        keys = [normalize_sku(k).encode() for k in prices]
+        rows = [list(v) for v in prices.values()]
+        slots = max(max((len(r) for r in rows), default=0), 1)
+        matrix = np.full((len(rows), slots), np.nan)
+        for i, row in enumerate(rows):
+            matrix[i, : len(row)] = row
+        key_array = np.array(keys)
+        days = np.full(len(keys), day_number(day), dtype=np.uint32)
+        order = np.argsort(key_array, kind="stable")
+        key_array, days, matrix = key_array[order], days[order], matrix[order]
+        with self._lock:
+            self._reload()
+            now = time.time()
+            previous, changed, found = self._newest(
+                self._segments,
+                [k.decode() for k in key_array.tolist()],
+                max([slots] + [s.prices.shape[1] for s in self._segments]),
+            )
+            padded = np.full(previous.shape, np.nan)
+            padded[:, :slots] = matrix
+            same = found & ((previous == padded) | (np.isnan(previous) & np.isnan(padded))).all(axis=1)
+            changed = np.where(same, changed, now)
+            return self._publish(key_array, days, matrix, replaces=[], changed=changed, created_at=now)
+
+    def compact(self, today: Optional[dt.date] = None) -> int:
+        """
+        Merge all segments into one: the newest observation per SKU is always kept, older
+        ones only within ``retain_days`` of ``today``. Returns the number of records written.
+        """
+        with self._lock:
+            self._reload()
+            segments = self._segments
+            if not segments:
+                return 0
+            width = max(s.width for s in segments)
+            slots = max(s.prices.shape[1] for s in segments)
+            keys = np.concatenate([s.keys.astype(f"S{width}") for s in segments])
+            days = np.concatenate([s.days.astype(np.int64) for s in segments])
+            age = np.concatenate([np.full(len(s), i) for i, s in enumerate(segments)])
+            changed = np.concatenate([np.asarray(s.changed, dtype=np.float64) for s in segments])
+            prices = np.full((len(keys), slots), np.nan)
+            start = 0
+            for s in segments:
+                prices[start : start + len(s), : s.prices.shape[1]] = s.prices
+                start += len(s)
+            # Sort by (key, day, newest segment first); keep one record per (key, day)
+            order = np.lexsort((age, days, keys))
+            keys, days, prices, changed = keys[order], days[order], prices[order], changed[order]
+            new_pair = np.ones(len(keys), dtype=bool)
+            new_pair[1:] = (keys[1:] != keys[:-1]) | (days[1:] != days[:-1])
+            new_key = np.ones(len(keys), dtype=bool)
+            new_key[1:] = keys[1:] != keys[:-1]
+            starts = np.flatnonzero(new_key)
+            latest_day = np.maximum.reduceat(days, starts)[np.cumsum(new_key) - 1]
+            cutoff = day_number(today) - self.retain_days
+            keep = new_pair & ((days >= cutoff) | (days == latest_day))
+            kept = keep.sum()
+            self._publish(
+                keys[keep], days[keep].astype(np.uint32), prices[keep],
+                replaces=[s.path.name for s in segments],
+                changed=changed[keep],
+                created_at=max(s.created_at for s in segments),
+            )
+            logger.info("Compacted %d segments into %d records", len(segments), kept)
+            return int(kept)
+
+    def _publish(
+        self,
+        keys: np.ndarray,
+        days: np.ndarray,
+        prices: np.ndarray,
+        replaces: list[str],
+        *,
+        changed: np.ndarray,
+        created_at: float,
+    ) -> Path:
+        with self._lock:
+            manifest = self._manifest()
+            generation = manifest["generation"] + 1
+            path = self.directory / f"segment-{generation:08d}.cps"
+            write_segment(path, keys, days, prices, created_at, changed)
+            names = [n for n in manifest["segments"] if n not in replaces]
+            # A compacted segment holds the oldest data, so it goes first (oldest position)
+            names = [path.name, *names] if replaces else [*names, path.name]
+            self._write_manifest(generation, names)
+            self._reload()
+            for name in replaces:
+                try:
+                    (self.directory / name).unlink()
+                except OSError as e:  # e.g. still mapped on platforms that refuse the unlink
+                    logger.warning("Could not remove compacted segment %s: %s", name, e)
+            return path
+
+    def close(self) -> None:
+        with self._lock:
+            for segment in self._segments:
+                segment.close()
+            self._segments = []
+            self._generation = 0
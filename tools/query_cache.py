@@ -0,0 +1,240 @@
+"""Result cache for read queries with table-level invalidation and PRAGMA data_version."""
+
+import logging
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ALL_TABLES = "*"
+_ENTRY_OVERHEAD = 200  # bytes of bookkeeping per entry, roughly
+_IDENTIFIER = re.compile(r"[A-Za-z_]\w*")
+_WRITE_TARGET = re.compile(
+    r"\b(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|DELETE\s+FROM"
+    r"|(?<!\bDO\s)UPDATE(?:\s+OR\s+\w+)?)\s+"  # not an upsert's DO UPDATE SET
+    r"[\"`\[]?(\w+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class _Entry:
+    value: str
+    tables: frozenset[str]
+    size: int
+
+
+class QueryResultCache:
+    """
+    Serialized results of read queries, keyed by the caller (normalized SQL, params and
+    paging), each tagged with the tables the query reads. Writes made through
+    ``writing(statement)`` drop only the entries that read a written table, including
+    tables written by triggers. Writes from anywhere else, such as other connections,
+    processes or DDL, show up as a change of ``PRAGMA data_version`` on a dedicated
+    connection, which clears everything. Entries are evicted least recently used
+    beyond ``max_bytes``.
+    """
+
+    def __init__(self, db_path: Path | str, *, max_bytes: int = 16 * 1024 * 1024) -> None:
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_bytes // 8
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.RLock()
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._version: Optional[int] = None
+        self._tables: Optional[set[str]] = None
+        self._views: set[str] = set()
+        self._writes: dict[str, frozenset[str]] = {}
+        self._counts = {"hits": 0, "misses": 0, "invalidated": 0, "external_changes": 0}
+
+    @classmethod
+    def from_settings(cls, db_path: Path | str) -> "QueryResultCache":
+        return cls(db_path, max_bytes=get_settings().erp_query_cache_bytes)
+
+    # ----- lookups -----
+
+    @property
+    def generation(self) -> int:
+        """Read after a miss and pass to put(), so results that raced a write are not cached."""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._check_external()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counts["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counts["hits"] += 1
+            return entry.value
+
+    def put(self, key: str, sql: str, value: str, generation: int) -> None:
+        """Cache ``value`` for ``key`` unless a write happened since ``generation``."""
+        size = len(key) + len(value) + _ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            if self._check_external() or generation != self._generation:
+                return
+            tables = self.tables_read(sql)
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(value, tables, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def tables_read(self, sql: str) -> frozenset[str]:
+        """Tables named in ``sql``; ALL_TABLES if it reads a view."""
+        with self._lock:
+            tables, views = self._schema()
+            names = {name.lower() for name in _IDENTIFIER.findall(sql)}
+            if names & views:
+                return frozenset([ALL_TABLES])
+            return frozenset(names & tables)
+
+    # ----- invalidation -----
+
+    @contextmanager
+    def writing(
+        self, statement: Optional[str] = None, tables: Optional[Iterable[str]] = None
+    ) -> Iterator[Callable[[sqlite3.Connection], None]]:
+        """
+        Run a write on behalf of the cache: entries reading the written tables (given,
+        or parsed from ``statement``; everything if neither works) are dropped afterwards.
+        Commit the write with the yielded ``commit(conn)``: it checks data_version while
+        the write still holds SQLite's write lock, so the write's own change is accepted
+        only if nothing else committed since the write began. Otherwise, or if the write
+        was committed some other way, a moved data_version clears everything. The lock is
+        not held during the write itself, so lookups and other writes are not serialized
+        behind it; a result read while it ran is not cached (see generation).
+        """
+        with self._lock:
+            self._check_external()
+            before = self._version
+        committed: list[int] = []  # data_version right after our commit, if nothing else committed first
+
+        def commit(conn: sqlite3.Connection) -> None:
+            with self._lock:
+                clean = self._data_version() == before
+            conn.commit()
+            with self._lock:
+                if clean:
+                    committed.append(self._data_version())
+
+        try:
+            yield commit
+        finally:
+            with self._lock:
+                if tables is not None:
+                    self._schema()
+                    tables = frozenset().union(*(self._writes.get(t, {t}) for t in tables))
+                elif statement is not None:
+                    tables = self.tables_written(statement)
+                self.invalidate(tables)
+                self._version = committed[0] if committed else before
+                self._check_external()
+
+    def tables_written(self, statement: str) -> Optional[frozenset[str]]:
+        """Target table of an INSERT/UPDATE/DELETE plus what its triggers write; None if unknown."""
+        match = _WRITE_TARGET.match(statement.strip())
+        if match is None:
+            return None
+        self._schema()
+        return self._writes.get(match.group(1).lower(), frozenset([match.group(1).lower()]))
+
+    def invalidate(self, tables: Optional[Iterable[str]] = None) -> int:
+        """Drop entries reading any of ``tables`` (all entries for None); returns how many."""
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                self._tables = None  # the schema may have changed too
+            else:
+                targets = set(tables)
+                stale = [
+                    k for k, e in self._entries.items()
+                    if ALL_TABLES in e.tables or not targets.isdisjoint(e.tables)
+                ]
+                for key in stale:
+                    self._bytes -= self._entries.pop(key).size
+                dropped = len(stale)
+            self._counts["invalidated"] += dropped
+            return dropped
+
+    def _check_external(self) -> bool:
+        """Caller holds the lock. Clear everything if another connection committed."""
+        version = self._data_version()
+        if self._version is None or version == self._version:
+            self._version = version
+            return False
+        self._version = version
+        self._counts["external_changes"] += 1
+        if self._entries:
+            logger.debug("ERP changed outside DatabaseTool; dropping %d cached results", len(self._entries))
+        self.invalidate()
+        return True
+
+    def _data_version(self) -> int:
+        if self._watcher is None:
+            self._watcher = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def _schema(self) -> tuple[set[str], set[str]]:
+        """Caller holds the lock. (tables, views), and what writing each table writes."""
+        if self._tables is None:
+            self._data_version()
+            rows = self._watcher.execute("SELECT type, name, tbl_name, sql FROM sqlite_master").fetchall()
+            self._tables = {r[1].lower() for r in rows if r[0] == "table"}
+            self._views = {r[1].lower() for r in rows if r[0] == "view"}
+            direct: dict[str, set[str]] = {t: {t} for t in self._tables}
+            for kind, _, table, sql in rows:
+                if kind == "trigger" and table.lower() in direct:
+                    body = re.split(r"\bBEGIN\b", sql or "", maxsplit=1, flags=re.IGNORECASE)[-1]
+                    direct[table.lower()] |= {t.lower() for t in _WRITE_TARGET.findall(body)}
+            for table in direct:  # triggers firing triggers
+                closure, frontier = set(), [table]
+                while frontier:
+                    t = frontier.pop()
+                    if t not in closure:
+                        closure.add(t)
+                        frontier.extend(direct.get(t, ()))
+                self._writes[table] = frozenset(closure)
+        return self._tables, self._views
+
+    # ----- reporting -----
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            lookups = self._counts["hits"] + self._counts["misses"]
+            return dict(
+                self._counts,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hit_ratio=round(self._counts["hits"] / lookups, 4) if lookups else 0.0,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self.invalidate()
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+                self._version = None
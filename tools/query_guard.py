@@ -0,0 +1,388 @@
+"""EXPLAIN QUERY PLAN guard, slow-query statistics and index advisor for agent SQL."""
+
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from config import get_settings
+from tools.db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# SQLite's own planner assumptions without ANALYZE statistics: an equality lookup on an
+# index matches ~10 rows and each range bound keeps ~1/4 of the table.
+_EQ_ROWS = 10
+_RANGE_FACTOR = 4
+_TABLE_ROWS_TTL = 30.0  # also how long a plan (and its estimate) is cached
+_PLAN_CACHE_SIZE = 256
+_MAX_PATTERNS = 500
+
+_STEP = re.compile(r"^(SCAN|SEARCH) (\w+)(?: AS \w+)?(?: USING (.*))?$")
+_CORRELATED = ("CORRELATED",)
+_FROM = re.compile(
+    r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!(?:WHERE|ON|USING|JOIN|LEFT|RIGHT|INNER|OUTER|"
+    r"CROSS|NATURAL|GROUP|ORDER|LIMIT|HAVING|UNION|EXCEPT|INTERSECT|WINDOW)\b)(\w+))?",
+    re.IGNORECASE,
+)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_COLUMN_REF = re.compile(
+    r"(?:\b(\w+)\.)?\b(\w+)\b\s*(==|=|<=|>=|<>|!=|<|>|\bIN\b|\bIS\b|\bBETWEEN\b|\bLIKE\b|\bGLOB\b)",
+    re.IGNORECASE,
+)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\s+(.*?)(?:\bLIMIT\b|\)|$)", re.IGNORECASE | re.DOTALL)
+
+
+@dataclass
+class QueryPlan:
+    """EXPLAIN QUERY PLAN of one statement with a worst-case rows-examined estimate."""
+
+    steps: list[str]
+    cost: float
+    full_scans: list[str] = field(default_factory=list)  # tables read without an index
+
+    def describe(self) -> str:
+        return "; ".join(self.steps)
+
+
+@dataclass
+class IndexSuggestion:
+    """A CREATE INDEX the advisor derived from queries that scanned ``table``."""
+
+    table: str
+    columns: tuple[str, ...]
+    hits: int = 0
+    created: bool = False
+
+    @property
+    def name(self) -> str:
+        return f"idx_auto_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def sql(self) -> str:
+        return f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table}({', '.join(self.columns)})"
+
+
+@dataclass
+class QueryStats:
+    """Running totals for one normalized query shape."""
+
+    query: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow: int = 0
+    rejected: int = 0
+    plan: str = ""
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class QueryRejected(Exception):
+    """The estimated cost of a query is above the guard's limit."""
+
+
+def normalize_sql(sql: str) -> str:
+    """Query shape: literals replaced by ?, whitespace collapsed (for statistics)."""
+    return " ".join(_LITERAL.sub("?", sql).split())
+
+
+class QueryGuard:
+    """
+    Inspects agent SELECTs before they run. EXPLAIN QUERY PLAN (cached per statement) is
+    turned into a worst-case estimate of rows examined: scans cost the table's size,
+    index lookups SQLite's default selectivities, nested loops and correlated subqueries
+    multiply and temp b-trees (sorts) add; the final ORDER BY of a statement run under a
+    LIMIT is a top-N sort, one pass over its input. Queries above ``max_cost`` are rejected with
+    the plan and an index hint instead of being run. Every executed query is timed per
+    normalized shape; those slower than ``slow_ms`` are logged. Full scans of tables with
+    at least ``min_table_rows`` rows feed the index advisor, which derives an index from
+    the equality, range and ORDER BY columns of the scanned table (covering, when the
+    query touches few columns) and, with ``auto_index``, creates it once it has been
+    suggested ``auto_index_min_hits`` times.
+    """
+
+    def __init__(
+        self,
+        pool: Callable[[], ConnectionPool],
+        *,
+        max_cost: float = 5_000_000,
+        slow_ms: float = 200.0,
+        min_table_rows: int = 1000,
+        auto_index: bool = False,
+        auto_index_min_hits: int = 3,
+    ) -> None:
+        self._pool = pool
+        self.max_cost = max_cost
+        self.slow_ms = slow_ms
+        self.min_table_rows = min_table_rows
+        self.auto_index = auto_index
+        self.auto_index_min_hits = auto_index_min_hits
+        self._plans: OrderedDict[tuple[str, Optional[int]], tuple[QueryPlan, float]] = OrderedDict()
+        self._table_rows: dict[str, tuple[int, float]] = {}
+        self._columns: dict[str, list[str]] = {}
+        self._stats: OrderedDict[str, QueryStats] = OrderedDict()
+        self._suggestions: dict[tuple[str, tuple[str, ...]], IndexSuggestion] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, pool: Callable[[], ConnectionPool]) -> "QueryGuard":
+        settings = get_settings()
+        return cls(
+            pool,
+            max_cost=settings.erp_query_max_cost,
+            slow_ms=settings.erp_slow_query_ms,
+            auto_index=settings.erp_auto_index,
+            auto_index_min_hits=settings.erp_auto_index_min_hits,
+        )
+
+    # ----- inspection -----
+
+    def check(
+        self,
+        sql: str,
+        params: Optional[list[Any]] = None,
+        *,
+        executed: Optional[tuple[str, list[Any]]] = None,
+        limit: Optional[int] = None,
+    ) -> QueryPlan:
+        """
+        Plan ``sql``; raises QueryRejected if its estimated cost exceeds max_cost.
+        ``executed`` is the (SQL, params) actually run for it, e.g. ``sql`` wrapped in a
+        LIMIT of ``limit`` rows; that statement is what gets planned and estimated.
+        """
+        plan = self.explain(*(executed or (sql, params)), limit=limit)
+        if plan.full_scans:
+            self._advise(sql, plan)
+        if plan.cost > self.max_cost:
+            with self._lock:
+                self._stat(sql, plan).rejected += 1
+            hints = [s.sql for s in self.suggestions() if s.table in plan.full_scans and not s.created]
+            raise QueryRejected(
+                f"estimated {plan.cost:,.0f} rows examined exceeds the limit of {self.max_cost:,.0f} "
+                f"(plan: {plan.describe()}). Filter on an indexed column, join on ids or add LIMIT"
+                + (f"; suggested index: {hints[0]}" if hints else "")
+            )
+        return plan
+
+    def explain(
+        self, sql: str, params: Optional[list[Any]] = None, *, limit: Optional[int] = None
+    ) -> QueryPlan:
+        key = (sql, limit)
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None and time.monotonic() - cached[1] < _TABLE_ROWS_TTL:
+                self._plans.move_to_end(key)
+                return cached[0]
+        with self._pool().connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", list(params or [])).fetchall()
+            aliases = _aliases(sql)
+            tables = {aliases.get(_step_table(r[3]) or "", _step_table(r[3])) for r in rows} - {None}
+            sizes = {t: self._rows_in(conn, t) for t in tables}
+        plan = _estimate(rows, aliases, sizes, limit)
+        with self._lock:
+            self._plans[key] = (plan, time.monotonic())
+            self._plans.move_to_end(key)
+            while len(self._plans) > _PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _rows_in(self, conn: sqlite3.Connection, table: str) -> int:
+        """Approximate row count (MAX(rowid): an index seek, not a count), cached briefly."""
+        cached = self._table_rows.get(table)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < _TABLE_ROWS_TTL:
+            return cached[0]
+        try:
+            count = conn.execute(f'SELECT MAX(rowid) FROM "{table}"').fetchone()[0] or 0
+        except sqlite3.Error:
+            count = 0  # views, CTE names and virtual tables
+        self._table_rows[table] = (count, now)
+        return count
+
+    # ----- statistics -----
+
+    def record(self, sql: str, elapsed_ms: float, plan: Optional[QueryPlan] = None) -> None:
+        """Add one execution to the statistics of the query's shape; log it if slow."""
+        with self._lock:
+            stats = self._stat(sql, plan)
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            slow = elapsed_ms >= self.slow_ms
+            if slow:
+                stats.slow += 1
+        if slow:
+            logger.warning(
+                "Slow ERP query (%.0f ms): %s | plan: %s",
+                elapsed_ms, stats.query[:300], stats.plan or "n/a",
+            )
+
+    def _stat(self, sql: str, plan: Optional[QueryPlan]) -> QueryStats:
+        """Caller holds the lock."""
+        key = normalize_sql(sql)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = QueryStats(key)
+            while len(self._stats) > _MAX_PATTERNS:
+                self._stats.popitem(last=False)
+        self._stats.move_to_end(key)
+        if plan is not None:
+            stats.plan = plan.describe()
+        return stats
+
+    def slow_queries(self, limit: int = 20) -> list[QueryStats]:
+        """Query shapes by total time spent, slowest first."""
+        with self._lock:
+            return sorted(self._stats.values(), key=lambda s: -s.total_ms)[:limit]
+
+    # ----- index advisor -----
+
+    def suggestions(self) -> list[IndexSuggestion]:
+        with self._lock:
+            return sorted(self._suggestions.values(), key=lambda s: -s.hits)
+
+    def _advise(self, sql: str, plan: QueryPlan) -> None:
+        aliases = _aliases(sql)
+        for table in plan.full_scans:
+            if self._table_rows.get(table, (0, 0.0))[0] < self.min_table_rows:
+                continue
+            columns = self._index_columns(sql, table, aliases)
+            if not columns:
+                continue
+            with self._lock:
+                suggestion = self._suggestions.setdefault((table, columns), IndexSuggestion(table, columns))
+                suggestion.hits += 1
+                create = self.auto_index and not suggestion.created and suggestion.hits >= self.auto_index_min_hits
+            if create:
+                self.create_index(suggestion)
+
+    def _index_columns(self, sql: str, table: str, aliases: dict[str, str]) -> tuple[str, ...]:
+        known = self._table_columns(table)
+        others = {t for t in aliases.values() if t != table}
+        shared = {c for t in others for c in self._table_columns(t)}
+
+        def owned(qualifier: Optional[str], column: str) -> bool:
+            if column not in known:
+                return False
+            if qualifier:
+                return aliases.get(qualifier.lower(), qualifier.lower()) == table
+            return column not in shared
+
+        equality: list[str] = []
+        ranged: list[str] = []
+        for qualifier, column, op in _COLUMN_REF.findall(sql):
+            column = column.lower()
+            if not owned(qualifier, column):
+                continue
+            target = equality if op.upper() in ("=", "==", "IN", "IS") else ranged
+            if column not in equality and column not in ranged:
+                target.append(column)
+        order: list[str] = []
+        for clause in _ORDER_BY.findall(sql):
+            for term in clause.split(","):
+                parts = term.strip().split()
+                if parts:
+                    qualifier, _, column = parts[0].rpartition(".")
+                    if owned(qualifier or None, column.lower()) and column.lower() not in equality:
+                        order.append(column.lower())
+        leading = equality + (ranged[:1] if ranged else order[:1])
+        if not leading or leading == ["id"]:
+            return ()
+        # Covering: carry the other columns this query reads from the table, if few
+        referenced = {c for c in known if re.search(rf"\b{c}\b", sql, re.IGNORECASE)} - set(leading) - {"id"}
+        star = re.search(r"(?:\bSELECT\s+|\.)\*", sql, re.IGNORECASE)
+        if star is None and len(leading) + len(referenced) <= 5:
+            leading += sorted(referenced)
+        return tuple(leading)
+
+    def _table_columns(self, table: str) -> list[str]:
+        if table not in self._columns:
+            with self._pool().connection() as conn:
+                self._columns[table] = [r[1].lower() for r in conn.execute(f'PRAGMA table_info("{table}")')]
+        return self._columns[table]
+
+    def create_index(self, suggestion: IndexSuggestion) -> None:
+        """Create a suggested index and drop cached plans so queries are re-planned."""
+        logger.warning("Creating advised index: %s (seen in %d queries)", suggestion.sql, suggestion.hits)
+        with self._pool().connection() as conn:
+            conn.execute(suggestion.sql)
+            conn.commit()
+        with self._lock:
+            suggestion.created = True
+            self._plans.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "queries": sum(s.calls for s in self._stats.values()),
+                "slow": sum(s.slow for s in self._stats.values()),
+                "rejected": sum(s.rejected for s in self._stats.values()),
+                "suggested_indexes": [s.sql for s in self._suggestions.values() if not s.created],
+                "created_indexes": [s.name for s in self._suggestions.values() if s.created],
+            }
+
+
+def _aliases(sql: str) -> dict[str, str]:
+    """alias (or table name) -> table name, lower-cased, from FROM / JOIN clauses."""
+    mapping: dict[str, str] = {}
+    for table, alias in _FROM.findall(sql):
+        table = table.lower()
+        mapping[table] = table
+        if alias:
+            mapping[alias.lower()] = table
+    return mapping
+
+
+def _step_table(detail: str) -> Optional[str]:
+    match = _STEP.match(detail)
+    return match.group(2).lower() if match else None
+
+
+def _estimate(
+    rows: list[Any], aliases: dict[str, str], sizes: dict[str, int], limit: Optional[int] = None
+) -> QueryPlan:
+    """
+    Worst-case rows examined for EXPLAIN QUERY PLAN rows (id, parent, notused, detail) of
+    a statement that stops after ``limit`` rows (None: runs to completion).
+    """
+    loops: dict[int, float] = {0: 1.0}
+    cost = 0.0
+    full_scans: list[str] = []
+    for node_id, parent, _, detail in rows:
+        outer = loops.get(parent, 1.0)
+        match = _STEP.match(detail)
+        if match is None:
+            if detail.startswith("USE TEMP B-TREE"):
+                if limit is not None and parent == 0 and detail.endswith("ORDER BY"):
+                    cost += outer  # top-N sort: each row passes a heap of ``limit`` rows once
+                else:
+                    cost += outer * max(math.log2(max(outer, 2)), 1)
+            # Correlated subqueries run once per outer row; other subqueries once
+            loops[node_id] = outer if detail.startswith(_CORRELATED) else 1.0
+            continue
+        kind, name, using = match.group(1), match.group(2).lower(), match.group(3) or ""
+        table = aliases.get(name, name)
+        size = float(max(sizes.get(table, 0), 1))
+        if kind == "SCAN":
+            step = size
+            if not using and table not in full_scans:
+                full_scans.append(table)
+        else:
+            if "AUTOMATIC" in using:
+                cost += size  # the transient index is built from a full scan
+            constraint = using[using.rfind("(") :] if "(" in using else ""
+            if "=" in constraint.replace(">=", "").replace("<=", ""):
+                step = 1.0 if "INTEGER PRIMARY KEY" in using else float(_EQ_ROWS)
+            else:
+                step = size / _RANGE_FACTOR ** max(constraint.count(">") + constraint.count("<"), 1)
+        cost += outer * step
+        loops[parent] = outer * max(step, 1.0)
+    return QueryPlan([r[3] for r in rows], cost, full_scans)
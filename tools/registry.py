@@ -0,0 +1,154 @@
+"""Process-wide registry that builds each LangChain tool once and shares it across agents and crews."""
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Optional
+
+from tools.db_pool import close_all_pools
+
+if TYPE_CHECKING:
+    from tools.competitor_scraper_tool import CompetitorScraperTool
+    from tools.database_tool import DatabaseTool
+    from tools.knowledge_base_tool import KnowledgeBaseTool
+    from tools.supplier_communication_tool import SupplierCommunicationTool
+
+logger = logging.getLogger(__name__)
+
+DATABASE_TOOL = "erp_database"
+SUPPLIER_TOOL = "supplier_communication"
+COMPETITOR_TOOL = "competitor_scraper"
+KNOWLEDGE_TOOL = "knowledge_base"
+
+
+# Factories import their tool module on first use so importing the registry stays cheap
+def _database_tool() -> "DatabaseTool":
+    from tools.database_tool import DatabaseTool
+
+    return DatabaseTool()
+
+
+def _supplier_tool() -> "SupplierCommunicationTool":
+    from tools.supplier_communication_tool import SupplierCommunicationTool
+
+    return SupplierCommunicationTool()
+
+
+def _competitor_tool() -> "CompetitorScraperTool":
+    from tools.competitor_scraper_tool import CompetitorScraperTool
+
+    return CompetitorScraperTool()
+
+
+def _knowledge_tool() -> "KnowledgeBaseTool":
+    from tools.knowledge_base_tool import KnowledgeBaseTool
+
+    return KnowledgeBaseTool()
+
+
+_DEFAULT_FACTORIES: dict[str, Callable[[], Any]] = {
+    DATABASE_TOOL: _database_tool,
+    SUPPLIER_TOOL: _supplier_tool,
+    COMPETITOR_TOOL: _competitor_tool,
+    KNOWLEDGE_TOOL: _knowledge_tool,
+}
+
+
+class ToolRegistry:
+    """
+    Lazily builds tool instances from registered factories and caches them.
+    Call warm_up() at startup to pay construction cost (settings, schema DDL)
+    up front, and teardown() on shutdown to release pooled resources.
+    """
+
+    def __init__(self, factories: Optional[dict[str, Callable[[], Any]]] = None) -> None:
+        self._factories: dict[str, Callable[[], Any]] = dict(
+            _DEFAULT_FACTORIES if factories is None else factories
+        )
+        self._instances: dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, factory: Callable[[], Any]) -> None:
+        """Register (or replace) the factory for ``name``; drops any cached instance."""
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def provide(self, name: str, instance: Any) -> None:
+        """Inject a pre-built instance for ``name`` (e.g. a tool bound to a test database)."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance for ``name``, building it on first use."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                if name not in self._factories:
+                    raise KeyError(f"No tool registered under {name!r}")
+                instance = self._factories[name]()
+                self._instances[name] = instance
+                logger.debug("Built shared tool instance %s", name)
+            return instance
+
+    @property
+    def database_tool(self) -> "DatabaseTool":
+        return self.get(DATABASE_TOOL)
+
+    @property
+    def supplier_tool(self) -> "SupplierCommunicationTool":
+        return self.get(SUPPLIER_TOOL)
+
+    @property
+    def competitor_tool(self) -> "CompetitorScraperTool":
+        return self.get(COMPETITOR_TOOL)
+
+    @property
+    def knowledge_tool(self) -> "KnowledgeBaseTool":
+        return self.get(KNOWLEDGE_TOOL)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> None:
+        """Build the given tools (default: all registered) so the first agent call is not cold."""
+        for name in list(names if names is not None else self._factories):
+            self.get(name)
+        logger.info("Tool registry warmed up: %s", ", ".join(sorted(self._instances)))
+
+    def teardown(self) -> None:
+        """Close tools that expose close(), drop cached instances and close DB pools."""
+        with self._lock:
+            instances = list(self._instances.items())
+            self._instances.clear()
+        for name, instance in instances:
+            close = getattr(instance, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning("Error closing tool %s: %s", name, e)
+        close_all_pools()
+        logger.info("Tool registry torn down")
+
+
+_registry: ToolRegistry | None = None
+_registry_lock = threading.Lock()
+
+
+def get_tool_registry() -> ToolRegistry:
+    """Return singleton tool registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ToolRegistry()
+    return _registry
+
+
+def reset_tool_registry() -> None:
+    """Tear down and discard the singleton registry (next get_tool_registry() builds a fresh one)."""
+    global _registry
+    with _registry_lock:
+        registry, _registry = _registry, None
+    if registry is not None:
+        registry.teardown()
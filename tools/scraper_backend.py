@@ -0,0 +1,216 @@
+"""Asyncio competitor price backend: persistent pooled session, concurrency limit, shared rate limit, retries."""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Coroutine, Iterable, Optional
+from urllib.parse import quote
+
+import aiohttp
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Token bucket: ``rate`` tokens per second, bursts up to ``capacity``. Thread-safe and
+    not tied to an event loop, so one bucket can be shared by every caller in the process.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token; seconds to wait before using it (tokens may be borrowed ahead)."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+_buckets: dict[tuple[str, float], TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def shared_bucket(base_url: str, rate: float) -> TokenBucket:
+    """The process-wide TokenBucket for ``base_url`` at ``rate`` requests per second."""
+    with _buckets_lock:
+        bucket = _buckets.get((base_url, rate))
+        if bucket is None:
+            bucket = _buckets[(base_url, rate)] = TokenBucket(rate)
+        return bucket
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Prices per SKU, and the error for each SKU that still failed after retries."""
+
+    prices: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ScraperBackendConfig:
+    """Network settings for the competitor price API."""
+
+    base_url: str
+    concurrency: int = 64
+    rate_limit: float = 200.0
+    timeout: float = 5.0
+    max_retries: int = 3
+    backoff_base: float = 0.1
+    backoff_max: float = 2.0
+
+    @classmethod
+    def from_settings(cls) -> Optional["ScraperBackendConfig"]:
+        """Build a config from COMPETITOR_* settings; None if no API URL is configured."""
+        settings = get_settings()
+        if not settings.competitor_api_url:
+            return None
+        return cls(
+            base_url=settings.competitor_api_url,
+            concurrency=settings.competitor_concurrency,
+            rate_limit=settings.competitor_rate_limit,
+            timeout=settings.competitor_timeout,
+            max_retries=settings.competitor_max_retries,
+        )
+
+
+class AsyncScraperBackend:
+    """
+    Fetches competitor prices from ``GET {base_url}/prices/{sku}?count=N``. Requests run
+    on the backend's own event loop thread with one persistent pooled session, so
+    connections are reused across calls from sync code and from any other loop. All
+    backends for the same API share one process-wide rate limit (shared_bucket).
+    close() ends the session and the loop thread.
+    """
+
+    def __init__(self, config: ScraperBackendConfig) -> None:
+        self.config = config
+        self._bucket = shared_bucket(config.base_url, config.rate_limit)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _submit(self, coro: Coroutine[Any, Any, Any]) -> "Future[Any]":
+        """Schedule ``coro`` on the backend loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=loop.run_forever, name="competitor-http", daemon=True
+                )
+                self._thread.start()
+                self._loop = loop
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        """Runs on the backend loop: the pooled session, created on first request."""
+        if self._session is None:
+            cfg = self.config
+            connector = aiohttp.TCPConnector(limit=cfg.concurrency, limit_per_host=cfg.concurrency)
+            self._session = aiohttp.ClientSession(
+                base_url=cfg.base_url.rstrip("/") + "/",
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=cfg.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(cfg.concurrency)
+        return self._session
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        cap = min(self.config.backoff_max, self.config.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    async def _fetch_one(self, sku: str, competitor_count: int) -> list[float]:
+        session = self._ensure_session()
+        last_error: Exception | None = None
+        for attempt in range(self.config.max_retries + 1):
+            await self._bucket.acquire()
+            try:
+                async with self._semaphore:
+                    async with session.get(
+                        f"prices/{quote(sku, safe='')}", params={"count": competitor_count}
+                    ) as resp:
+                        if resp.status in _RETRY_STATUSES:
+                            raise aiohttp.ClientResponseError(
+                                resp.request_info, resp.history, status=resp.status
+                            )
+                        resp.raise_for_status()
+                        data = await resp.json()
+                return [float(p) for p in data["competitor_prices"]]
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if isinstance(e, aiohttp.ClientResponseError) and e.status not in _RETRY_STATUSES:
+                    raise
+                last_error = e
+                if attempt < self.config.max_retries:
+                    await asyncio.sleep(self._backoff(attempt))
+        raise RuntimeError(f"Competitor API failed for {sku}: {last_error!s}")
+
+    async def _fetch_many(self, skus: list[str], competitor_count: int) -> FetchResult:
+        results = await asyncio.gather(
+            *(self._fetch_one(sku, competitor_count) for sku in skus), return_exceptions=True
+        )
+        result = FetchResult()
+        for sku, outcome in zip(skus, results):
+            if isinstance(outcome, BaseException):
+                result.errors[sku] = str(outcome) or type(outcome).__name__
+            else:
+                result.prices[sku] = outcome
+        if result.errors:
+            logger.warning(
+                "Competitor API: %d of %d SKUs failed (e.g. %s)",
+                len(result.errors), len(skus), next(iter(result.errors.values())),
+            )
+        return result
+
+    async def fetch_prices(self, sku: str, competitor_count: int = 3) -> list[float]:
+        """Fetch prices for one SKU (with retries); raises if it still fails."""
+        return await asyncio.wrap_future(self._submit(self._fetch_one(sku, competitor_count)))
+
+    async def fetch_many(self, skus: Iterable[str], competitor_count: int = 3) -> FetchResult:
+        """Fetch prices for many SKUs concurrently; SKUs that fail after retries are in ``errors``."""
+        unique = list(dict.fromkeys(skus))
+        return await asyncio.wrap_future(self._submit(self._fetch_many(unique, competitor_count)))
+
+    def fetch_many_sync(self, skus: Iterable[str], competitor_count: int = 3) -> FetchResult:
+        """Blocking fetch_many for sync callers (safe inside a running event loop too)."""
+        unique = list(dict.fromkeys(skus))
+        return self._submit(self._fetch_many(unique, competitor_count)).result()
+
+    def close(self) -> None:
+        """Close the pooled session and stop the loop thread."""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = self._semaphore = None
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
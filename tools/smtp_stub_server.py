@@ -0,0 +1,93 @@
+"""
+Local SMTP stub (aiosmtpd) that records messages instead of delivering them.
+Run: python -m tools.smtp_stub_server [--port 8025]
+"""
+
+import argparse
+import logging
+import socket
+import threading
+import time
+from typing import Any, Optional
+
+from aiosmtpd.controller import Controller
+
+logger = logging.getLogger(__name__)
+
+
+class _RecordingHandler:
+    def __init__(self, reject: Optional[str] = None) -> None:
+        self.reject = reject
+        self.messages: list[dict[str, Any]] = []
+        self.peers: set[Any] = set()
+        self._lock = threading.Lock()
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        if self.reject is not None and self.reject.encode() in envelope.content:
+            return "554 Message rejected"
+        with self._lock:
+            self.peers.add(session.peer)
+            self.messages.append(
+                {
+                    "from": envelope.mail_from,
+                    "to": list(envelope.rcpt_tos),
+                    "data": envelope.content.decode("utf8", errors="replace"),
+                }
+            )
+        return "250 Message accepted for delivery"
+
+
+class SMTPStubServer:
+    """
+    Records received messages and the distinct client connections that sent them.
+    Messages containing ``reject`` are refused at DATA with a 554.
+    """
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: Optional[int] = None, *, reject: Optional[str] = None
+    ) -> None:
+        self.host = host
+        self.port = port or _free_port(host)
+        self._handler = _RecordingHandler(reject)
+        self._controller = Controller(self._handler, hostname=host, port=self.port)
+
+    @property
+    def messages(self) -> list[dict[str, Any]]:
+        return list(self._handler.messages)
+
+    @property
+    def connection_count(self) -> int:
+        """Number of distinct client connections that delivered at least one message."""
+        return len(self._handler.peers)
+
+    def start(self) -> "SMTPStubServer":
+        self._controller.start()
+        logger.info("SMTP stub server listening on %s:%s", self.host, self.port)
+        return self
+
+    def stop(self) -> None:
+        self._controller.stop()
+
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SMTP stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = SMTPStubServer(args.host, args.port).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 """Mock SMTP tool for sending supplier emails and alerts."""
 
+import json
 import logging
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import Any, Optional
+import queue
+import threading
+from typing import TYPE_CHECKING, Any, Optional
 
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from config import get_settings
+from tools.mail_dispatch import MailDispatcher, OutgoingEmail
+
+if TYPE_CHECKING:
+    from tools.async_executor import BoundedExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +30,10 @@ class SendEmailInput(BaseModel):
 class SupplierCommunicationTool(BaseTool):
     """
     Send automated emails to suppliers (e.g. reorder alerts). Uses real SMTP when
-    configured; otherwise logs the email (mock mode).
+    configured; otherwise logs the email (mock mode). Real sends go through a
+    MailDispatcher (pooled SMTP sessions); with SMTP_ASYNC_DISPATCH the call returns
+    as soon as the email is queued. Async calls that send inline run on a bounded pool
+    of SMTP_POOL_SIZE threads, one per pooled session.
     """
 
     name: str = "supplier_communication"
@@ -35,6 +42,9 @@ class SupplierCommunicationTool(BaseTool):
         "Use for reorder requests, alerts, or notifications. In mock mode, "
         "the email is logged but not sent."
     )
+    dispatcher: Optional[Any] = None
+    _executor: Optional["BoundedExecutor"] = PrivateAttr(default=None)
+    _executor_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
 
     def _run(self, raw_input: str, **kwargs: Any) -> str:
         """Send email (or log in mock mode). Parses JSON or key=value from raw_input."""
@@ -49,7 +59,7 @@ class SupplierCommunicationTool(BaseTool):
         reply_to: Optional[str] = None,
     ) -> str:
         settings = get_settings()
-        if settings.smtp_mock_mode:
+        if self.dispatcher is None and settings.smtp_mock_mode:
             logger.info(
                 "[MOCK SMTP] To=%s Subject=%s Body=%s",
                 to_email,
@@ -57,33 +67,51 @@ class SupplierCommunicationTool(BaseTool):
                 body[:200] + "..." if len(body) > 200 else body,
             )
             return '{"status": "mock_sent", "message": "Email logged (mock mode)"}'
-        try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = subject
-            msg["From"] = settings.smtp_user or "noreply@orchestrator.local"
-            msg["To"] = to_email
-            if reply_to:
-                msg["Reply-To"] = reply_to
-            msg.attach(MIMEText(body, "plain"))
-            with smtplib.SMTP(settings.smtp_host, settings.smtp_port) as server:
-                if settings.smtp_use_tls:
-                    server.starttls()
-                if settings.smtp_user and settings.smtp_password:
-                    server.login(settings.smtp_user, settings.smtp_password)
-                server.sendmail(
-                    msg["From"],
-                    to_email,
-                    msg.as_string(),
+        dispatcher = self._get_dispatcher()
+        if settings.smtp_async_dispatch:
+            try:
+                message_id = dispatcher.enqueue(to_email, subject, body, reply_to)
+            except queue.Full:
+                logger.error("Mail queue full; email to %s not queued", to_email)
+                return json.dumps({"status": "error", "message": "mail queue full"})
+            return json.dumps({"status": "queued", "to": to_email, "message_id": message_id})
+        email = OutgoingEmail(to_email, subject, body, reply_to)
+        error = dispatcher.pool.send_batch([email]).get(email.message_id, "not sent")
+        if error is not None:
+            logger.error("Failed to send email to %s: %s", to_email, error)
+            return json.dumps({"status": "error", "message": error})
+        logger.info("Email sent to %s: %s", to_email, subject)
+        return json.dumps({"status": "sent", "to": to_email})
+
+    def _get_dispatcher(self) -> MailDispatcher:
+        if self.dispatcher is None:
+            self.dispatcher = MailDispatcher.from_settings()
+        return self.dispatcher
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued emails have been sent (True if nothing is left pending)."""
+        return self.dispatcher.flush(timeout) if self.dispatcher is not None else True
+
+    def _get_executor(self) -> "BoundedExecutor":
+        with self._executor_lock:
+            if self._executor is None:
+                from tools.async_executor import BoundedExecutor
+
+                self._executor = BoundedExecutor.from_settings(
+                    "smtp-send", get_settings().smtp_pool_size
                 )
-            logger.info("Email sent to %s: %s", to_email, subject)
-            return '{"status": "sent", "to": "' + to_email + '"}'
-        except Exception as e:
-            logger.exception("Failed to send email to %s: %s", to_email, e)
-            return f'{{"status": "error", "message": "{e!s}"}}'
+            return self._executor
+
+    def close(self) -> None:
+        """Finish async sends, flush the mail queue and close pooled SMTP sessions."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.dispatcher is not None:
+            self.dispatcher.close()
 
     def _parse_input(self, raw: str) -> tuple[str, str, str, Optional[str]]:
         """Parse JSON or key=value input into to_email, subject, body, reply_to."""
-        import json
         raw = raw.strip()
         if raw.startswith("{"):
             data = json.loads(raw)
@@ -121,6 +149,19 @@ class SupplierCommunicationTool(BaseTool):
         to_email, subject, body, reply_to = self._parse_input(input)
         return self._send(to_email, subject, body, reply_to)
 
-    async def _arun(self, *args: Any, **kwargs: Any) -> str:
-        """Async: delegate to sync."""
-        return self._run(*args, **kwargs)
+    async def _arun(self, raw_input: str, **kwargs: Any) -> str:
+        """
+        Async send. Mock mode and queued dispatch return at once, so they run inline;
+        an inline SMTP send runs on the send pool and waits there, not on the event loop.
+        """
+        to_email, subject, body, reply_to = self._parse_input(raw_input)
+        settings = get_settings()
+        if (self.dispatcher is None and settings.smtp_mock_mode) or settings.smtp_async_dispatch:
+            return self._send(to_email, subject, body, reply_to)
+        from tools.async_executor import ExecutorSaturated
+
+        try:
+            return await self._get_executor().run(self._send, to_email, subject, body, reply_to)
+        except ExecutorSaturated as e:
+            logger.error("Email to %s not sent: %s", to_email, e)
+            return json.dumps({"status": "error", "message": str(e)})